@@ -4,6 +4,7 @@ PyWebview API Endpoints
 """
 
 import os
+import time
 import threading
 import asyncio
 import webbrowser
@@ -14,6 +15,17 @@ import webview
 
 from ..database.db import Database
 from ..scraper.scraper import BatchScraper
+from ..scraper.matcher import AddressMatcher
+from ..scraper.base import BaseScraper
+from ..scraper.listing_store import CURRENT_CITY
+from ..scraper.browser_service import BrowserService
+from ..scraper.consent import ConsentResolver
+
+
+# Obergrenze gleichzeitig offener Tabs beim parallelen Sammeln (alle Websites)
+MAX_OPEN_PAGES = 4
+# Obergrenze gleichzeitig laufender Such-Jobs (je Stadt und Website einer)
+MAX_PARALLEL_JOBS = 4
 
 
 class API:
@@ -39,6 +51,13 @@ class API:
         self._max_pages = 10
         self._total_pages_work = 0
         self._completed_pages = 0
+        self._stream_matchers = {}
+        self._address_cities = {}
+        self._stream_report_id = None
+        self._stream_seen = set()
+        self.browser_service = None
+        # Cookie-Banner: gelernte Selektoren pro Domain (ueber alle Suchen)
+        self.consent = ConsentResolver(self.db.get_consent_selectors(), log_callback=self.log)
     
     def log(self, msg: str):
         ts = datetime.now().strftime("%H:%M:%S")
@@ -106,6 +125,7 @@ class API:
         lines.append(f"Datum: {date_str}")
         lines.append(f"Adressen geprueft: {report['addresses_checked']}")
         lines.append(f"Treffer gefunden: {len(matches)}")
+        lines.append(f"Verschiedene Wohnungen: {self._count_flats(matches)}")
         lines.append(f"Suchmodus: {'Schnellsuche' if report['search_mode'] == 'quick' else 'Vollsuche'}")
         lines.append("")
         lines.append("=" * 60)
@@ -120,6 +140,8 @@ class API:
             lines.append(f"Adresse: {m.get('address_display', '-')}")
             lines.append(f"Website: {m.get('website_name', m.get('website', '-'))}")
             lines.append(f"Typ: {'EXAKTER TREFFER' if m.get('match_type') == 'exact' else 'Erweiterter Treffer'}")
+            if m.get('cluster_id'):
+                lines.append(f"Wohnung (Duplikat-Gruppe): {m['cluster_id']}")
             lines.append(f"Titel: {m.get('listing_title', '-')}")
             lines.append(f"URL: {m.get('listing_url', '-')}")
             lines.append("")
@@ -200,7 +222,7 @@ class API:
             "elapsed": elapsed
         }
     
-    def start_search(self, mode="quick", match_mode="exact", websites=None):
+    def start_search(self, mode="quick", match_mode="exact", websites=None, streaming=True, concurrent=True):
         if self.search_running:
             return {"error": "Suche laeuft bereits"}
         
@@ -225,7 +247,7 @@ class API:
         }
         self.selected_websites = websites
         
-        thread = threading.Thread(target=self._run_search, args=(mode, match_mode))
+        thread = threading.Thread(target=self._run_search, args=(mode, match_mode, streaming, concurrent))
         thread.daemon = True
         thread.start()
         
@@ -236,10 +258,235 @@ class API:
         self.log(">>> SUCHE WIRD GESTOPPT...")
         return {"status": "stopping"}
     
-    def _run_search(self, mode, match_mode):
-        asyncio.run(self._async_search(mode, match_mode))
+    def _run_search(self, mode, match_mode, streaming=True, concurrent=True):
+        search = self._async_search(mode, match_mode, streaming, concurrent)
+        if self._warm_browser():
+            # Playwright-Objekte des Service leben in dessen Event-Loop
+            self.browser_service.run(search)
+        else:
+            asyncio.run(search)
+    
+    # Browser Service
+    def start_browser_service(self, state_dir):
+        """Startet den langlebigen Browser (Cookies/Consent pro Website unter state_dir)"""
+        if self.browser_service is None:
+            self.browser_service = BrowserService(Path(state_dir), log_callback=self.log, consent=self.consent)
+            self.browser_service.start()
+        return {"status": "started"}
+    
+    def _warm_browser(self):
+        return self.browser_service is not None and self.browser_service.is_running()
+    
+    def shutdown(self):
+        """Beendet den Browser-Service (beim Schliessen der App)"""
+        if self.browser_service:
+            self.browser_service.stop()
+            self.browser_service = None
+        self._save_consent()
+    
+    def _record_match(self, report_id: str, m: dict):
+        """Speichert einen Treffer und zeigt ihn sofort an"""
+        self.db.add_match(
+            report_id, m['address_id'], m['address_display'],
+            m['website'], m['website_name'], m['url'], m['title'], m['match_type'],
+            m.get('cluster_id')
+        )
+        self.current_matches.append(m)
+        self.search_progress["matches"] = len(self.current_matches)
+        city = self.search_progress.get("cities", {}).get(self._address_cities.get(m['address_id']))
+        if city:
+            city["matches"] += 1
+        match_label = "EXAKT" if m['match_type'] == 'exact' else "ERWEITERT"
+        self.log(f"  [{match_label}] {m['address_display']}")
+        self.log(f"           -> {m['website_name']}")
+        self.log(f"           -> {m['url'][:60]}...")
+        self.log("")
+    
+    def _on_listings(self, listings):
+        """Callback fuer Scraper: gleicht neue Listings einer Seite sofort ab
+        
+        Jedes Listing wird nur mit den Adressen seiner Stadt verglichen.
+        """
+        if not self._stream_matchers:
+            return
+        try:
+            by_city = {}
+            for listing in listings:
+                by_city.setdefault(listing.city, []).append(listing)
+            for city, group in by_city.items():
+                matcher = self._stream_matchers.get(city)
+                if matcher is None:
+                    continue
+                for m in matcher.match(group):
+                    key = (m['url'], m['address_id'])
+                    if key in self._stream_seen:
+                        continue
+                    self._stream_seen.add(key)
+                    self._record_match(self._stream_report_id, m)
+        except Exception as e:
+            self.log(f"  ! Abgleich-Fehler: {str(e)[:50]}")
+    
+    def _log_duplicates(self, store):
+        """Protokolliert übersprungene Duplikate pro Website und Portal-Cluster"""
+        for website, count in store.duplicates.items():
+            self.log(f"#   {website}: {count} Duplikate uebersprungen")
+        if store.detector and store.detector.duplicate_count:
+            self.log(f"#   {store.detector.duplicate_count} Inserate auf mehreren Portalen erkannt")
+    
+    def _save_domain_rates(self, scheduler):
+        """Speichert die gelernte Crawl-Rate pro Domain fuer die naechste Suche"""
+        try:
+            for c in scheduler.stats():
+                self.log(f"#   {c.domain}: {c.rate:.2f} Seiten/s, {c.tabs} Tab(s), "
+                         f"{c.blocks} Block-Signale bei {c.pages} Seiten")
+            self.db.save_domain_rates(scheduler.learned_rates())
+        except Exception as e:
+            self.log(f"  ! Crawl-Raten nicht gespeichert: {str(e)[:50]}")
+    
+    def _save_consent(self):
+        """Speichert die gelernten Cookie-Banner-Selektoren"""
+        try:
+            self.db.save_consent_selectors(self.consent.learned)
+        except Exception as e:
+            self.log(f"  ! Consent-Selektoren nicht gespeichert: {str(e)[:50]}")
+    
+    @staticmethod
+    def _count_flats(matches) -> int:
+        """Anzahl verschiedener Wohnungen (Treffer eines Clusters zaehlen einmal)"""
+        return len({(m.get('address_id'), m.get('cluster_id') or m.get('url', m.get('listing_url')))
+                    for m in matches})
+    
+    @staticmethod
+    def _group_by_city(addresses):
+        """Adressen nach normalisierter Stadt: {Schluessel: {"name", "addresses"}}"""
+        cities = {}
+        for a in addresses:
+            name = (a.get('city') or '').strip()
+            key = BaseScraper.normalize_city(name)
+            cities.setdefault(key, {"name": name, "addresses": []})["addresses"].append(a)
+        return cities
     
-    async def _async_search(self, mode, match_mode):
+    def _site_jobs(self, scraper, city, websites):
+        """Aktive Websites als (Schluessel, Name, Kopfzeilen, Sammel-Funktion)"""
+        jobs = []
+        if websites.get('wgGesucht'):
+            jobs.append(('wgGesucht', "WG-Gesucht.de", [">>> WG-GESUCHT.DE"],
+                         lambda: scraper.collect_wg_gesucht(city)))
+        if websites.get('immowelt'):
+            # use_proxy_service=True aktiviert ScrapeOps
+            jobs.append(('immowelt', "Immowelt.de", [">>> IMMOWELT.DE (ScrapeOps DataDome-Bypass)"],
+                         lambda: scraper.collect_immowelt(city, use_proxy_service=True)))
+        if websites.get('kleinanzeigen'):
+            jobs.append(('kleinanzeigen', "Kleinanzeigen.de", [">>> KLEINANZEIGEN.DE (nur PLZ-Vergleich)"],
+                         lambda: scraper.collect_kleinanzeigen(city)))
+        if websites.get('immoscout'):
+            # ImmoScout zuletzt, da oft blockiert
+            jobs.append(('immoscout', "ImmobilienScout24.de",
+                         [">>> IMMOBILIENSCOUT24.DE", "    (Bot-Schutz aktiv - moeglicherweise blockiert)"],
+                         lambda: scraper.collect_immoscout(city)))
+        return jobs
+    
+    async def _collect_site(self, scraper, city, key, collect, log) -> int:
+        """Sammelt eine Website fuer eine Stadt; Fehler bleiben auf diesen Job beschraenkt"""
+        CURRENT_CITY.set(city)
+        progress = self.search_progress["cities"][city]
+        progress["status"] = "Sammle Listings..."
+        count = 0
+        try:
+            listings = await collect()
+            count = len(listings)
+            if key == 'immoscout' and count == 0:
+                log(f"  => 0 Listings (Website blockiert Scraping)")
+            else:
+                log(f"  => {count} Listings gesammelt")
+            if key == 'kleinanzeigen':
+                log(f"  ! Diese Treffer muessen manuell geprueft werden!")
+        except Exception as e:
+            log(f"  ! Fehler: {str(e)[:50]}")
+        self.search_progress["listings"] = len(scraper.listing_store)
+        progress["listings"] += count
+        progress["sites_done"] += 1
+        if progress["sites_done"] == progress["sites_total"]:
+            progress["status"] = "Fertig"
+        return count
+    
+    async def _collect_concurrent(self, scraper, jobs):
+        """Sammelt alle Jobs (Stadt x Website) gleichzeitig auf einem begrenzten Pool
+        
+        Hoechstens MAX_PARALLEL_JOBS Jobs laufen gleichzeitig; jede Website
+        nutzt einen Browser-Kontext fuer alle Staedte. Jeder Job loggt mit
+        eigenem Praefix und meldet seinen Fortschritt in
+        search_progress["sites"]. Die Anzahl gleichzeitig offener Tabs ist
+        ueber alle Jobs begrenzt.
+        """
+        scraper.limit_open_pages(MAX_OPEN_PAGES)
+        cities = self.search_progress["cities"]
+        multi_city = len(cities) > 1
+        sites = {f"{city}:{key}": {"website": name, "city": cities[city]["name"], "page": 0, "max_page": 0,
+                                   "listings": 0, "status": "Wartet"}
+                 for city, key, name, _, _ in jobs}
+        self.search_progress.update({
+            "sites": sites,
+            "website": ", ".join(dict.fromkeys(name for _, _, name, _, _ in jobs)),
+            "action": f"Sammle {len(jobs)} Jobs parallel...",
+            "page": 0
+        })
+        workers = min(MAX_PARALLEL_JOBS, len(jobs))
+        self.log(f"# Paralleles Sammeln: {len(jobs)} Jobs, {workers} gleichzeitig, "
+                 f"max. {MAX_OPEN_PAGES} offene Tabs")
+        self.log("")
+        
+        durations = {}
+        pool = asyncio.Semaphore(workers)
+        
+        def bind(key, name):
+            # Logs und Fortschritt lesen die Stadt des laufenden Tasks (CURRENT_CITY)
+            tag = name.split('.')[0]
+            
+            def log(msg: str):
+                city = CURRENT_CITY.get()
+                prefix = f"{tag} {cities[city]['name']}" if multi_city and city in cities else tag
+                self.log(f"[{prefix}] {msg.strip()}" if msg.strip() else "")
+            
+            def progress(page: int, max_page: int):
+                self._update_page_progress(page, max_page)
+                site = sites.get(f"{CURRENT_CITY.get()}:{key}")
+                if site:
+                    site.update({"page": page, "max_page": max_page})
+            
+            scraper.bind_site(key, log, progress, use_proxy_service=(key == 'immowelt'))
+            return log
+        
+        logs = {key: bind(key, name) for _, key, name, _, _ in jobs}
+        
+        async def run(city, key, name, header, collect):
+            async with pool:
+                if not self.search_running:
+                    return
+                CURRENT_CITY.set(city)
+                job = f"{city}:{key}"
+                sites[job]["status"] = "Sammle Listings..."
+                log = logs[key]
+                for line in header:
+                    log(line)
+                started = time.perf_counter()
+                count = await self._collect_site(scraper, city, key, collect, log)
+                label = f"{name} ({cities[city]['name']})" if multi_city else name
+                durations[label] = time.perf_counter() - started
+                sites[job].update({"listings": count, "status": "Fertig"})
+                self.search_progress["current_site"] = sum(1 for site in sites.values() if site["status"] == "Fertig")
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(run(*job) for job in jobs), return_exceptions=True)
+        total = time.perf_counter() - started
+        
+        self.log("")
+        for name, duration in durations.items():
+            self.log(f"#   {name}: {duration:.0f} s")
+        self.log(f"# Sammeln insgesamt: {total:.0f} s (langsamster Job: {max(durations.values(), default=0):.0f} s)")
+        self.log("")
+    
+    async def _async_search(self, mode, match_mode, streaming=True, concurrent=True):
         scraper = None
         websites = self.selected_websites or {"wgGesucht": True, "immoscout": False, "immowelt": True, "kleinanzeigen": True}
         
@@ -250,7 +497,9 @@ class API:
                 self.search_running = False
                 return
             
-            city = addresses[0]['city']
+            # Ein Such-Job pro (Stadt, Website); Abgleich nur innerhalb der Stadt
+            cities = self._group_by_city(addresses)
+            self._address_cities = {a['id']: key for key, city in cities.items() for a in city["addresses"]}
             
             # Schnellsuche: 25 Seiten, Vollsuche: 0 = unbegrenzt (alle Seiten)
             self._max_pages = 25 if mode == "quick" else 0
@@ -271,7 +520,7 @@ class API:
                 active_sites.append("ImmobilienScout24.de")
                 site_keys.append('immoscout')
             
-            total_sites = len(active_sites)
+            total_sites = len(active_sites) * len(cities)
             
             # Berechne Gesamtarbeit (Seiten pro Website)
             # WG-Gesucht: 1x max_pages
@@ -283,21 +532,30 @@ class API:
             if websites.get('immoscout'): self._total_pages_work += self._max_pages * 2
             if websites.get('immowelt'): self._total_pages_work += self._max_pages
             if websites.get('kleinanzeigen'): self._total_pages_work += self._max_pages * 2
+            self._total_pages_work *= len(cities)
             
             self._completed_pages = 0
             
             self.search_progress.update({
                 "total_sites": total_sites,
-                "max_page": self._max_pages
+                "max_page": self._max_pages,
+                "cities": {key: {"city": city["name"], "addresses": len(city["addresses"]),
+                                 "sites_done": 0, "sites_total": len(active_sites),
+                                 "listings": 0, "matches": 0, "status": "Wartet"}
+                           for key, city in cities.items()}
             })
             
             self.log("========================================")
             self.log("     WOHNUNGSSCRAPER - BATCH-SUCHE")
             self.log("========================================")
             self.log(f"")
-            self.log(f"# Stadt: {city}")
+            self.log(f"# Staedte: {len(cities)}")
+            for city in cities.values():
+                self.log(f"   - {city['name']} ({len(city['addresses'])} Adressen)")
             self.log(f"# Modus: {'Schnellsuche (25 Seiten)' if mode == 'quick' else 'Vollsuche (alle Seiten)'}")
             self.log(f"# Genauigkeit: {'Exakt (PLZ+Str.+Nr.)' if match_mode == 'exact' else 'Erweitert (PLZ+Str.)'}")
+            self.log(f"# Abgleich: {'sofort pro Seite (Streaming)' if streaming else 'nach dem Sammeln'}")
+            self.log(f"# Websites: {'parallel' if concurrent else 'nacheinander'}")
             self.log(f"# Adressen: {len(addresses)}")
             self.log(f"# Aktive Websites: {total_sites}")
             for site in active_sites:
@@ -313,6 +571,12 @@ class API:
             
             report_id = self.db.create_report(len(addresses), active_sites, mode)
             
+            # Streaming: Treffer werden schon waehrend des Sammelns gespeichert
+            self._stream_seen = set()
+            self._stream_report_id = report_id
+            self._stream_matchers = {key: AddressMatcher(city["addresses"], match_mode)
+                                     for key, city in cities.items()} if streaming else {}
+            
             # ScrapeOps API-Key (für Immowelt DataDome-Bypass)
             scrapeops_key = os.environ.get('SCRAPEOPS_API_KEY', '65149469-56f3-4b4b-b428-d24ef6206644')
             
@@ -323,100 +587,52 @@ class API:
                 match_mode=match_mode,
                 stop_flag=self._is_stopped,
                 progress_callback=self._update_page_progress,
-                scrapeops_api_key=scrapeops_key
+                scrapeops_api_key=scrapeops_key,
+                listings_callback=self._on_listings if streaming else None,
+                domain_rates=self.db.get_domain_rates(),
+                browser_service=self.browser_service if self._warm_browser() else None,
+                consent=self.consent
             )
             self._scraper = scraper
             
-            all_listings = []
-            current_site_num = 0
+            # Alle Scraper schreiben in denselben Store (Duplikate pro Website entfallen)
+            all_listings = scraper.listing_store.listings
+            jobs = [(key, *job) for key, city in cities.items()
+                    for job in self._site_jobs(scraper, city["name"], websites)]
             
             self.log("========== PHASE 1: LISTINGS SAMMELN ==========")
             self.log("")
             
-            # WG-Gesucht
-            if self.search_running and websites.get('wgGesucht'):
-                current_site_num += 1
-                self.log(">>> WG-GESUCHT.DE")
-                self.search_progress.update({
-                    "current_site": current_site_num, 
-                    "website": f"WG-Gesucht.de ({current_site_num}/{total_sites})", 
-                    "action": "Sammle Listings...",
-                    "page": 0
-                })
-                try:
-                    listings = await scraper.collect_wg_gesucht(city)
-                    all_listings.extend(listings)
-                    self.log(f"  => {len(listings)} Listings gesammelt")
-                except Exception as e:
-                    self.log(f"  ! Fehler: {str(e)[:50]}")
-                self.search_progress["listings"] = len(all_listings)
-                self.log("")
-            
-            # Immowelt (mit ScrapeOps DataDome-Bypass)
-            if self.search_running and websites.get('immowelt'):
-                current_site_num += 1
-                self.log(">>> IMMOWELT.DE (ScrapeOps DataDome-Bypass)")
-                self.search_progress.update({
-                    "current_site": current_site_num, 
-                    "website": f"Immowelt.de ({current_site_num}/{total_sites})", 
-                    "action": "Sammle Listings...",
-                    "page": 0
-                })
-                try:
-                    # use_proxy_service=True aktiviert ScrapeOps
-                    listings = await scraper.collect_immowelt(city, use_proxy_service=True)
-                    all_listings.extend(listings)
-                    self.log(f"  => {len(listings)} Listings gesammelt")
-                except Exception as e:
-                    self.log(f"  ! Fehler: {str(e)[:50]}")
-                self.search_progress["listings"] = len(all_listings)
-                self.log("")
-            
-            # Kleinanzeigen (mit PLZ-Suche)
-            if self.search_running and websites.get('kleinanzeigen'):
-                current_site_num += 1
-                self.log(">>> KLEINANZEIGEN.DE (nur PLZ-Vergleich)")
-                self.search_progress.update({
-                    "current_site": current_site_num, 
-                    "website": f"Kleinanzeigen.de ({current_site_num}/{total_sites})", 
-                    "action": "Sammle Listings...",
-                    "page": 0
-                })
-                try:
-                    listings = await scraper.collect_kleinanzeigen(city)
-                    all_listings.extend(listings)
-                    self.log(f"  => {len(listings)} Listings gesammelt")
-                    self.log(f"  ! Diese Treffer muessen manuell geprueft werden!")
-                except Exception as e:
-                    self.log(f"  ! Fehler: {str(e)[:50]}")
-                self.search_progress["listings"] = len(all_listings)
-                self.log("")
-            
-            # ImmoScout (zuletzt, da oft blockiert)
-            if self.search_running and websites.get('immoscout'):
-                current_site_num += 1
-                self.log(">>> IMMOBILIENSCOUT24.DE")
-                self.log("    (Bot-Schutz aktiv - moeglicherweise blockiert)")
-                self.search_progress.update({
-                    "current_site": current_site_num, 
-                    "website": f"ImmobilienScout24.de ({current_site_num}/{total_sites})", 
-                    "action": "Sammle Listings...",
-                    "page": 0
-                })
-                try:
-                    listings = await scraper.collect_immoscout(city)
-                    all_listings.extend(listings)
-                    if len(listings) == 0:
-                        self.log(f"  => 0 Listings (Website blockiert Scraping)")
-                    else:
-                        self.log(f"  => {len(listings)} Listings gesammelt")
-                except Exception as e:
-                    self.log(f"  ! Fehler: {str(e)[:50]}")
-                self.search_progress["listings"] = len(all_listings)
-                self.log("")
+            if concurrent and len(jobs) > 1:
+                await self._collect_concurrent(scraper, jobs)
+            else:
+                for num, (city, key, name, header, collect) in enumerate(jobs, 1):
+                    if not self.search_running:
+                        break
+                    city_name = cities[city]["name"]
+                    for line in header:
+                        self.log(line)
+                    if len(cities) > 1:
+                        self.log(f"    Stadt: {city_name}")
+                    self.search_progress.update({
+                        "current_site": num, 
+                        "website": f"{name} ({num}/{total_sites})", 
+                        "action": f"Sammle Listings ({city_name})...",
+                        "page": 0
+                    })
+                    await self._collect_site(scraper, city, key, collect, self.log)
+                    self.log("")
             
             # Phase 2: Abgleich (nur wenn nicht gestoppt)
-            if self.search_running:
+            if self.search_running and streaming:
+                # Treffer wurden bereits pro Seite abgeglichen und gespeichert
+                matches = self.current_matches
+                self.log("========== ADRESS-ABGLEICH (STREAMING) ==========")
+                self.log(f"# Listings insgesamt: {len(all_listings)}")
+                self._log_duplicates(scraper.listing_store)
+                self.log(f"# Treffer gefunden: {len(matches)}")
+                self.log("")
+            elif self.search_running:
                 self.log("========== PHASE 2: ADRESS-ABGLEICH ==========")
                 self.log("")
                 self.search_progress.update({
@@ -425,9 +641,12 @@ class API:
                     "action": f"Vergleiche {len(all_listings)} Listings mit {len(addresses)} Adressen..."
                 })
                 
-                matches = scraper.match_listings(all_listings, addresses)
+                matches = []
+                for key, city in cities.items():
+                    matches += scraper.match_listings(scraper.listing_store.for_city(key), city["addresses"])
                 
                 self.log(f"# Listings insgesamt: {len(all_listings)}")
+                self._log_duplicates(scraper.listing_store)
                 self.log(f"# Treffer gefunden: {len(matches)}")
                 self.log("")
                 
@@ -435,25 +654,15 @@ class API:
                     self.log("========== GEFUNDENE TREFFER ==========")
                     self.log("")
                     for m in matches:
-                        self.db.add_match(
-                            report_id, m['address_id'], m['address_display'],
-                            m['website'], m['website_name'], m['url'], m['title'], m['match_type']
-                        )
-                        self.current_matches.append(m)
-                        match_label = "EXAKT" if m['match_type'] == 'exact' else "ERWEITERT"
-                        self.log(f"  [{match_label}] {m['address_display']}")
-                        self.log(f"           -> {m['website_name']}")
-                        self.log(f"           -> {m['url'][:60]}...")
-                        self.log("")
-                    
-                    self.search_progress["matches"] = len(matches)
-                
+                        self._record_match(report_id, m)
+            
+            if self.search_running:
                 self.db.complete_report(report_id, len(matches), "completed")
                 
                 self.log("========================================")
                 self.log("          SUCHE ABGESCHLOSSEN")
                 self.log("========================================")
-                self.log(f"# Ergebnis: {len(matches)} Treffer")
+                self.log(f"# Ergebnis: {len(matches)} Treffer ({self._count_flats(matches)} verschiedene Wohnungen)")
             else:
                 # Gestoppt
                 self.db.complete_report(report_id, len(self.current_matches), "stopped")
@@ -466,11 +675,15 @@ class API:
         finally:
             if scraper:
                 try:
-                    await scraper.stop_browser()
-                    self.log("# Browser geschlossen")
+                    await scraper.stop_all()
+                    self.log("# Kontexte an Browser-Service zurueckgegeben" if scraper.browser_service
+                             else "# Browser geschlossen")
                 except:
                     pass
+                self._save_domain_rates(scraper.scheduler)
+                self._save_consent()
             self._scraper = None
+            self._stream_matchers = {}
             self.search_running = False
             self.search_progress["percent"] = 100
             self.search_progress["action"] = "Fertig"
@@ -54,7 +54,23 @@ class Database:
                 found_at TEXT,
                 FOREIGN KEY (report_id) REFERENCES reports(id)
             );
+            CREATE TABLE IF NOT EXISTS domain_rates (
+                domain TEXT PRIMARY KEY,
+                rate REAL NOT NULL,
+                tabs INTEGER NOT NULL,
+                updated_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS consent_selectors (
+                domain TEXT PRIMARY KEY,
+                selector TEXT NOT NULL,
+                cookie TEXT,
+                updated_at TEXT
+            );
         ''')
+        # Migration: Duplikat-Cluster pro Treffer (gleiche Wohnung auf mehreren Portalen)
+        cursor.execute('PRAGMA table_info(matches)')
+        if 'cluster_id' not in [row['name'] for row in cursor.fetchall()]:
+            cursor.execute('ALTER TABLE matches ADD COLUMN cluster_id TEXT')
         self.conn.commit()
     
     def generate_id(self) -> str:
@@ -137,14 +153,45 @@ class Database:
         return cursor.rowcount > 0
     
     def add_match(self, report_id: str, address_id: str, address_display: str, website: str, 
-                  website_name: str, listing_url: str, listing_title: str, match_type: str):
+                  website_name: str, listing_url: str, listing_title: str, match_type: str,
+                  cluster_id: str = None):
         cursor = self.conn.cursor()
         id = self.generate_id()
         now = datetime.now().isoformat()
         cursor.execute('''
-            INSERT INTO matches (id, report_id, address_id, address_display, website, website_name, listing_url, listing_title, match_type, found_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (id, report_id, address_id, address_display, website, website_name, listing_url, listing_title, match_type, now))
+            INSERT INTO matches (id, report_id, address_id, address_display, website, website_name, listing_url, listing_title, match_type, found_at, cluster_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (id, report_id, address_id, address_display, website, website_name, listing_url, listing_title, match_type, now, cluster_id))
+        self.conn.commit()
+    
+    def get_domain_rates(self) -> Dict:
+        """Gelernte Crawl-Rate pro Domain: {domain: (Anfragen/s, Tabs)}"""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT domain, rate, tabs FROM domain_rates')
+        return {row['domain']: (row['rate'], row['tabs']) for row in cursor.fetchall()}
+    
+    def save_domain_rates(self, rates: Dict):
+        cursor = self.conn.cursor()
+        now = datetime.now().isoformat()
+        cursor.executemany(
+            'INSERT OR REPLACE INTO domain_rates (domain, rate, tabs, updated_at) VALUES (?, ?, ?, ?)',
+            [(domain, rate, tabs, now) for domain, (rate, tabs) in rates.items()]
+        )
+        self.conn.commit()
+    
+    def get_consent_selectors(self) -> Dict:
+        """Gelernter Cookie-Banner-Selektor pro Domain: {domain: (Selektor, Consent-Cookie)}"""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT domain, selector, cookie FROM consent_selectors')
+        return {row['domain']: (row['selector'], row['cookie']) for row in cursor.fetchall()}
+    
+    def save_consent_selectors(self, learned: Dict):
+        cursor = self.conn.cursor()
+        now = datetime.now().isoformat()
+        cursor.executemany(
+            'INSERT OR REPLACE INTO consent_selectors (domain, selector, cookie, updated_at) VALUES (?, ?, ?, ?)',
+            [(domain, selector, cookie, now) for domain, (selector, cookie) in learned.items()]
+        )
         self.conn.commit()
     
     def get_stats(self) -> Dict:
@@ -1,5 +1,18 @@
 from .scraper import BatchScraper
 from .normalizer import AddressNormalizer
+from .matcher import AddressMatcher
+from .street_search import StreetAutomaton
+from .listing import Listing, Site
+from .listing_store import ListingStore
+from .dedup import DuplicateDetector
+from .browser_pool import BrowserPool
+from .browser_service import BrowserService
+from .resource_policy import ResourcePolicy
+from .http_fetcher import HttpFetcher
+from .html_parser import HtmlParser, CardSpec
+from .structured import StructuredExtractor, ListingRecord
+from .browser_extract import BrowserExtractor, ExtractStats
+from .response_capture import ResponseCapture
 from .base import BaseScraper
 from .wg_gesucht import WGGesuchtScraper
 from .immoscout import ImmoScoutScraper
@@ -23,6 +36,23 @@ except ImportError:
 __all__ = [
     'BatchScraper', 
     'AddressNormalizer',
+    'AddressMatcher',
+    'StreetAutomaton',
+    'Listing',
+    'Site',
+    'ListingStore',
+    'DuplicateDetector',
+    'BrowserPool',
+    'BrowserService',
+    'ResourcePolicy',
+    'HttpFetcher',
+    'HtmlParser',
+    'CardSpec',
+    'StructuredExtractor',
+    'ListingRecord',
+    'BrowserExtractor',
+    'ExtractStats',
+    'ResponseCapture',
     'BaseScraper',
     'WGGesuchtScraper',
     'ImmoScoutScraper', 
@@ -5,21 +5,90 @@ Gemeinsame Funktionen für alle Scraper
 
 import os
 import sys
+import time
 import random
 import asyncio
 from pathlib import Path
-from typing import List, Dict, Callable
+from typing import List, Dict, Callable, Optional, Tuple
+from urllib.parse import urlsplit
 
 from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright
 
 from .normalizer import AddressNormalizer
+from .listing import Listing, Site
+from .listing_store import ListingStore
+from .resource_policy import ResourcePolicy, ResourceStats
+from .consent import ConsentResolver
+from .readiness import Readiness, ReadinessStats
+from .html_parser import HtmlParser, CardSpec, Card
+from .browser_extract import BrowserExtractor
+from .structured import StructuredExtractor, ListingRecord
 
 
 # Konstanten
 PAGE_DELAY_MIN = 1.0
 PAGE_DELAY_MAX = 2.5
 
+# Token-Bucket pro Domain: Anfragen/s, Burst, zufällige Verzögerung (s)
+DOMAIN_RATE = 2 / (PAGE_DELAY_MIN + PAGE_DELAY_MAX)
+DOMAIN_BURST = 2
+DOMAIN_JITTER = PAGE_DELAY_MAX - PAGE_DELAY_MIN
+# Abweichende Werte pro Domain: (Anfragen/s, Burst)
+DOMAIN_RATES = {
+    'www.immobilienscout24.de': (0.3, 1),
+}
+# Menschliche Pause nach einer Navigation (s), getrennt vom Warten auf die Seite
+POLITENESS_DELAY_MIN = 0.3
+POLITENESS_DELAY_MAX = 1.0
+
+# Gleichzeitig geladene Ergebnisseiten (Tabs) pro Website (Startwert)
+TABS_PER_DOMAIN = 2
+
+# AIMD-Regelung pro Domain: saubere Seite -> Rate + RATE_STEP,
+# Block-Signal -> Rate * RATE_BACKOFF und halb so viele Tabs
+RATE_STEP = 0.05
+RATE_BACKOFF = 0.5
+RATE_MIN = 0.05
+RATE_MAX = 2.0
+TABS_MAX = 4
+# Saubere Seiten in Folge (pro Tab) bis ein weiterer Tab aufgemacht wird
+CLEAN_PAGES_PER_TAB = 3
+
+# Chromium-Startparameter und Kontext-Einstellungen (auch für BrowserPool)
+BROWSER_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-infobars',
+    '--window-size=1920,1080',
+    '--start-maximized',
+]
+
+CONTEXT_OPTIONS = dict(
+    viewport={'width': 1920, 'height': 1080},
+    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
+    locale='de-DE',
+    timezone_id='Europe/Berlin',
+    java_script_enabled=True,
+    extra_http_headers={
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+        'Accept-Language': 'de-DE,de;q=0.9,en-US;q=0.8,en;q=0.7',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'DNT': '1',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Ch-Ua': '"Google Chrome";v="131", "Chromium";v="131", "Not_A Brand";v="24"',
+        'Sec-Ch-Ua-Mobile': '?0',
+        'Sec-Ch-Ua-Platform': '"Windows"',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+        'Sec-Fetch-User': '?1',
+        'Cache-Control': 'max-age=0',
+    }
+)
+
 # Stadt-IDs für WG-Gesucht
 CITY_IDS = {
     "berlin": 8, "muenchen": 90, "munich": 90, "hamburg": 55,
@@ -234,20 +303,183 @@ console.log('[Stealth] Fingerprint spoofing aktiviert');
 """
 
 
+class TokenBucket:
+    """Token-Bucket: im Mittel rate Anfragen/s, kurzzeitig bis zu burst"""
+    
+    def __init__(self, rate: float, burst: int = 1, jitter: float = 0.0):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.jitter = jitter
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = None
+    
+    async def acquire(self):
+        """Wartet auf ein Token (plus zufällige Verzögerung)"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    break
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+        if self.jitter:
+            await asyncio.sleep(random.uniform(0, self.jitter))
+
+
+class RateController:
+    """AIMD-Regelung von Anfragerate und Tabs für eine Domain
+    
+    Solange Seiten sauber zurückkommen, steigt die Rate additiv (und nach
+    CLEAN_PAGES_PER_TAB sauberen Seiten pro Tab kommt ein Tab dazu). Ein
+    Block-Signal halbiert Rate und Tabs sofort. Seiten ohne neue Inserate
+    (Ende der Ergebnisse oder stille Drosselung) zählen neutral.
+    """
+    
+    def __init__(self, domain: str, bucket: TokenBucket, tabs: int = TABS_PER_DOMAIN):
+        self.domain = domain
+        self.bucket = bucket
+        self.tabs = min(max(1, tabs), TABS_MAX)
+        self.pages = 0
+        self.blocks = 0
+        self._clean = 0
+    
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+    
+    def success(self):
+        self.pages += 1
+        self.bucket.rate = min(RATE_MAX, self.bucket.rate + RATE_STEP)
+        self._clean += 1
+        if self._clean >= self.tabs * CLEAN_PAGES_PER_TAB and self.tabs < TABS_MAX:
+            self.tabs += 1
+            self._clean = 0
+    
+    def neutral(self):
+        self.pages += 1
+    
+    def block(self):
+        self.pages += 1
+        self.blocks += 1
+        self.bucket.rate = max(RATE_MIN, self.bucket.rate * RATE_BACKOFF)
+        self.tabs = max(1, self.tabs // 2)
+        self._clean = 0
+
+
+class DomainScheduler:
+    """Ein TokenBucket mit AIMD-Regelung pro Domain (ersetzt feste Pausen)
+    
+    learned enthält die zuletzt gelernten Werte pro Domain (Rate, Tabs) aus
+    der Datenbank, damit die nächste Suche gleich im passenden Tempo startet.
+    """
+    
+    def __init__(self, rate: float = DOMAIN_RATE, burst: int = DOMAIN_BURST,
+                 jitter: float = DOMAIN_JITTER, rates: Dict = None,
+                 learned: Dict[str, Tuple[float, int]] = None):
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self.rates = dict(DOMAIN_RATES)
+        self.rates.update(rates or {})
+        self.learned = dict(learned or {})
+        self._controllers: Dict[str, RateController] = {}
+    
+    @staticmethod
+    def _domain(url: str) -> str:
+        return urlsplit(url).netloc.lower() if '//' in url else url.lower()
+    
+    def controller(self, url: str) -> RateController:
+        domain = self._domain(url)
+        controller = self._controllers.get(domain)
+        if controller is None:
+            rate, burst = self.rates.get(domain, (self.rate, self.burst))
+            tabs = TABS_PER_DOMAIN
+            if domain in self.learned:
+                rate, tabs = self.learned[domain]
+            controller = RateController(domain, TokenBucket(rate, burst, self.jitter), tabs)
+            self._controllers[domain] = controller
+        return controller
+    
+    def bucket(self, url: str) -> TokenBucket:
+        return self.controller(url).bucket
+    
+    async def wait(self, url: str):
+        await self.bucket(url).acquire()
+    
+    def learned_rates(self) -> Dict[str, Tuple[float, int]]:
+        """Gelernte Werte (Rate, Tabs) aller Domains mit Anfragen in dieser Suche"""
+        return {c.domain: (c.rate, c.tabs) for c in self._controllers.values() if c.pages}
+    
+    def stats(self) -> List[RateController]:
+        return [c for c in self._controllers.values() if c.pages]
+
+
 class BaseScraper:
     """Basis-Klasse für alle Scraper mit gemeinsamen Funktionen"""
     
+    # Ressourcen, die die Website für die Ergebnisliste braucht (None = alles laden)
+    RESOURCE_POLICY = ResourcePolicy()
+    
+    # Ergebniskarten der Website (CardSpecs in Fallback-Reihenfolge)
+    CARDS: Tuple[CardSpec, ...] = ()
+    # Inserate aus dem eingebetteten JSON der Seite (None = nur DOM-Text)
+    STRUCTURED: StructuredExtractor = None
+    
+    # Woran die Ergebnisliste erkennbar ist (None = nur domcontentloaded)
+    READINESS: Readiness = None
+    # Menschliche Pause (min, max) in s; (0, 0) schaltet sie ab
+    POLITENESS_DELAY = (POLITENESS_DELAY_MIN, POLITENESS_DELAY_MAX)
+    
+    # Ergebnis von _find_browser, einmal pro Prozess (rglob über ganze Ordnerbäume)
+    _browser_exe: Optional[str] = None
+    _browser_searched = False
+    
     def __init__(self, log_callback: Callable = None, max_pages: int = 5, 
                  match_mode: str = "exact", stop_flag: Callable = None, 
-                 progress_callback: Callable = None):
+                 progress_callback: Callable = None, listings_callback: Callable = None,
+                 listing_store: ListingStore = None):
         self.log = log_callback or print
         self.max_pages = max_pages
         self.match_mode = match_mode
         self.stop_flag = stop_flag
         self.progress_callback = progress_callback
+        self.listings_callback = listings_callback
+        self.listing_store = listing_store if listing_store is not None else ListingStore()
         self.browser = None
         self.context = None
         self.playwright = None
+        # Gemeinsamer BrowserPool (siehe BatchScraper), sonst eigener Browser
+        self.browser_pool = None
+        # Langlebiger BrowserService: vorgewärmter Kontext statt Startseiten-Besuch
+        self.browser_service = None
+        self.context_warm = False
+        self.block_signals = 0
+        # Cookie-Banner: gelernte Selektoren/Cookies pro Domain (von BatchScraper geteilt)
+        self.consent = ConsentResolver(log_callback=self.log)
+        # Zeit bis die Ergebnisse bereit sind (von BatchScraper geteilt)
+        self.readiness_stats = ReadinessStats()
+        self.politeness_delay = self.POLITENESS_DELAY
+        # Schnellstes installiertes Parser-Backend (selectolax > lxml > bs4)
+        self.html_parser = HtmlParser()
+        # Karten im Browser extrahieren statt page.content() (Statistik von BatchScraper geteilt)
+        self.browser_extract = BrowserExtractor(log_callback=self.log)
+        # Rate-Limit pro Domain (von BatchScraper geteilt)
+        self.scheduler = DomainScheduler()
+        # HTTP-first für serverseitig gerenderte Seiten (siehe HttpFetcher)
+        self.http_fetcher = None
+        self.browser_fallbacks = 0
+        # Blockierte Bilder/Fonts/Medien/Tracker (per context.route)
+        self.resource_policy = self.RESOURCE_POLICY
+        self.resource_stats = ResourceStats()
+        # Gemeinsame Obergrenze offener Tabs (asyncio.Semaphore, siehe BatchScraper)
+        self.page_limit = None
+        # Mehrere Städte-Jobs derselben Website teilen sich einen Kontext
+        self._start_lock = None
     
     def should_stop(self) -> bool:
         """Prüft ob die Suche gestoppt werden soll"""
@@ -260,6 +492,29 @@ class BaseScraper:
         if self.progress_callback and callable(self.progress_callback):
             self.progress_callback(page, max_page)
     
+    def add_listing(self, listings: List[Listing], listing: Listing) -> bool:
+        """Fügt ein Listing über den gemeinsamen Store hinzu (O(1)-Duplikatprüfung)"""
+        if not self.listing_store.add(listing):
+            return False
+        listings.append(listing)
+        return True
+    
+    def add_records(self, listings: List[Listing], records: List[ListingRecord],
+                    site: Site, base_url: str) -> int:
+        """Übernimmt Inserate aus dem Seitenzustand (mit PLZ/Straße/Hausnummer)"""
+        new_count = 0
+        for record in records:
+            if record.url.startswith('/'):
+                record.url = base_url + record.url
+            if self.add_listing(listings, record.to_listing(site)):
+                new_count += 1
+        return new_count
+    
+    def emit_listings(self, listings: List[Listing]):
+        """Reicht neue Listings einer Seite sofort weiter (Streaming-Abgleich)"""
+        if listings and self.listings_callback and callable(self.listings_callback):
+            self.listings_callback(listings)
+    
     def _find_chrome_portable(self) -> str:
         """Sucht nach Chrome Portable im App-Verzeichnis"""
         app_dir = Path(sys.executable).parent if getattr(sys, 'frozen', False) else Path(__file__).parent.parent.parent
@@ -278,6 +533,13 @@ class BaseScraper:
         return None
     
     def _find_browser(self) -> str:
+        """Browser-Pfad (gecacht, siehe _search_browser)"""
+        if not BaseScraper._browser_searched:
+            BaseScraper._browser_exe = self._search_browser()
+            BaseScraper._browser_searched = True
+        return BaseScraper._browser_exe
+    
+    def _search_browser(self) -> str:
         """Sucht nach einem Browser (Chrome Portable > Playwright > System Chrome)"""
         app_dir = Path(sys.executable).parent if getattr(sys, 'frozen', False) else Path(__file__).parent.parent.parent
         
@@ -311,8 +573,30 @@ class BaseScraper:
         return None
     
     async def start_browser(self):
-        """Startet den Playwright-Browser mit Stealth-Einstellungen"""
-        if self.browser:
+        """Startet den Playwright-Browser mit Stealth-Einstellungen
+        
+        Mit BrowserPool bekommt der Scraper nur einen eigenen Kontext in
+        einer gemeinsamen Chromium-Instanz. Gleichzeitige Aufrufe (mehrere
+        Städte) starten nur einen Kontext.
+        """
+        if self.context:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if not self.context:
+                await self._launch_browser()
+    
+    async def _launch_browser(self):
+        if self.browser_service:
+            self.context, self.context_warm = await self.browser_service.acquire(type(self).__name__)
+            self.block_signals = 0
+            await self._install_resource_policy()
+            return
+        
+        if self.browser_pool:
+            self.context = await self.browser_pool.new_context(type(self).__name__)
+            await self._install_resource_policy()
             return
         
         self.log("# Browser wird gestartet...")
@@ -322,16 +606,6 @@ class BaseScraper:
         if browser_exe:
             self.log(f"# Browser: {Path(browser_exe).name}")
         
-        browser_args = [
-            '--disable-blink-features=AutomationControlled',
-            '--disable-dev-shm-usage',
-            '--no-sandbox',
-            '--disable-setuid-sandbox',
-            '--disable-infobars',
-            '--window-size=1920,1080',
-            '--start-maximized',
-        ]
-        
         # Browser immer versteckt (headless)
         use_headless = True
         
@@ -339,47 +613,163 @@ class BaseScraper:
             self.browser = await self.playwright.chromium.launch(
                 headless=use_headless, 
                 executable_path=browser_exe,
-                args=browser_args
+                args=BROWSER_ARGS
             )
         else:
             self.browser = await self.playwright.chromium.launch(
                 headless=use_headless,
-                args=browser_args
+                args=BROWSER_ARGS
             )
         
-        self.context = await self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
-            locale='de-DE',
-            timezone_id='Europe/Berlin',
-            java_script_enabled=True,
-            extra_http_headers={
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                'Accept-Language': 'de-DE,de;q=0.9,en-US;q=0.8,en;q=0.7',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'DNT': '1',
-                'Upgrade-Insecure-Requests': '1',
-                'Sec-Ch-Ua': '"Google Chrome";v="131", "Chromium";v="131", "Not_A Brand";v="24"',
-                'Sec-Ch-Ua-Mobile': '?0',
-                'Sec-Ch-Ua-Platform': '"Windows"',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1',
-                'Cache-Control': 'max-age=0',
-            }
-        )
-        
+        self.context = await self.browser.new_context(**CONTEXT_OPTIONS)
         await self.context.add_init_script(STEALTH_SCRIPT)
+        await self._install_resource_policy()
+    
+    async def _install_resource_policy(self):
+        """Leitet alle Anfragen des Kontexts über die Ressourcen-Policy"""
+        if self.resource_policy:
+            await self.context.route("**/*", self._route_request)
+    
+    async def _route_request(self, route):
+        request = route.request
+        try:
+            is_navigation = request.is_navigation_request() and request.frame.parent_frame is None
+        except:
+            is_navigation = False
+        if self.resource_policy.allows(request.resource_type, request.url, is_navigation):
+            await route.continue_()
+            return
+        try:
+            page = request.frame.page
+        except:
+            page = None
+        self.resource_stats.add(page, request.resource_type)
+        await route.abort()
+    
+    async def visit_start_page(self, base_url: str, human_behavior: bool = True):
+        """Startseite für Cookies (per HTTP-Session oder im Browser)"""
+        if self.http_fetcher:
+            self.log("  Besuche Startseite fuer Cookies (HTTP)...")
+            await self.http_fetcher.get(base_url)
+            return
+        
+        await self.start_browser()
+        if self.context_warm:
+            self.log("  Startseite uebersprungen (Cookies aus warmem Kontext)")
+            return
+        page = await self.new_page()
+        try:
+            self.log("  Besuche Startseite fuer Cookies...")
+            try:
+                await page.goto(base_url, wait_until='domcontentloaded', timeout=20000)
+                await self._accept_cookies(page)
+                await self.politeness_pause()
+                if human_behavior:
+                    await self._human_behavior(page)
+            except Exception as e:
+                self.log(f"    ! Startseite: {str(e)[:30]}")
+        finally:
+            await self.close_page(page)
+    
+    async def open_fetch_tab(self):
+        """Tab für crawl_pages: mit HTTP-Fetcher keiner, sonst eine Playwright-Seite"""
+        if self.http_fetcher:
+            return None
+        return await self.new_page()
+    
+    async def close_fetch_tab(self, tab):
+        if tab is not None:
+            await self.close_page(tab)
+    
+    async def fetch_cards(self, url: str, is_blocked: Callable, tab=None,
+                          timeout: int = 25000) -> Optional[List[Card]]:
+        """Karten (CARDS) einer Ergebnisseite; None wenn is_blocked(html) anschlägt
+        
+        Erst per HTTP (HTML wird in Python geparst), im Browser nur als
+        Fallback: dort werden die Karten per page.evaluate extrahiert, das
+        volle HTML kommt nur ohne Karten (Block-Prüfung). Ohne tab wird für
+        den Browser-Fallback ein eigener Tab geöffnet (der Browser startet
+        erst beim ersten Fallback).
+        """
+        if self.http_fetcher:
+            html = await self.http_fetcher.get(url)
+            if html is not None and not is_blocked(html):
+                return self.browser_extract.parse_html(html, lambda h: self.html_parser.cards(h, self.CARDS))
+            self.browser_fallbacks += 1
+            self.log("      HTTP blockiert - Browser-Fallback")
+        
+        if tab is not None:
+            return await self._browser_cards(tab, url, is_blocked, timeout)
+        
+        await self.start_browser()
+        page = await self.new_page()
+        try:
+            return await self._browser_cards(page, url, is_blocked, timeout)
+        finally:
+            self.log_resources_blocked(page, indent="      ")
+            await self.close_page(page)
+    
+    async def _browser_cards(self, page, url: str, is_blocked: Callable, timeout: int) -> Optional[List[Card]]:
+        await self.goto_ready(page, url, timeout)
+        await self._human_behavior(page)
+        result = await self.browser_extract.cards(page, self.CARDS)
+        if not result.cards and is_blocked(result.html):
+            return None
+        return result.cards
+    
+    async def goto_ready(self, page, url: str, timeout: int = 30000, indent: str = "    ") -> bool:
+        """Navigiert und wartet auf die Ergebnisliste (READINESS) statt einer festen Pause
+        
+        Protokolliert die Zeit vom goto() bis die Ergebnisse bereit sind;
+        False wenn die Liste innerhalb des Timeouts der Website nicht kam.
+        """
+        readiness = self.READINESS
+        started = time.perf_counter()
+        waiter = readiness.expect_response(page) if readiness else None
+        try:
+            await page.goto(url, wait_until='domcontentloaded', timeout=timeout)
+        except Exception:
+            if waiter is not None:
+                Readiness.discard([waiter])
+            raise
+        ready = await readiness.wait(page, waiter) if readiness else True
+        self.record_ready(url, started, ready, indent)
+        return ready
+    
+    def record_ready(self, url: str, started: float, ready: bool, indent: str = "    "):
+        ms = (time.perf_counter() - started) * 1000
+        self.readiness_stats.add(url, ms, ready)
+        if ready:
+            self.log(f"{indent}Ergebnisse bereit nach {ms:.0f} ms")
+        else:
+            self.log(f"{indent}! Ergebnisliste nicht erkannt ({ms:.0f} ms)")
+    
+    async def politeness_pause(self):
+        """Menschliche Pause (politeness_delay), unabhängig vom Laden der Seite"""
+        low, high = self.politeness_delay
+        if high > 0:
+            await asyncio.sleep(random.uniform(low, high))
+    
+    def log_resources_blocked(self, page, indent: str = "    "):
+        """Protokolliert die seit dem letzten Aufruf im Tab blockierten Anfragen (Bytes geschätzt)"""
+        requests, estimated_size = self.resource_stats.take(page)
+        if requests:
+            self.log(f"{indent}{ResourceStats.describe(requests, estimated_size)}")
     
     async def stop_browser(self):
-        """Stoppt den Browser"""
+        """Stoppt den Browser (bzw. gibt den Kontext an BrowserService/BrowserPool zurück)"""
         if self.context:
             try:
-                await self.context.close()
+                if self.browser_service:
+                    await self.browser_service.release(self.context, self.block_signals)
+                elif self.browser_pool:
+                    await self.browser_pool.release_context(self.context)
+                else:
+                    await self.context.close()
             except:
                 pass
             self.context = None
+            self.context_warm = False
         
         if self.browser:
             try:
@@ -395,50 +785,107 @@ class BaseScraper:
                 pass
             self.playwright = None
     
-    async def _accept_cookies(self, page) -> bool:
-        """Versucht Cookie-Banner zu akzeptieren"""
-        cookie_selectors = [
-            # Usercentrics (Immowelt, etc.)
-            '#usercentrics-root button[data-testid="uc-accept-all-button"]',
-            '[data-testid="uc-accept-all-button"]',
-            '#uc-btn-accept-banner',
-            'button[data-testid*="accept"]',
-            # Standard-Selektoren
-            'button[id*="accept"]', 'button[class*="accept"]',
-            'button[id*="consent"]', 'button[class*="consent"]',
-            'button[id*="agree"]', 'button[class*="agree"]',
-            'button:has-text("Akzeptieren")', 'button:has-text("Alle akzeptieren")',
-            'button:has-text("Accept")', 'button:has-text("Accept all")',
-            'button:has-text("Zustimmen")', 'button:has-text("Einverstanden")',
-            'a:has-text("Akzeptieren")', 'a:has-text("Zustimmen")',
-            '#cmpbntyestxt', '#acceptAllButton', '.cmpboxbtnyes',
-            'button.sp_choice_type_11', 'button[title*="accept"]',
-            '#onetrust-accept-btn-handler', '.onetrust-accept-btn',
-            '#didomi-notice-agree-button', '.didomi-accept-button',
-            '#CybotCookiebotDialogBodyLevelButtonLevelOptinAllowAll',
-        ]
-        
-        for selector in cookie_selectors:
-            try:
-                btn = await page.wait_for_selector(selector, timeout=1000)
-                if btn:
-                    await btn.click(force=True)
-                    self.log("    Cookie-Banner akzeptiert")
-                    await asyncio.sleep(0.5)
-                    return True
-            except:
-                continue
-        
-        # Fallback: Entferne Usercentrics-Overlay via JavaScript
+    async def new_page(self):
+        """Öffnet einen Tab im eigenen Kontext (wartet auf einen freien Platz)"""
+        if self.page_limit:
+            await self.page_limit.acquire()
         try:
-            await page.evaluate('''
-                const uc = document.getElementById('usercentrics-root');
-                if (uc) uc.remove();
-            ''')
+            return await self.context.new_page()
+        except:
+            if self.page_limit:
+                self.page_limit.release()
+            raise
+    
+    async def close_page(self, page):
+        """Schließt einen Tab und gibt seinen Platz wieder frei"""
+        try:
+            await page.close()
         except:
             pass
+        finally:
+            if self.page_limit:
+                self.page_limit.release()
+    
+    async def crawl_pages(self, url_for: Callable, fetch: Callable, max_tabs: int = TABS_MAX,
+                          open_tab: Callable = None, close_tab: Callable = None,
+                          max_empty: int = 2) -> int:
+        """Lädt die Ergebnisseiten 1..max_pages mit mehreren Tabs
         
-        return False
+        url_for(page_num) liefert die URL, fetch(tab, url, page_num) lädt und
+        parst eine Seite und gibt die Anzahl neuer Inserate zurück (None =
+        blockiert oder Fehler). Vor jeder Anfrage wird ein Token vom Scheduler
+        der Domain geholt; wie viele Tabs gleichzeitig laden, bestimmt dessen
+        RateController (None zählt als Block-Signal, 0 neue Inserate weder als
+        Erfolg noch als Block). Nach max_empty leeren Seiten in Folge (gezählt
+        in Seitenreihenfolge) werden keine weiteren Seiten angefangen. Ohne
+        open_tab bekommt jeder Tab eine eigene Playwright-Seite.
+        """
+        if open_tab is None:
+            open_tab, close_tab = self.new_page, self.close_page
+        
+        effective_max = self.max_pages if self.max_pages > 0 else 9999  # 0 = unbegrenzt
+        next_page = 1
+        limit = effective_max
+        checked = 1
+        empty = 0
+        results = {}
+        controller = self.scheduler.controller(url_for(1))
+        
+        def record(page_num: int, new_count: Optional[int]):
+            nonlocal checked, empty, limit
+            results[page_num] = new_count
+            while checked in results:
+                empty = 0 if results.pop(checked) else empty + 1
+                if empty >= max_empty:
+                    limit = min(limit, checked)
+                checked += 1
+        
+        async def worker(index: int):
+            nonlocal next_page
+            tab = None
+            try:
+                while not self.should_stop() and next_page <= limit:
+                    if index >= controller.tabs:
+                        # Tab gerade nicht freigegeben (nach Block-Signal gedrosselt)
+                        if tab is not None and close_tab:
+                            await close_tab(tab)
+                        tab = None
+                        await asyncio.sleep(1)
+                        continue
+                    if tab is None:
+                        tab = await open_tab()
+                    page_num = next_page
+                    next_page += 1
+                    url = url_for(page_num)
+                    await self.scheduler.wait(url)
+                    if page_num > limit or self.should_stop():
+                        break
+                    self.report_progress(page_num, effective_max if self.max_pages > 0 else page_num)
+                    try:
+                        new_count = await fetch(tab, url, page_num)
+                    except Exception as e:
+                        self.log(f"    ! Fehler: {str(e)[:30]}")
+                        new_count = None
+                    if new_count is None:
+                        self.block_signals += 1
+                        controller.block()
+                        self.log(f"    ! Block-Signal: {controller.rate:.2f} Seiten/s, {controller.tabs} Tab(s)")
+                    elif new_count == 0:
+                        controller.neutral()
+                    else:
+                        controller.success()
+                    self.log_resources_blocked(tab)
+                    record(page_num, new_count)
+            finally:
+                if tab is not None and close_tab:
+                    await close_tab(tab)
+        
+        await asyncio.gather(*(worker(i) for i in range(max(1, min(max_tabs, effective_max)))))
+        return checked - 1
+    
+    async def _accept_cookies(self, page) -> bool:
+        """Versucht Cookie-Banner zu akzeptieren (siehe ConsentResolver)"""
+        return await self.consent.resolve(page, self.log)
     
     async def _human_behavior(self, page):
         """Simuliert grundlegendes menschliches Verhalten"""
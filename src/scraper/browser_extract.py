@@ -0,0 +1,242 @@
+"""
+WohnungsScraper - Browser Extraction
+Extrahiert die Ergebniskarten per page.evaluate im Browser statt page.content() zu übertragen
+"""
+
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .html_parser import Card, CardSpec, EXPOSE_PATTERN, MAX_CARD_TEXT, CARD_BOUNDARY_TAGS
+
+
+# Verzeichnis für volles HTML jeder Browser-Seite (Debugging), z. B. data/html_capture
+CAPTURE_ENV = 'WOHNUNGSSCRAPER_CAPTURE_HTML'
+
+# Läuft im Tab: Karten als [{url, text}] (Text wie HtmlParser: ohne Skript/Style,
+# Leerraum reduziert). Volles HTML nur ohne Karten (Block-Erkennung im Scraper).
+EXTRACT_SCRIPT = r'''
+(args) => {
+    const SKIP = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE']);
+    const textOf = (el) => {
+        const parts = [];
+        const walker = document.createTreeWalker(el, NodeFilter.SHOW_ELEMENT | NodeFilter.SHOW_TEXT, {
+            acceptNode: (n) => SKIP.has(n.nodeName) ? NodeFilter.FILTER_REJECT : NodeFilter.FILTER_ACCEPT
+        });
+        for (let n = walker.nextNode(); n; n = walker.nextNode()) {
+            if (n.nodeType === Node.TEXT_NODE) parts.push(n.data);
+        }
+        return parts.join(' ').replace(/\s+/g, ' ').trim();
+    };
+    const cards = [];
+
+    if (args.specs) {
+        // CardSpecs: erster Selektor mit Treffern, erster Link der Karte
+        for (const css of args.specs) {
+            const nodes = document.querySelectorAll(css);
+            if (!nodes.length) continue;
+            for (const node of nodes) {
+                const link = node.querySelector('a[href]');
+                cards.push({url: link ? link.getAttribute('href') : null, text: textOf(node)});
+            }
+            break;
+        }
+    } else {
+        // Exposé-Links: höchster Container, der nur auf dieses Exposé verlinkt (wie expose_cards)
+        const pattern = new RegExp(args.pattern);
+        const boundary = new Set(args.boundary.map((t) => t.toUpperCase()));
+        const MULTI = {};
+        const owner = new Map();
+        const links = [];
+        for (const a of document.querySelectorAll('a[href]')) {
+            const href = a.getAttribute('href');
+            if (!pattern.test(href)) continue;
+            let key = href.split('?')[0];
+            links.push([a, key]);
+            for (let el = a; el; el = el.parentElement) {
+                if (boundary.has(el.tagName)) key = MULTI;
+                const current = owner.get(el);
+                if (current === key) break;
+                owner.set(el, current === undefined ? key : MULTI);
+                if (current !== undefined) key = MULTI;
+            }
+        }
+        const done = new Set();
+        for (const [a, key] of links) {
+            if (done.has(key)) continue;
+            done.add(key);
+            let text = textOf(a);
+            for (let el = a.parentElement; el && owner.get(el) === key; el = el.parentElement) {
+                const candidate = textOf(el);
+                if (candidate.length > args.maxText) break;
+                text = candidate;
+            }
+            cards.push({url: key, text: text});
+        }
+    }
+
+    // Eingebetteter Zustand für StructuredExtractor (nur die Skript-Blöcke)
+    const state = [];
+    if (args.markers) {
+        for (const script of document.querySelectorAll('script')) {
+            const type = script.type || '';
+            if (script.id === '__NEXT_DATA__' || type === 'application/ld+json'
+                    || args.markers.some((m) => script.text.includes(m))) {
+                state.push(script.outerHTML);
+            }
+        }
+    }
+    const html = cards.length ? null : document.documentElement.outerHTML;
+    return JSON.stringify({cards: cards, state: state.join('\n'), html: html});
+}
+'''
+
+
+class PageCards:
+    """Ergebnis der Extraktion: Karten, Zustands-Skripte und (ohne Karten) volles HTML"""
+
+    __slots__ = ('cards', 'state', 'html')
+
+    def __init__(self, cards: List[Card], state: str = "", html: Optional[str] = None):
+        self.cards = cards
+        self.state = state
+        self.html = html
+
+
+class ExtractStats:
+    """Übertragene Bytes und Python-CPU pro Seite: im Browser extrahiert vs. HTML geparst"""
+
+    MODES = ('browser', 'html')
+
+    def __init__(self):
+        self.pages = {mode: 0 for mode in self.MODES}
+        self.bytes = {mode: 0 for mode in self.MODES}
+        self.cpu = {mode: 0.0 for mode in self.MODES}
+
+    def add(self, mode: str, size: int, cpu: float):
+        self.pages[mode] += 1
+        self.bytes[mode] += size
+        self.cpu[mode] += cpu
+
+    def lines(self) -> List[str]:
+        out = []
+        for mode, label in zip(self.MODES, ('Browser-Extraktion', 'HTML-Parsing')):
+            pages = self.pages[mode]
+            if pages:
+                out.append(f"{label}: {pages} Seiten, {self.bytes[mode] / pages / 1024:.1f} KB/Seite, "
+                           f"Python-CPU {self.cpu[mode] / pages * 1000:.1f} ms/Seite")
+        return out
+
+
+class BrowserExtractor:
+    """Karten per page.evaluate (EXTRACT_SCRIPT) statt page.content()
+
+    Über CDP kommt nur ein kompaktes JSON mit [{url, text}] statt des ganzen
+    serialisierten DOMs, und Python muss nichts mehr parsen. Die Selektoren
+    sind dieselben wie beim HTML-Parsing (CardSpecs bzw. Exposé-Links).
+    Mit capture_dir (oder der Umgebungsvariable CAPTURE_ENV) wird zusätzlich
+    das volle HTML jeder Seite gespeichert, zum Debuggen der Selektoren.
+    """
+
+    def __init__(self, stats: ExtractStats = None, capture_dir: Optional[str] = None,
+                 log_callback: Callable = None):
+        self.stats = stats or ExtractStats()
+        capture_dir = capture_dir or os.environ.get(CAPTURE_ENV)
+        self.capture_dir = Path(capture_dir) if capture_dir else None
+        self.log = log_callback or print
+
+    async def cards(self, page, specs: Sequence[CardSpec]) -> PageCards:
+        return await self._run(page, {'specs': [spec.css for spec in specs]})
+
+    async def expose_cards(self, page, pattern: str = EXPOSE_PATTERN.pattern,
+                           markers: Optional[Sequence[str]] = None,
+                           max_text: int = MAX_CARD_TEXT) -> PageCards:
+        """Wie HtmlParser.expose_cards; mit markers auch die Zustands-Skripte"""
+        return await self._run(page, {'specs': None, 'pattern': pattern, 'maxText': max_text,
+                                      'boundary': sorted(CARD_BOUNDARY_TAGS),
+                                      'markers': list(markers) if markers is not None else None})
+
+    async def _run(self, page, args: Dict) -> PageCards:
+        if self.capture_dir is not None:
+            await self.capture(page)
+        payload = await page.evaluate(EXTRACT_SCRIPT, args)
+        started = time.thread_time()
+        data = json.loads(payload)
+        cards = [Card(card['text'], card['url']) for card in data['cards']]
+        self.stats.add('browser', len(payload.encode('utf-8')), time.thread_time() - started)
+        return PageCards(cards, data['state'], data['html'])
+
+    def parse_html(self, html: str, parse: Callable):
+        """Misst den bisherigen Weg (HTML in Python parsen) für den Vergleich"""
+        started = time.thread_time()
+        result = parse(html)
+        self.stats.add('html', len(html.encode('utf-8')), time.thread_time() - started)
+        return result
+
+    async def capture(self, page):
+        """Speichert das volle HTML der Seite (Debugging)"""
+        try:
+            html = await page.content()
+            self.capture_dir.mkdir(parents=True, exist_ok=True)
+            name = re.sub(r'[^\w.-]+', '_', page.url.split('://', 1)[-1])[:120]
+            path = self.capture_dir / f"{time.strftime('%Y%m%d-%H%M%S')}_{name}.html"
+            path.write_text(html, encoding='utf-8')
+        except Exception as e:
+            self.log(f"      ! HTML-Capture: {str(e)[:40]}")
+
+
+# Standalone Messung: page.content() + Parsen vs. page.evaluate, pro Seite
+# python -m src.scraper.browser_extract [gespeicherte_seite.html ...]
+if __name__ == "__main__":
+    import asyncio
+    import random
+    import sys
+
+    from playwright.async_api import async_playwright
+
+    from .html_parser import HtmlParser
+
+    def synthetic(count: int) -> str:
+        nav = "".join(f'<div class="nav"><a href="/n/{i}">Menü {i}</a><script>var x{i}=1;</script></div>'
+                      for i in range(400))
+        cards = "".join(
+            f'<li><div class="card"><a href="/expose/{i}?p=1"><img src="data:,"></a><div>'
+            f'<a href="/expose/{i}"><h2>3 Zimmer Wohnung {i}</h2></a><span>{80331 + random.randint(0, 600)} '
+            f'München</span><span>Tal {i}</span><span>78 m²</span><span>1.450 €</span></div></div></li>'
+            for i in range(count))
+        return f"<html><body>{nav}<main><ul>{cards}</ul></main>{nav}</body></html>"
+
+    async def main():
+        random.seed(11)
+        pages = ([Path(p).read_text(encoding='utf-8', errors='ignore') for p in sys.argv[1:]]
+                 or [synthetic(30), synthetic(150)])
+        parser = HtmlParser()
+        ROUNDS = 10
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=True)
+            page = await browser.new_page()
+            for html in pages:
+                await page.set_content(html)
+                before, after = ExtractStats(), ExtractStats()
+                legacy = BrowserExtractor(before, capture_dir='')
+                extractor = BrowserExtractor(after, capture_dir='')
+                cpu_before = cpu_after = 0.0
+                for _ in range(ROUNDS):
+                    started = time.thread_time()
+                    content = await page.content()
+                    found = legacy.parse_html(content, parser.expose_cards)
+                    cpu_before += time.thread_time() - started
+                    started = time.thread_time()
+                    result = await extractor.expose_cards(page)
+                    cpu_after += time.thread_time() - started
+                print(f"{len(html) / 1024:.0f} KB HTML, {len(found)}/{len(result.cards)} Karten")
+                print(f"  page.content() + {parser.backend}: {before.bytes['html'] / ROUNDS / 1024:8.1f} KB, "
+                      f"Python-CPU {cpu_before / ROUNDS * 1000:6.1f} ms/Seite")
+                print(f"  page.evaluate:           {after.bytes['browser'] / ROUNDS / 1024:8.1f} KB, "
+                      f"Python-CPU {cpu_after / ROUNDS * 1000:6.1f} ms/Seite")
+            await browser.close()
+
+    asyncio.run(main())
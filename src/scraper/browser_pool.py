@@ -0,0 +1,181 @@
+"""
+WohnungsScraper - Browser Pool
+Ein Playwright-Treiber und wenige Chromium-Instanzen für alle Website-Scraper
+"""
+
+import asyncio
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from playwright.async_api import async_playwright
+
+from .base import BROWSER_ARGS, CONTEXT_OPTIONS, STEALTH_SCRIPT
+
+# Optional: Speicherverbrauch der Chromium-Prozesse
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+
+# Obergrenzen: Chromium-Instanzen und Kontexte (Websites) pro Instanz
+MAX_BROWSERS = 2
+CONTEXTS_PER_BROWSER = 2
+
+
+class _PooledBrowser:
+    """Eine Chromium-Instanz mit ihren Kontexten und Startkennzahlen"""
+
+    __slots__ = ('browser', 'contexts', 'launch_ms', 'pids')
+
+    def __init__(self, browser, launch_ms: float, pids: List[int]):
+        self.browser = browser
+        self.contexts: Dict[object, str] = {}
+        self.launch_ms = launch_ms
+        self.pids = pids
+
+
+class BrowserPool:
+    """Verteilt Browser-Kontexte pro Website auf wenige Chromium-Instanzen
+
+    Alle Scraper teilen sich einen Playwright-Treiber. Eine neue Instanz
+    wird erst gestartet, wenn alle bestehenden CONTEXTS_PER_BROWSER
+    Kontexte haben und MAX_BROWSERS noch nicht erreicht ist. Jeder Kontext
+    bekommt das Stealth-Script. close() schließt Kontexte, Instanzen und
+    Treiber in dieser Reihenfolge.
+    """
+
+    def __init__(self, log_callback: Callable = None, executable_path: str = None,
+                 max_browsers: int = MAX_BROWSERS, contexts_per_browser: int = CONTEXTS_PER_BROWSER,
+                 headless: bool = True):
+        self.log = log_callback or print
+        self.executable_path = executable_path
+        self.max_browsers = max(1, max_browsers)
+        self.contexts_per_browser = max(1, contexts_per_browser)
+        self.headless = headless
+        self.playwright = None
+        self._browsers: List[_PooledBrowser] = []
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def start(self):
+        """Startet den Playwright-Treiber (einmal pro Pool)"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+
+    async def _launch(self) -> _PooledBrowser:
+        before = self._child_pids()
+        started = time.perf_counter()
+        options = {'headless': self.headless, 'args': BROWSER_ARGS}
+        if self.executable_path:
+            options['executable_path'] = self.executable_path
+        browser = await self.playwright.chromium.launch(**options)
+        launch_ms = (time.perf_counter() - started) * 1000
+
+        pooled = _PooledBrowser(browser, launch_ms, sorted(self._child_pids() - before))
+        self._browsers.append(pooled)
+        name = f" ({Path(self.executable_path).name})" if self.executable_path else ""
+        self.log(f"# Browser {len(self._browsers)} gestartet{name}: {launch_ms:.0f} ms")
+        return pooled
+
+    async def new_context(self, site: str = "", storage_state: str = None):
+        """Neuer Kontext mit Stealth-Script für eine Website (optional mit gespeicherten Cookies)"""
+        await self.start()
+        async with self._lock:
+            # Abgestürzte Instanzen nicht mehr belegen
+            self._browsers = [b for b in self._browsers if b.browser.is_connected()]
+            free = [b for b in self._browsers if len(b.contexts) < self.contexts_per_browser]
+            if free:
+                pooled = min(free, key=lambda b: len(b.contexts))
+            elif len(self._browsers) < self.max_browsers:
+                pooled = await self._launch()
+            else:
+                # Alle Instanzen voll: Kontext in der am wenigsten belasteten
+                pooled = min(self._browsers, key=lambda b: len(b.contexts))
+
+            options = dict(CONTEXT_OPTIONS)
+            if storage_state:
+                options['storage_state'] = storage_state
+            context = await pooled.browser.new_context(**options)
+            await context.add_init_script(STEALTH_SCRIPT)
+            pooled.contexts[context] = site
+        return context
+
+    async def release_context(self, context):
+        """Schließt einen Kontext; die Instanz bleibt für andere Websites offen"""
+        for pooled in self._browsers:
+            if context in pooled.contexts:
+                del pooled.contexts[context]
+                break
+        try:
+            await context.close()
+        except:
+            pass
+
+    def stats(self) -> List[Dict]:
+        """Startzeit, Speicher (RSS) und offene Kontexte pro Instanz"""
+        return [{
+            'browser': i,
+            'launch_ms': round(pooled.launch_ms),
+            'rss_mb': self._rss_mb(pooled.pids),
+            'contexts': sorted(pooled.contexts.values()),
+        } for i, pooled in enumerate(self._browsers, 1)]
+
+    def log_stats(self):
+        for s in self.stats():
+            rss = f"{s['rss_mb']:.0f} MB" if s['rss_mb'] is not None else "unbekannt"
+            self.log(f"#   Browser {s['browser']}: Start {s['launch_ms']} ms, RSS {rss}, "
+                     f"{len(s['contexts'])} Kontexte")
+
+    async def close(self):
+        """Schließt alle Kontexte, Instanzen und den Treiber"""
+        for pooled in self._browsers:
+            for context in list(pooled.contexts):
+                try:
+                    await context.close()
+                except:
+                    pass
+            pooled.contexts.clear()
+            try:
+                await pooled.browser.close()
+            except:
+                pass
+        self._browsers.clear()
+
+        if self.playwright:
+            try:
+                await self.playwright.stop()
+            except:
+                pass
+            self.playwright = None
+
+    @staticmethod
+    def _child_pids() -> set:
+        """PIDs aller Unterprozesse (Treiber, Chromium und dessen Renderer)"""
+        if not PSUTIL_AVAILABLE:
+            return set()
+        try:
+            return {p.pid for p in psutil.Process().children(recursive=True)}
+        except psutil.Error:
+            return set()
+
+    @staticmethod
+    def _rss_mb(pids: List[int]) -> Optional[float]:
+        """RSS einer Instanz: Browser-Prozess samt aktueller Unterprozesse"""
+        if not PSUTIL_AVAILABLE or not pids:
+            return None
+        total = 0
+        seen = set()
+        for pid in pids:
+            try:
+                proc = psutil.Process(pid)
+                for p in [proc] + proc.children(recursive=True):
+                    if p.pid not in seen:
+                        seen.add(p.pid)
+                        total += p.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / 1024 / 1024
@@ -0,0 +1,219 @@
+"""
+WohnungsScraper - Browser Service
+Hält Playwright, Chromium und vorgewärmte Kontexte zwischen den Suchen offen
+"""
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from .base import BaseScraper
+from .browser_pool import BrowserPool
+from .consent import ConsentResolver
+
+
+# Startseiten, deren Cookies/Consent pro Website vorab geholt werden
+WARM_SITES = {
+    'ImmoweltScraper': 'https://www.immowelt.de',
+    'ImmoScoutScraper': 'https://www.immobilienscout24.de',
+    'WGGesuchtScraper': 'https://www.wg-gesucht.de',
+    'KleinanzeigenScraper': 'https://www.kleinanzeigen.de',
+}
+
+# Ein Kontext wird nach dieser Zeit (s) bzw. so vielen Suchen neu aufgebaut
+CONTEXT_MAX_AGE = 30 * 60
+CONTEXT_MAX_USES = 5
+# Ab so vielen Block-Signalen in einer Suche: Kontext und Cookies verwerfen
+BLOCKS_BEFORE_RECYCLE = 2
+
+
+class _WarmContext:
+    """Ein Kontext einer Website mit Alter, Nutzungen und Warm-Status"""
+
+    __slots__ = ('site', 'context', 'created', 'uses', 'warm')
+
+    def __init__(self, site: str, context, warm: bool):
+        self.site = site
+        self.context = context
+        self.created = time.monotonic()
+        self.uses = 0
+        self.warm = warm
+
+    def is_stale(self) -> bool:
+        if time.monotonic() - self.created > CONTEXT_MAX_AGE or self.uses >= CONTEXT_MAX_USES:
+            return True
+        browser = self.context.browser
+        return browser is not None and not browser.is_connected()
+
+
+class BrowserService:
+    """Langlebiger Browser für alle Suchen einer App-Sitzung
+
+    Läuft in einem eigenen Thread mit eigener Event-Loop, weil Playwright-
+    Objekte an die Loop gebunden sind, in der sie erstellt wurden; Suchen
+    werden mit run() in diese Loop gegeben. Beim Start wird der Browser-Pfad
+    einmal aufgelöst, Chromium gestartet und pro Website ein Kontext mit
+    gespeichertem storage_state (Cookies, Consent) vorbereitet. Fehlt der
+    Zustand, wird die Startseite einmal besucht und der Zustand unter
+    state_dir gespeichert. Veraltete oder blockierte Kontexte werden nach
+    der Suche geschlossen und im Hintergrund neu aufgebaut.
+    """
+
+    def __init__(self, state_dir: Path, log_callback: Callable = None,
+                 sites: Dict[str, str] = None, headless: bool = True,
+                 consent: ConsentResolver = None):
+        self.log = log_callback or print
+        self.state_dir = Path(state_dir)
+        self.sites = dict(WARM_SITES if sites is None else sites)
+        self.pool = BrowserPool(self._log, headless=headless)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._warm: Dict[str, _WarmContext] = {}
+        self._leased: Dict[object, _WarmContext] = {}
+        self._preparing: Dict[str, asyncio.Task] = {}
+        self._finder = BaseScraper(log_callback=self._log)
+        self.consent = consent or ConsentResolver(log_callback=self._log)
+
+    def _log(self, msg: str):
+        self.log(msg)
+
+    def start(self):
+        """Startet Thread und Event-Loop; das Vorwärmen läuft im Hintergrund"""
+        if self._thread is not None:
+            return
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="BrowserService", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.warm_up(), self.loop)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def is_running(self) -> bool:
+        return self.loop is not None and self.loop.is_running()
+
+    def run(self, coro):
+        """Führt eine Coroutine (z. B. eine Suche) in der Loop des Service aus"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def stop(self):
+        """Speichert die Zustände, schließt Browser und Treiber und beendet die Loop"""
+        if not self.is_running():
+            return
+        try:
+            self.run(self.close())
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _state_path(self, site: str) -> Path:
+        return self.state_dir / f"{site}.json"
+
+    async def warm_up(self):
+        """Löst den Browser-Pfad auf und bereitet alle Websites parallel vor"""
+        started = time.perf_counter()
+        try:
+            # Läuft vor jeder Suche in der Loop: die Suche startet mit aufgelöstem Pfad
+            self.pool.executable_path = self._finder._find_browser()
+            await asyncio.gather(*(self._prepare_later(site) for site in self.sites),
+                                 return_exceptions=True)
+            self.log(f"# Browser-Service bereit: {len(self._warm)} Kontexte in "
+                     f"{time.perf_counter() - started:.1f} s")
+        except Exception as e:
+            self.log(f"! Browser-Service: {str(e)[:50]}")
+
+    def _prepare_later(self, site: str) -> asyncio.Task:
+        """Startet die Vorbereitung einer Website (höchstens eine gleichzeitig)"""
+        task = self._preparing.get(site)
+        if task is None or task.done():
+            task = asyncio.ensure_future(self._prepare(site))
+            self._preparing[site] = task
+        return task
+
+    async def _prepare(self, site: str):
+        state = self._state_path(site)
+        context = await self.pool.new_context(site, storage_state=str(state) if state.exists() else None)
+        if not state.exists() and site in self.sites:
+            page = await context.new_page()
+            try:
+                await page.goto(self.sites[site], wait_until='domcontentloaded', timeout=20000)
+                await self.consent.resolve(page)
+                await context.storage_state(path=str(state))
+            except Exception as e:
+                self.log(f"! Vorwaermen {site}: {str(e)[:40]}")
+            finally:
+                await page.close()
+        self._warm[site] = _WarmContext(site, context, state.exists())
+
+    async def acquire(self, site: str) -> Tuple[object, bool]:
+        """Kontext einer Website: (Kontext, warm), warm = Startseite schon besucht"""
+        started = time.perf_counter()
+        task = self._preparing.get(site)
+        if task is not None and not task.done():
+            # Vorwärmen läuft noch: darauf warten statt einen zweiten Kontext zu bauen
+            await asyncio.wait({task})
+        entry = self._warm.pop(site, None)
+        if entry is not None and entry.is_stale():
+            await self._discard(entry)
+            entry = None
+        if entry is None:
+            state = self._state_path(site)
+            context = await self.pool.new_context(site, storage_state=str(state) if state.exists() else None)
+            entry = _WarmContext(site, context, state.exists())
+        entry.uses += 1
+        self._leased[entry.context] = entry
+        self.log(f"# {site}: {'warmer' if entry.warm else 'neuer'} Kontext in "
+                 f"{(time.perf_counter() - started) * 1000:.0f} ms")
+        return entry.context, entry.warm
+
+    async def release(self, context, blocks: int = 0):
+        """Gibt einen Kontext zurück; blockierte/veraltete werden neu aufgebaut"""
+        entry = self._leased.pop(context, None)
+        if entry is None:
+            await self.pool.release_context(context)
+            return
+        try:
+            # Routen und offene Tabs gehören zur beendeten Suche
+            await context.unroute("**/*")
+            for page in list(context.pages):
+                await page.close()
+        except Exception:
+            entry.uses = CONTEXT_MAX_USES
+
+        if blocks >= BLOCKS_BEFORE_RECYCLE:
+            self.log(f"# {entry.site}: {blocks} Block-Signale, Kontext und Cookies werden erneuert")
+            self._state_path(entry.site).unlink(missing_ok=True)
+            await self._discard(entry)
+            self._prepare_later(entry.site)
+            return
+
+        try:
+            await context.storage_state(path=str(self._state_path(entry.site)))
+            entry.warm = True
+        except Exception:
+            entry.uses = CONTEXT_MAX_USES
+        if entry.is_stale():
+            await self._discard(entry)
+            self._prepare_later(entry.site)
+        else:
+            self._warm[entry.site] = entry
+
+    async def _discard(self, entry: _WarmContext):
+        await self.pool.release_context(entry.context)
+
+    async def close(self):
+        for task in self._preparing.values():
+            task.cancel()
+        for entry in list(self._warm.values()) + list(self._leased.values()):
+            try:
+                await entry.context.storage_state(path=str(self._state_path(entry.site)))
+            except Exception:
+                pass
+        self._warm.clear()
+        self._leased.clear()
+        await self.pool.close()
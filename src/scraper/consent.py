@@ -0,0 +1,166 @@
+"""
+WohnungsScraper - Consent Resolver
+Akzeptiert Cookie-Banner mit einem einzigen Wettlauf aller Selektoren
+"""
+
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+
+CONSENT_SELECTORS = (
+    # Usercentrics (Immowelt, etc.)
+    '#usercentrics-root button[data-testid="uc-accept-all-button"]',
+    '[data-testid="uc-accept-all-button"]',
+    '#uc-btn-accept-banner',
+    'button[data-testid*="accept"]',
+    # Standard-Selektoren
+    'button[id*="accept"]', 'button[class*="accept"]',
+    'button[id*="consent"]', 'button[class*="consent"]',
+    'button[id*="agree"]', 'button[class*="agree"]',
+    'button:has-text("Akzeptieren")', 'button:has-text("Alle akzeptieren")',
+    'button:has-text("Accept")', 'button:has-text("Accept all")',
+    'button:has-text("Zustimmen")', 'button:has-text("Einverstanden")',
+    'a:has-text("Akzeptieren")', 'a:has-text("Zustimmen")',
+    '#cmpbntyestxt', '#acceptAllButton', '.cmpboxbtnyes',
+    'button.sp_choice_type_11', 'button[title*="accept"]',
+    '#onetrust-accept-btn-handler', '.onetrust-accept-btn',
+    '#didomi-notice-agree-button', '.didomi-accept-button',
+    '#CybotCookiebotDialogBodyLevelButtonLevelOptinAllowAll',
+)
+
+# Bekannte Consent-Cookies der gängigen CMPs (bevorzugt beim Lernen)
+CONSENT_COOKIES = (
+    'euconsent-v2', 'OptanonAlertBoxClosed', 'OptanonConsent', 'didomi_token',
+    'CookieConsent', 'consentUUID', '__cmpconsentx', 'uc_user_interaction',
+)
+# Usercentrics & Co. speichern die Einwilligung im localStorage statt im Cookie
+CONSENT_STORAGE_KEYS = ('uc_settings', 'ucData', 'uc_user_interaction', 'didomi_token')
+
+# So lange wird auf irgendeinen Banner gewartet (alle Selektoren zugleich)
+CONSENT_TIMEOUT = 3000
+# Zeit nach dem Klick, bis die CMP ihr Cookie gesetzt hat (s)
+CONSENT_SETTLE = 0.5
+
+
+def _domain(url: str) -> str:
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class ConsentResolver:
+    """Cookie-Banner per kombiniertem Locator statt Selektor für Selektor
+
+    Alle Kandidaten werden als eine Selektor-Liste gleichzeitig abgewartet
+    (höchstens CONSENT_TIMEOUT ms, auch wenn kein Banner kommt). Pro Domain
+    werden der funktionierende Selektor und das danach gesetzte Consent-
+    Cookie gelernt: der Selektor wird beim nächsten Mal zuerst geprüft, und
+    ist das Cookie schon da, entfällt die Banner-Suche ganz. learned ist
+    {domain: (Selektor, Cookie)} und wird von der API in der Datenbank
+    gespeichert.
+    """
+
+    def __init__(self, learned: Dict = None, log_callback: Callable = None,
+                 timeout: int = CONSENT_TIMEOUT):
+        self.log = log_callback or print
+        self.learned: Dict[str, tuple] = dict(learned or {})
+        self.timeout = timeout
+        self.calls = 0
+        self.skipped = 0
+        self.accepted = 0
+        self.seconds = 0.0
+
+    async def resolve(self, page, log: Callable = None) -> bool:
+        """Akzeptiert den Banner der Seite; True wenn Consent vorliegt (log: Log des Scrapers)"""
+        self.calls += 1
+        started = time.perf_counter()
+        try:
+            return await self._resolve(page, log or self.log)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    async def _resolve(self, page, log: Callable) -> bool:
+        domain = _domain(page.url)
+        selector, cookie = self.learned.get(domain, (None, None))
+
+        before = await self._cookie_names(page)
+        if (cookie and cookie in before) or await self._stored_consent(page):
+            self.skipped += 1
+            return True
+
+        candidates = ([selector] if selector else []) + [s for s in CONSENT_SELECTORS if s != selector]
+        try:
+            await page.locator(", ".join(candidates)).first.wait_for(state='visible', timeout=self.timeout)
+        except Exception:
+            await self._remove_overlay(page)
+            return False
+
+        # Welcher Kandidat ist sichtbar? (ohne Warten, der Banner ist schon da)
+        for candidate in candidates:
+            button = page.locator(candidate).first
+            try:
+                if not await button.is_visible():
+                    continue
+                await button.click(force=True, timeout=2000)
+            except Exception:
+                continue
+            self.accepted += 1
+            await asyncio.sleep(CONSENT_SETTLE)
+            self.learned[domain] = (candidate, self._consent_cookie(before, await self._cookie_names(page)))
+            log("    Cookie-Banner akzeptiert")
+            return True
+
+        await self._remove_overlay(page)
+        return False
+
+    @staticmethod
+    async def _cookie_names(page) -> set:
+        try:
+            return {c['name'] for c in await page.context.cookies(page.url)}
+        except Exception:
+            return set()
+
+    @staticmethod
+    async def _stored_consent(page) -> bool:
+        try:
+            return await page.evaluate(
+                "keys => keys.some(k => window.localStorage.getItem(k) !== null)",
+                list(CONSENT_STORAGE_KEYS))
+        except Exception:
+            return False
+
+    @staticmethod
+    def _consent_cookie(before: set, after: set) -> Optional[str]:
+        """Das durch den Klick neu gesetzte Consent-Cookie (bekannte CMP-Namen zuerst)
+
+        Andere neue Cookies (Session, Tracking) zählen nicht, sonst würde der
+        Banner künftig fälschlich übersprungen.
+        """
+        new = after - before
+        for name in CONSENT_COOKIES:
+            if name in new:
+                return name
+        consent = sorted(name for name in new if 'consent' in name.lower())
+        return consent[0] if consent else None
+
+    @staticmethod
+    async def _remove_overlay(page):
+        """Fallback: Usercentrics-Overlay entfernen, falls es die Seite verdeckt"""
+        try:
+            await page.evaluate('''
+                const uc = document.getElementById('usercentrics-root');
+                if (uc) uc.remove();
+            ''')
+        except Exception:
+            pass
+
+    def reset_stats(self):
+        self.calls = self.skipped = self.accepted = 0
+        self.seconds = 0.0
+
+    def log_stats(self):
+        if self.calls:
+            self.log(f"#   Consent: {self.calls} Aufrufe, {self.skipped} per Cookie uebersprungen, "
+                     f"{self.accepted} akzeptiert, {self.seconds:.1f} s "
+                     f"({self.seconds / self.calls * 1000:.0f} ms/Aufruf)")
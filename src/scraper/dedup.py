@@ -0,0 +1,165 @@
+"""
+WohnungsScraper - Duplicate Detector
+Erkennt dieselbe Wohnung auf mehreren Portalen (SimHash + LSH-Banding)
+"""
+
+import hashlib
+import itertools
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .normalizer import AddressNormalizer
+
+
+SIMHASH_BITS = 64
+# 5 Bänder (13/13/13/13/12 Bit): bei <= 4 abweichenden Bits stimmt
+# mindestens ein Band überein (Schubfachprinzip)
+LSH_BANDS = 5
+MAX_HAMMING_DISTANCE = 4
+# Gemerkte Wörter (Lanes); darüber wird die Tabelle neu aufgebaut
+TOKEN_CACHE_SIZE = 200_000
+
+# (Verschiebung, Maske) pro Band
+_BANDS = []
+_offset = 0
+for _band in range(LSH_BANDS):
+    _width = (SIMHASH_BITS - _offset) // (LSH_BANDS - _band)
+    _BANDS.append((_offset, (1 << _width) - 1))
+    _offset += _width
+# Jedes Hash-Bit bekommt einen 16-Bit-Zähler in einer großen Ganzzahl
+_LANE_BITS = 16
+_LANE_ONES = sum(1 << (bit * _LANE_BITS) for bit in range(SIMHASH_BITS))
+_LANE_HIGH = _LANE_ONES << (_LANE_BITS - 1)
+_LANE_BYTES = SIMHASH_BITS * _LANE_BITS // 8
+_BIT_CHARS = bytes.maketrans(b'\x00\x01', b'01')
+_TOKEN_PATTERN = re.compile(r'\w\w+')
+
+
+def _spread(value: int) -> int:
+    """Verteilt die 64 Bits eines Hashes auf 64 Zähler-Lanes"""
+    lanes = 0
+    for bit in range(SIMHASH_BITS):
+        if value >> bit & 1:
+            lanes |= 1 << (bit * _LANE_BITS)
+    return lanes
+
+
+class DuplicateDetector:
+    """Ordnet Listings Duplikat-Clustern zu
+
+    Pro Listing wird ein 64-Bit-SimHash über die Wörter des (gekürzten)
+    Rohtexts gebildet; jedes Wort wird dabei einmal normalisiert (Umlaute,
+    str./straße), text_norm des Listings bleibt also lazy. Listings ohne
+    Wörter bekommen keinen Cluster. Kandidaten kommen nur aus gleichen LSH-Bändern, es werden also nicht
+    alle Paare verglichen. Die Zuordnung ist inkrementell und funktioniert
+    damit auch im Streaming-Abgleich.
+    """
+
+    def __init__(self, max_distance: int = MAX_HAMMING_DISTANCE, token_cache_size: int = TOKEN_CACHE_SIZE):
+        self.max_distance = max_distance
+        self.token_cache_size = token_cache_size
+        self._token_lanes: Dict[str, int] = {}
+        self._buckets: List[Dict[int, List[Tuple[int, str]]]] = [{} for _ in range(LSH_BANDS)]
+        self.cluster_sizes: Dict[str, int] = {}
+        # Fortlaufende Cluster-IDs (bleiben auch nach clear() eindeutig)
+        self._cluster_ids = itertools.count(1)
+
+    def _learn(self, tokens: List[str]):
+        """Berechnet die Lanes für noch unbekannte Wörter (einmal pro Wort)"""
+        table = self._token_lanes
+        new = set(tokens).difference(table)
+        if len(table) + len(new) > self.token_cache_size:
+            table.clear()
+            new = set(tokens)
+        for token in new:
+            word = AddressNormalizer.normalize(token)
+            digest = hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest()
+            table[token] = _spread(int.from_bytes(digest, 'little'))
+
+    def simhash(self, text: str) -> Optional[int]:
+        """64-Bit-SimHash (Bit gesetzt, wenn mehr als die Hälfte der Wörter es setzen)
+
+        None ohne Wörter: ein leerer Hash wäre 0 und würde alle leeren bzw.
+        kurzen Texte in einen Cluster legen.
+        """
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        if not tokens:
+            return None
+        self._learn(tokens)
+        counts = sum(map(self._token_lanes.__getitem__, tokens))
+        # Zähler + (0x7FFF - half) setzt das oberste Lane-Bit genau bei Zähler > half
+        bias = (1 << (_LANE_BITS - 1)) - 1 - len(tokens) // 2
+        biased = (counts + _LANE_ONES * bias) & _LANE_HIGH
+        # Oberste Lane-Bits einsammeln: ein Byte pro Lane -> Binärstring
+        lane_bytes = (biased >> (_LANE_BITS - 1)).to_bytes(_LANE_BYTES, 'little')[::_LANE_BITS // 8]
+        return int(lane_bytes.translate(_BIT_CHARS)[::-1], 2)
+
+    def assign(self, listing) -> Optional[str]:
+        """Bestimmt die Cluster-ID eines Listings und speichert sie darauf (None ohne Wörter)"""
+        value = self.simhash(listing['text'])
+        if value is None:
+            listing.cluster_id = None
+            return None
+        cluster_id = self._find(value)
+        if cluster_id is None:
+            cluster_id = f"c{next(self._cluster_ids)}"
+        for band, (shift, mask) in enumerate(_BANDS):
+            self._buckets[band].setdefault(value >> shift & mask, []).append((value, cluster_id))
+        self.cluster_sizes[cluster_id] = self.cluster_sizes.get(cluster_id, 0) + 1
+        listing.cluster_id = cluster_id
+        return cluster_id
+
+    def _find(self, value: int) -> Optional[str]:
+        for band, (shift, mask) in enumerate(_BANDS):
+            for other, cluster_id in self._buckets[band].get(value >> shift & mask, ()):
+                if (value ^ other).bit_count() <= self.max_distance:
+                    return cluster_id
+        return None
+
+    def clear(self):
+        self._buckets = [{} for _ in range(LSH_BANDS)]
+        self.cluster_sizes.clear()
+        self._token_lanes.clear()
+
+    @property
+    def duplicate_count(self) -> int:
+        """Anzahl Listings, die einem bestehenden Cluster zugeordnet wurden"""
+        return sum(size - 1 for size in self.cluster_sizes.values())
+
+
+# Standalone Benchmark
+if __name__ == "__main__":
+    import random
+    import time
+
+    from .listing import Listing, Site
+
+    COUNT = 100_000
+    random.seed(5)
+    vocab = [f"wort{i}" for i in range(5000)] + ["wohnung", "zimmer", "balkon", "kueche", "miete"]
+    sites = list(Site)
+
+    listings = []
+    originals = []
+    for i in range(COUNT):
+        if originals and random.random() < 0.2:
+            # Dasselbe Inserat auf einem anderen Portal, leicht verändert
+            words = list(random.choice(originals))
+            for _ in range(random.randint(0, 2)):
+                words[random.randrange(len(words))] = random.choice(vocab)
+        else:
+            words = [random.choice(vocab) for _ in range(random.randint(40, 120))]
+            originals.append(words)
+        listings.append(Listing(" ".join(words), f"https://www.example.de/expose/{i}",
+                                random.choice(sites)))
+
+    detector = DuplicateDetector()
+    start = time.perf_counter()
+    for listing in listings:
+        detector.assign(listing)
+    elapsed = time.perf_counter() - start
+
+    expected = COUNT - len(originals)
+    print(f"{COUNT} Listings in {elapsed:.2f} s ({COUNT / elapsed:,.0f} Listings/s)")
+    print(f"  Cluster: {len(detector.cluster_sizes)}, erkannte Duplikate: {detector.duplicate_count} "
+          f"(eingestreut: {expected})")
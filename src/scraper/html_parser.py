@@ -0,0 +1,358 @@
+"""
+WohnungsScraper - HTML Parser
+Austauschbares Parser-Backend (selectolax > lxml > BeautifulSoup) für Ergebniskarten
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence
+
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer
+
+# Optional: schnelle C-Parser
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+# Reihenfolge bei automatischer Auswahl
+BACKENDS = ('selectolax', 'lxml', 'bs4')
+
+# Expose-Links (Immowelt, ImmoScout24) und Obergrenze für den Text einer Karte
+EXPOSE_PATTERN = re.compile(r'/expose/')
+MAX_CARD_TEXT = 3000
+# Listen/Seitenbereiche sind nie selbst eine Karte (auch bei nur einem Treffer)
+CARD_BOUNDARY_TAGS = frozenset(('html', 'body', 'main', 'ul', 'ol', 'table', 'tbody', 'form'))
+# Teilbaum mit Links zu mehreren Exposés (kein Kartencontainer mehr)
+_MULTI = object()
+
+
+class CardSpec:
+    """Eine Ergebniskarte: Tag und ganze Klasse (wie class_='...')
+
+    Die Klasse muss als eigenes Token vorkommen: 'wgg_card' trifft nicht
+    'wgg_card_footer' (sonst verschachtelte bzw. doppelte Karten).
+    """
+
+    __slots__ = ('tag', 'cls', 'css', 'xpath', '_pattern')
+
+    def __init__(self, tag: str, cls: str):
+        self.tag = tag
+        self.cls = cls
+        self.css = f'{tag}[class~="{cls}"]'
+        self.xpath = f'//{tag}[contains(concat(" ", normalize-space(@class), " "), " {cls} ")]'
+        # Token-Grenzen: der SoupStrainer sieht das ganze class-Attribut, find_all die einzelnen Klassen
+        self._pattern = re.compile(r'(?:^|\s)' + re.escape(cls) + r'(?:\s|$)')
+
+    def strainer(self) -> SoupStrainer:
+        """BeautifulSoup baut nur die Teilbäume der Karten auf"""
+        return SoupStrainer(self.tag, class_=self._pattern)
+
+
+class Card:
+    """Text und erster Link einer Karte"""
+
+    __slots__ = ('text', 'href')
+
+    def __init__(self, text: str, href: Optional[str]):
+        self.text = text
+        self.href = href
+
+
+def _clean(text: str) -> str:
+    # Alle Backends liefern denselben Text: Leerraum auf ein Leerzeichen reduziert
+    return " ".join(text.split())
+
+
+_TEXT_XPATH = './/text()[not(ancestor::script) and not(ancestor::style)]'
+
+
+class HtmlParser:
+    """Extrahiert nur die Ergebniskarten einer Seite
+
+    Jede Website gibt ihre Karten als CardSpec an (mehrere = Fallbacks,
+    die erste mit Treffern gilt). selectolax und lxml parsen in C und
+    erzeugen Python-Objekte nur für die Karten; BeautifulSoup baut per
+    SoupStrainer nur die Kartenteilbäume statt des ganzen Dokuments auf.
+    backend=None wählt das schnellste installierte Backend.
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        available = self.available_backends()
+        if backend is None:
+            backend = available[0]
+        elif backend not in available:
+            raise ValueError(f"Parser-Backend nicht verfügbar: {backend}")
+        self.backend = backend
+
+    @staticmethod
+    def available_backends() -> List[str]:
+        flags = {'selectolax': SELECTOLAX_AVAILABLE, 'lxml': LXML_AVAILABLE, 'bs4': True}
+        return [name for name in BACKENDS if flags[name]]
+
+    def cards(self, html: str, specs: Sequence[CardSpec]) -> List[Card]:
+        """Karten des ersten CardSpec mit Treffern (Skript-/Style-Inhalte zählen nicht)"""
+        if not html.strip():
+            return []
+        if self.backend == 'selectolax':
+            return self._cards_selectolax(html, specs)
+        if self.backend == 'lxml':
+            return self._cards_lxml(html, specs)
+        return self._cards_bs4(html, specs)
+
+    @staticmethod
+    def _cards_selectolax(html: str, specs: Sequence[CardSpec]) -> List[Card]:
+        tree = SelectolaxParser(html)
+        tree.strip_tags(['script', 'style'])
+        for spec in specs:
+            nodes = tree.css(spec.css)
+            if nodes:
+                cards = []
+                for node in nodes:
+                    link = node.css_first('a[href]')
+                    cards.append(Card(_clean(node.text(separator=' ')),
+                                      link.attributes.get('href') if link is not None else None))
+                return cards
+        return []
+
+    @staticmethod
+    def _cards_lxml(html: str, specs: Sequence[CardSpec]) -> List[Card]:
+        tree = lxml.html.fromstring(html)
+        for spec in specs:
+            nodes = tree.xpath(spec.xpath)
+            if nodes:
+                cards = []
+                for node in nodes:
+                    links = node.xpath('.//a[@href]')
+                    cards.append(Card(_clean(" ".join(node.xpath(_TEXT_XPATH))),
+                                      links[0].get('href') if links else None))
+                return cards
+        return []
+
+    @staticmethod
+    def _cards_bs4(html: str, specs: Sequence[CardSpec]) -> List[Card]:
+        for spec in specs:
+            soup = BeautifulSoup(html, 'html.parser', parse_only=spec.strainer())
+            nodes = soup.find_all(spec.tag, class_=spec._pattern)
+            if nodes:
+                cards = []
+                for node in nodes:
+                    link = node.find('a', href=True)
+                    cards.append(Card(_clean(node.get_text(separator=' ')),
+                                      link['href'] if link else None))
+                return cards
+        return []
+
+    def expose_cards(self, html: str, pattern: re.Pattern = EXPOSE_PATTERN,
+                     max_text: int = MAX_CARD_TEXT) -> List[Card]:
+        """Karten um Expose-Links in einem einzigen Bottom-up-Durchlauf
+
+        Die Karte eines Exposés ist der höchste Vorfahr seiner Links, dessen
+        Teilbaum auf kein anderes Exposé verlinkt, höchstens max_text
+        Zeichen enthält und keine Liste/kein Seitenbereich ist. Dafür wird pro Element einmal vermerkt, welche
+        Exposés darunter liegen und wie lang sein Text ist (Kinder vor
+        Eltern, also umgekehrte Dokumentreihenfolge); der Text wird danach
+        nur für die gefundenen Karten einmal erzeugt. href ist der erste
+        Link des Exposés (ohne Query).
+        """
+        if not html.strip():
+            return []
+        if self.backend == 'selectolax':
+            tree = SelectolaxParser(html)
+            tree.strip_tags(['script', 'style'])
+            elements = self._elements_selectolax(tree)
+            text = lambda node: node.text(separator=' ')
+        elif self.backend == 'lxml':
+            elements = self._elements_lxml(lxml.html.fromstring(html))
+            text = lambda node: " ".join(node.xpath(_TEXT_XPATH))
+        else:
+            elements = self._elements_bs4(BeautifulSoup(html, 'html.parser'))
+            text = lambda node: node.get_text(separator=' ')
+
+        # (Knoten, Schlüssel, Eltern-Schlüssel, Tag, href, eigene Textlänge) in Dokumentreihenfolge
+        links: Dict[str, str] = {}
+        for _, _, _, _, href, _ in elements:
+            if href is not None and pattern.search(href):
+                links.setdefault(href.split('?')[0], href.split('?')[0])
+
+        exposes: Dict[object, object] = {}
+        lengths: Dict[object, int] = {}
+        nodes: Dict[object, object] = {}
+        cards: Dict[str, object] = {}
+        for node, key, parent, tag, href, own in reversed(elements):
+            expose = exposes.get(key)
+            if href is not None and pattern.search(href):
+                link_id = href.split('?')[0]
+                expose = link_id if expose in (None, link_id) else _MULTI
+            if expose is not None and tag in CARD_BOUNDARY_TAGS:
+                expose = _MULTI
+            length = lengths.get(key, 0) + own
+            if expose is not None and expose is not _MULTI and length <= max_text:
+                # Vorfahren kommen später: der höchste passende gewinnt
+                cards[expose] = key
+                nodes[key] = node
+            if parent is not None:
+                if expose is not None:
+                    current = exposes.get(parent)
+                    exposes[parent] = expose if current in (None, expose) else _MULTI
+                lengths[parent] = lengths.get(parent, 0) + length + (1 if length else 0)
+
+        return [Card(_clean(text(nodes[cards[link_id]])), href)
+                for link_id, href in links.items() if link_id in cards]
+
+    @staticmethod
+    def _elements_selectolax(tree) -> List[tuple]:
+        out = []
+        for node in tree.root.traverse():
+            parent = node.parent
+            href = node.attributes.get('href') if node.tag == 'a' else None
+            out.append((node, node.mem_id, parent.mem_id if parent is not None else None, node.tag, href,
+                        len(_clean(node.text(deep=False, separator=' ')))))
+        return out
+
+    @staticmethod
+    def _elements_lxml(root) -> List[tuple]:
+        out = []
+        for el in root.iter():
+            if not isinstance(el.tag, str):
+                continue  # Kommentare
+            parent = el.getparent()
+            own = [] if el.tag in ('script', 'style') else [el.text or '']
+            own.extend(child.tail or '' for child in el)
+            out.append((el, el, parent, el.tag, el.get('href') if el.tag == 'a' else None,
+                        len(_clean(" ".join(own)))))
+        return out
+
+    @staticmethod
+    def _elements_bs4(soup) -> List[tuple]:
+        out = []
+        for el in soup.find_all(True):
+            own = " ".join(s for s in el.contents if type(s) is NavigableString)
+            out.append((el, id(el), id(el.parent) if el.parent is not None else None, el.name,
+                        el.get('href') if el.name == 'a' else None, len(_clean(own))))
+        return out
+
+
+# Benchmark: ms pro Seite und Spitzen-Speicher je Backend (eigener Prozess pro Backend)
+# python -m src.scraper.html_parser [gespeicherte_seite.html ...]
+# Immowelt-/ImmoScout-Seiten (Dateiname) laufen über expose_cards, zum Vergleich
+# auch über die frühere find_parent-Suche pro Link ("find_parent").
+def _find_parent_cards(html: str) -> int:
+    """Frühere Kartensuche: pro Expose-Link bis zu 10 Eltern mit get_text() hoch"""
+    count = 0
+    for a in BeautifulSoup(html, 'html.parser').find_all('a', href=True):
+        if '/expose/' not in a['href']:
+            continue
+        container = a
+        for _ in range(10):
+            container = container.find_parent()
+            if not container:
+                break
+            if 100 < len(container.get_text(separator=' ', strip=True)) < MAX_CARD_TEXT:
+                break
+        count += 1
+    return count
+
+
+def _peak_rss_kb() -> Optional[float]:
+    try:
+        import resource
+        return float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024
+    except Exception:
+        return None
+
+
+def _bench(backend: str, pages: List[tuple], rounds: int, queue):
+    import time
+    import tracemalloc
+
+    parser = HtmlParser(backend if backend != 'find_parent' else 'bs4')
+    base_rss = _peak_rss_kb()
+    tracemalloc.start()
+    started = time.perf_counter()
+    cards = 0
+    for _ in range(rounds):
+        for html, specs in pages:
+            if specs is not None:
+                cards += len(parser.cards(html, specs)) if backend != 'find_parent' else 0
+            elif backend == 'find_parent':
+                cards += _find_parent_cards(html)
+            else:
+                cards += len(parser.expose_cards(html))
+    elapsed = time.perf_counter() - started
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss = _peak_rss_kb()
+    queue.put((backend, elapsed * 1000 / (rounds * len(pages)), cards // rounds, py_peak,
+               rss - base_rss if rss is not None and base_rss is not None else None))
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    import random
+    import sys
+    from pathlib import Path
+
+    WG = (CardSpec('div', 'offer_list_item'),)
+    KLEINANZEIGEN = (CardSpec('article', 'aditem'), CardSpec('li', 'ad-listitem'))
+
+    IMMO = None  # expose_cards
+
+    def synthetic(count: int, card: str) -> str:
+        filler = "".join(f'<div class="nav"><a href="/n/{i}">Menü {i}</a><script>var x{i}=1;</script></div>'
+                         for i in range(400))
+        body = "".join(card.format(i=i, plz=80331 + random.randint(0, 600)) for i in range(count))
+        return f"<html><head><title>t</title></head><body>{filler}<main>{body}</main>{filler}</body></html>"
+
+    random.seed(7)
+    if len(sys.argv) > 1:
+        # Gespeicherte Seiten: Specs anhand des Dateinamens
+        pages = []
+        for path in sys.argv[1:]:
+            html = Path(path).read_text(encoding='utf-8', errors='ignore')
+            if 'immowelt' in path or 'immoscout' in path:
+                pages.append((html, IMMO))
+            else:
+                pages.append((html, KLEINANZEIGEN if 'kleinanzeigen' in path else WG))
+    else:
+        pages = [
+            (synthetic(20, '<div class="wgg_card offer_list_item" id="l{i}"><h3><a href="/wg-zimmer.{i}.html">'
+                           'Zimmer {i}</a></h3><span>{plz} München Leopoldstraße {i}</span>'
+                           '<div class="price">650 €</div></div>'), WG),
+            (synthetic(25, '<li class="ad-listitem"><article class="aditem" data-adid="{i}">'
+                           '<a href="/s-anzeige/wohnung/{i}">2-Zimmer Wohnung</a>'
+                           '<p>{plz} München - Schwabing</p><p>1.200 € VB</p></article></li>'), KLEINANZEIGEN),
+            # Große Immowelt-artige Seite: verschachtelte Karten, mehrere Links pro Exposé
+            (synthetic(150, '<div class="card"><div class="gallery"><a href="/expose/{i}?p=1"><img></a>'
+                            '<button>Merken</button></div><div class="body"><div class="head">'
+                            '<a href="/expose/{i}"><h2>3 Zimmer Wohnung {i}</h2></a></div><div class="facts">'
+                            '<span>{plz} München</span><span>Tal {i}</span><span>78 m²</span>'
+                            '<span>1.450 €</span></div></div></div>'), IMMO),
+        ]
+
+    ROUNDS = 30
+    queue = multiprocessing.Queue()
+    print(f"{len(pages)} Seiten x {ROUNDS} Durchläufe")
+    backends = HtmlParser.available_backends()
+    if any(specs is IMMO for _, specs in pages):
+        backends.append('find_parent')
+    for backend in backends:
+        proc = multiprocessing.Process(target=_bench, args=(backend, pages, ROUNDS, queue))
+        proc.start()
+        name, ms, cards, py_peak, rss = queue.get()
+        proc.join()
+        rss_text = f"{rss / 1024:6.1f} MB RSS" if rss is not None else "RSS unbekannt"
+        print(f"  {name:10s} {ms:7.2f} ms/Seite, {cards} Karten, "
+              f"Python-Heap {py_peak / 1024 / 1024:5.1f} MB, {rss_text}")
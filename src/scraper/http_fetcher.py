@@ -0,0 +1,92 @@
+"""
+WohnungsScraper - HTTP Fetcher
+Schneller HTTP-Abruf serverseitig gerenderter Ergebnisseiten (curl_cffi)
+"""
+
+import time
+from typing import Callable, Optional
+
+# Optional: curl_cffi für Browser-Impersonation (TLS/HTTP2-Fingerprint)
+try:
+    from curl_cffi.requests import AsyncSession
+    CURL_CFFI_AVAILABLE = True
+except ImportError:
+    CURL_CFFI_AVAILABLE = False
+    AsyncSession = None
+
+
+HTTP_IMPERSONATE = "chrome"
+HTTP_TIMEOUT = 25
+# Gleichzeitige Verbindungen im Pool (Keep-Alive, über alle Websites)
+HTTP_MAX_CLIENTS = 10
+
+HTTP_HEADERS = {
+    'Accept-Language': 'de-DE,de;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+
+class HttpFetcher:
+    """Gemeinsame curl_cffi-AsyncSession mit Chrome-Impersonation
+
+    Die Session hält Verbindungen offen (Keep-Alive) und spricht wie Chrome
+    HTTP/2; Cookies bleiben über alle Anfragen erhalten. get() liefert None
+    bei Netzwerkfehlern oder HTTP-Status != 200, damit der Scraper auf den
+    Browser ausweichen kann.
+    """
+
+    def __init__(self, log_callback: Callable = None, impersonate: str = HTTP_IMPERSONATE,
+                 timeout: float = HTTP_TIMEOUT, max_clients: int = HTTP_MAX_CLIENTS):
+        self.log = log_callback or print
+        self.impersonate = impersonate
+        self.timeout = timeout
+        self.max_clients = max_clients
+        self._session = None
+        self.requests = 0
+        self.failures = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def is_available(self) -> bool:
+        return CURL_CFFI_AVAILABLE
+
+    def _get_session(self):
+        if self._session is None:
+            self._session = AsyncSession(impersonate=self.impersonate, headers=HTTP_HEADERS,
+                                         timeout=self.timeout, max_clients=self.max_clients)
+        return self._session
+
+    async def get(self, url: str) -> Optional[str]:
+        """HTML einer Seite oder None (Fehler / kein 200)"""
+        if not CURL_CFFI_AVAILABLE:
+            return None
+        self.requests += 1
+        started = time.perf_counter()
+        try:
+            response = await self._get_session().get(url)
+        except Exception as e:
+            self.failures += 1
+            self.log(f"      ! HTTP-Fehler: {str(e)[:40]}")
+            return None
+        finally:
+            self.seconds += time.perf_counter() - started
+
+        if response.status_code != 200:
+            self.failures += 1
+            self.log(f"      ! HTTP {response.status_code}")
+            return None
+        self.bytes += len(response.content)
+        return response.text
+
+    def log_stats(self):
+        if self.requests:
+            self.log(f"#   HTTP: {self.requests} Seiten, {self.bytes / 1024 / 1024:.1f} MB, "
+                     f"{self.seconds / self.requests:.2f} s/Seite, {self.failures} Fehler")
+
+    async def close(self):
+        if self._session is not None:
+            try:
+                await self._session.close()
+            except:
+                pass
+            self._session = None
@@ -3,23 +3,33 @@ WohnungsScraper - ImmoScout24 Scraper
 MIT Chrome Portable + nodriver für bessere Bot-Umgehung
 """
 
-import os
 import sys
 import re
+import time
 import random
 import asyncio
 from pathlib import Path
-from typing import List, Dict
+from typing import Callable, List
 from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
-
-from .base import BaseScraper, BUNDESLAND_MAP, PAGE_DELAY_MIN, PAGE_DELAY_MAX, AddressNormalizer
+from .base import BaseScraper, BUNDESLAND_MAP, Listing, Site, ResourcePolicy, Readiness, StructuredExtractor
+from .html_parser import Card
+from .structured import EXPOSE_URLS, ListingRecord
 
 
 class ImmoScoutScraper(BaseScraper):
     """Scraper für ImmobilienScout24.de mit erweiterter Bot-Umgehung"""
     
+    # Bot-Schutz braucht fremde Skripte: nur Typen filtern, keine Domains
+    RESOURCE_POLICY = ResourcePolicy(types=('document', 'script', 'xhr', 'fetch', 'stylesheet'))
+    READINESS = Readiness('#resultListItems li, a[href*="/expose/"]', timeout=10000)
+    # Strengerer Bot-Schutz: längere menschliche Pausen
+    POLITENESS_DELAY = (1.0, 2.5)
+    # Nur numerische Exposé-IDs sind Listings (keine Projekt-/Werbelinks)
+    EXPOSE_LINK = re.compile(r'/expose/\d+')
+    # Ergebnisliste als JSON (IS24.resultList), DOM-Text nur als Fallback
+    STRUCTURED = StructuredExtractor(EXPOSE_URLS['immoscout24'])
+    
     def _find_chrome_portable(self) -> str:
         """Sucht nach Chrome Portable im App-Verzeichnis"""
         app_dir = Path(sys.executable).parent if getattr(sys, 'frozen', False) else Path(__file__).parent.parent.parent
@@ -38,7 +48,7 @@ class ImmoScoutScraper(BaseScraper):
         
         return None
     
-    async def collect(self, city: str) -> List[Dict]:
+    async def collect(self, city: str) -> List[Listing]:
         """ImmoScout24: Mietwohnungen + WG mit mehreren Methoden"""
         listings = []
         city_slug = self.normalize_city(city)
@@ -85,7 +95,24 @@ class ImmoScoutScraper(BaseScraper):
         
         return listings
     
-    async def _collect_with_nodriver(self, city_slug: str, bundesland: str, chrome_path: str) -> List[Dict]:
+    def _category_urls(self, city_slug: str, bundesland: str) -> List:
+        """Such-URLs pro Kategorie als (Name, url_for(page_num))"""
+        base_url = "https://www.immobilienscout24.de"
+        categories = [
+            (f"/Suche/de/{bundesland}/{city_slug}/wohnung-mieten", "Mietwohnungen"),
+            (f"/Suche/de/{bundesland}/{city_slug}/wg-zimmer", "WG-Zimmer"),
+        ]
+        
+        def url_for(cat_url: str):
+            def build(page_num: int) -> str:
+                if page_num == 1:
+                    return f"{base_url}{cat_url}"
+                return f"{base_url}{cat_url}?pagenumber={page_num}"
+            return build
+        
+        return [(cat_name, url_for(cat_url)) for cat_url, cat_name in categories]
+    
+    async def _collect_with_nodriver(self, city_slug: str, bundesland: str, chrome_path: str) -> List[Listing]:
         """Sammelt Listings mit nodriver (ohne CDP-Spuren)"""
         listings = []
         base_url = "https://www.immobilienscout24.de"
@@ -108,7 +135,7 @@ class ImmoScoutScraper(BaseScraper):
             # Erst Startseite besuchen
             self.log("    Besuche Startseite...")
             page = await browser.get(base_url)
-            await asyncio.sleep(random.uniform(3, 5))
+            await self.politeness_pause()
             
             # Scrolle und bewege Maus
             try:
@@ -117,72 +144,53 @@ class ImmoScoutScraper(BaseScraper):
             except:
                 pass
             
-            categories = [
-                (f"/Suche/de/{bundesland}/{city_slug}/wohnung-mieten", "Mietwohnungen"),
-                (f"/Suche/de/{bundesland}/{city_slug}/wg-zimmer", "WG-Zimmer"),
-            ]
+            display_max = self.max_pages if self.max_pages > 0 else "alle"
             
-            for cat_url, cat_name in categories:
-                if self.should_stop():
-                    break
-                
-                self.log(f"    Kategorie: {cat_name}")
-                empty_pages = 0
-                page_num = 0
-                effective_max = self.max_pages if self.max_pages > 0 else 9999  # 0 = unbegrenzt
-                
-                while page_num < effective_max:
-                    if self.should_stop():
-                        break
+            async def open_tab():
+                return await browser.get('about:blank', new_tab=True)
+            
+            async def close_tab(tab):
+                try:
+                    await tab.close()
+                except:
+                    pass
+            
+            async def fetch(tab, url: str, page_num: int):
+                self.log(f"      Seite {page_num}/{display_max}...")
+                try:
+                    started = time.perf_counter()
+                    await tab.get(url)
+                    self.record_ready(url, started, await self.READINESS.wait_nodriver(tab), indent="        ")
+                    await self.politeness_pause()
                     
-                    page_num += 1
-                    display_max = self.max_pages if self.max_pages > 0 else "alle"
-                    self.report_progress(page_num, effective_max if self.max_pages > 0 else page_num)
-                    self.log(f"      Seite {page_num}/{display_max}...")
+                    # Menschliches Verhalten
+                    try:
+                        await tab.scroll_down(random.randint(200, 400))
+                        await asyncio.sleep(0.5)
+                    except:
+                        pass
                     
-                    if page_num == 1:
-                        url = f"{base_url}{cat_url}"
-                    else:
-                        url = f"{base_url}{cat_url}?pagenumber={page_num}"
+                    html = await tab.get_content()
                     
-                    try:
-                        page = await browser.get(url)
-                        await asyncio.sleep(random.uniform(3, 5))
-                        
-                        # Menschliches Verhalten
-                        try:
-                            await page.scroll_down(random.randint(200, 400))
-                            await asyncio.sleep(0.5)
-                        except:
-                            pass
-                        
-                        html = await page.get_content()
-                        
-                        if "Ich bin kein Roboter" in html or len(html) < 10000:
-                            self.log(f"        ! Bot-Erkennung")
-                            empty_pages += 1
-                            if empty_pages >= 2:
-                                break
-                            continue
-                        
-                        # Parse Listings
-                        new_count = self._parse_listings(html, listings, base_url)
-                        self.log(f"        {new_count} neue (Total: {len(listings)})")
-                        
-                        if new_count == 0:
-                            empty_pages += 1
-                            if empty_pages >= 2:
-                                break
-                        else:
-                            empty_pages = 0
-                        
-                    except Exception as e:
-                        self.log(f"        ! Fehler: {str(e)[:30]}")
-                        empty_pages += 1
-                        if empty_pages >= 2:
-                            break
+                    if "Ich bin kein Roboter" in html or len(html) < 10000:
+                        self.log(f"        ! Bot-Erkennung")
+                        return None
                     
-                    await asyncio.sleep(random.uniform(PAGE_DELAY_MIN, PAGE_DELAY_MAX))
+                    # Parse Listings
+                    new_count = self._parse_listings(html, listings, base_url)
+                    self.log(f"        {new_count} neue (Seite {page_num}, Total: {len(listings)})")
+                    return new_count
+                
+                except Exception as e:
+                    self.log(f"        ! Fehler: {str(e)[:30]}")
+                    return None
+            
+            for cat_name, url_for in self._category_urls(city_slug, bundesland):
+                if self.should_stop():
+                    break
+                
+                self.log(f"    Kategorie: {cat_name}")
+                await self.crawl_pages(url_for, fetch, open_tab=open_tab, close_tab=close_tab)
         
         finally:
             if browser:
@@ -193,7 +201,7 @@ class ImmoScoutScraper(BaseScraper):
         
         return listings
     
-    async def _collect_with_curl(self, city_slug: str, bundesland: str) -> List[Dict]:
+    async def _collect_with_curl(self, city_slug: str, bundesland: str) -> List[Listing]:
         """Sammelt Listings mit curl_cffi (TLS-Fingerprint-Spoofing)"""
         listings = []
         base_url = "https://www.immobilienscout24.de"
@@ -223,196 +231,120 @@ class ImmoScoutScraper(BaseScraper):
         
         # Erst Startseite für Cookies
         try:
-            session.get(base_url, headers=headers, timeout=30)
+            await asyncio.to_thread(session.get, base_url, headers=headers, timeout=30)
             await asyncio.sleep(1)
         except:
             pass
         
-        categories = [
-            (f"/Suche/de/{bundesland}/{city_slug}/wohnung-mieten", "Mietwohnungen"),
-            (f"/Suche/de/{bundesland}/{city_slug}/wg-zimmer", "WG-Zimmer"),
-        ]
+        async def open_tab():
+            # Eigene Session pro Tab (nicht thread-sicher), Cookies der Startseite übernehmen
+            tab = cffi_requests.Session(impersonate="chrome120")
+            tab.cookies.update(session.cookies)
+            return tab
         
-        for cat_url, cat_name in categories:
-            if self.should_stop():
-                break
+        async def close_tab(tab):
+            tab.close()
+        
+        async def fetch(tab, url: str, page_num: int):
+            response = await asyncio.to_thread(tab.get, url, headers=headers, timeout=30)
+            
+            if response.status_code != 200:
+                return None
             
-            self.log(f"    Kategorie: {cat_name}")
-            empty_pages = 0
-            page_num = 0
-            effective_max = self.max_pages if self.max_pages > 0 else 9999  # 0 = unbegrenzt
+            html = response.text
             
-            while page_num < effective_max:
+            if "Ich bin kein Roboter" in html or len(html) < 10000:
+                return None
+            
+            return self._parse_listings(html, listings, base_url)
+        
+        try:
+            for cat_name, url_for in self._category_urls(city_slug, bundesland):
                 if self.should_stop():
                     break
                 
-                page_num += 1
-                self.report_progress(page_num, effective_max if self.max_pages > 0 else page_num)
-                
-                if page_num == 1:
-                    url = f"{base_url}{cat_url}"
-                else:
-                    url = f"{base_url}{cat_url}?pagenumber={page_num}"
-                
-                try:
-                    response = session.get(url, headers=headers, timeout=30)
-                    
-                    if response.status_code != 200:
-                        empty_pages += 1
-                        if empty_pages >= 2:
-                            break
-                        continue
-                    
-                    html = response.text
-                    
-                    if "Ich bin kein Roboter" in html or len(html) < 10000:
-                        empty_pages += 1
-                        if empty_pages >= 2:
-                            break
-                        continue
-                    
-                    new_count = self._parse_listings(html, listings, base_url)
-                    
-                    if new_count == 0:
-                        empty_pages += 1
-                        if empty_pages >= 2:
-                            break
-                    else:
-                        empty_pages = 0
-                    
-                except Exception as e:
-                    empty_pages += 1
-                    if empty_pages >= 2:
-                        break
-                
-                await asyncio.sleep(random.uniform(PAGE_DELAY_MIN, PAGE_DELAY_MAX))
+                self.log(f"    Kategorie: {cat_name}")
+                await self.crawl_pages(url_for, fetch, open_tab=open_tab, close_tab=close_tab)
+        finally:
+            session.close()
         
         return listings
     
-    async def _collect_with_playwright(self, city_slug: str, bundesland: str) -> List[Dict]:
+    async def _collect_with_playwright(self, city_slug: str, bundesland: str) -> List[Listing]:
         """Fallback mit Playwright"""
         listings = []
         base_url = "https://www.immobilienscout24.de"
         
         await self.start_browser()
-        page = await self.context.new_page()
-        
-        try:
-            # Startseite besuchen
+        if self.context_warm:
+            self.log("  Startseite uebersprungen (Cookies aus warmem Kontext)")
+        else:
+            page = await self.new_page()
             try:
-                await page.goto(base_url, wait_until='domcontentloaded', timeout=30000)
-                await asyncio.sleep(random.uniform(3, 5))
-                await self._accept_cookies(page)
-                await self._human_behavior_intense(page)
-            except Exception as e:
-                self.log(f"    ! Startseite: {str(e)[:30]}")
+                # Startseite besuchen
+                try:
+                    await page.goto(base_url, wait_until='domcontentloaded', timeout=30000)
+                    await self._accept_cookies(page)
+                    await self.politeness_pause()
+                    await self._human_behavior_intense(page)
+                except Exception as e:
+                    self.log(f"    ! Startseite: {str(e)[:30]}")
+            finally:
+                await self.close_page(page)
+        
+        async def fetch(tab, url: str, page_num: int):
+            await self.goto_ready(tab, url, timeout=30000, indent="      ")
+            await self._human_behavior_intense(tab)
             
-            categories = [
-                (f"/Suche/de/{bundesland}/{city_slug}/wohnung-mieten", "Mietwohnungen"),
-                (f"/Suche/de/{bundesland}/{city_slug}/wg-zimmer", "WG-Zimmer"),
-            ]
+            # Karten und Zustands-Skripte im Browser extrahieren; volles HTML nur ohne Karten
+            result = await self.browser_extract.expose_cards(tab, self.EXPOSE_LINK.pattern,
+                                                             markers=self.STRUCTURED.markers)
+            if not result.cards and ("Ich bin kein Roboter" in result.html or len(result.html) < 10000):
+                return None
             
-            for cat_url, cat_name in categories:
-                if self.should_stop():
-                    break
-                
-                empty_pages = 0
-                page_num = 0
-                effective_max = self.max_pages if self.max_pages > 0 else 9999  # 0 = unbegrenzt
-                
-                while page_num < effective_max:
-                    if self.should_stop():
-                        break
-                    
-                    page_num += 1
-                    self.report_progress(page_num, effective_max if self.max_pages > 0 else page_num)
-                    
-                    if page_num == 1:
-                        url = f"{base_url}{cat_url}"
-                    else:
-                        url = f"{base_url}{cat_url}?pagenumber={page_num}"
-                    
-                    try:
-                        await page.goto(url, wait_until='domcontentloaded', timeout=30000)
-                        await self._human_behavior_intense(page)
-                        
-                        html = await page.content()
-                        
-                        if "Ich bin kein Roboter" in html or len(html) < 10000:
-                            empty_pages += 1
-                            if empty_pages >= 2:
-                                break
-                            continue
-                        
-                        new_count = self._parse_listings(html, listings, base_url)
-                        
-                        if new_count == 0:
-                            empty_pages += 1
-                            if empty_pages >= 2:
-                                break
-                        else:
-                            empty_pages = 0
-                        
-                    except Exception as e:
-                        empty_pages += 1
-                        if empty_pages >= 2:
-                            break
-                    
-                    await asyncio.sleep(random.uniform(PAGE_DELAY_MIN, PAGE_DELAY_MAX))
+            return self._add_page(self.STRUCTURED.extract(result.state), lambda: result.cards,
+                                  listings, base_url)
         
-        finally:
-            try:
-                await page.close()
-            except:
-                pass
+        for cat_name, url_for in self._category_urls(city_slug, bundesland):
+            if self.should_stop():
+                break
+            
+            await self.crawl_pages(url_for, fetch)
         
         return listings
     
-    def _parse_listings(self, html: str, listings: List[Dict], base_url: str) -> int:
-        """Parst HTML und extrahiert Listings"""
-        soup = BeautifulSoup(html, 'html.parser')
-        expose_links = soup.find_all('a', href=re.compile(r'/expose/\d+'))
+    def _parse_listings(self, html: str, listings: List[Listing], base_url: str) -> int:
+        """Parst HTML und extrahiert Listings (JSON der Ergebnisliste, sonst DOM-Text)"""
+        return self._add_page(self.STRUCTURED.extract(html),
+                              lambda: self.html_parser.expose_cards(html, pattern=self.EXPOSE_LINK),
+                              listings, base_url)
+    
+    def _add_page(self, records: List[ListingRecord], cards: Callable[[], List[Card]],
+                  listings: List[Listing], base_url: str) -> int:
+        """Übernimmt eine Ergebnisseite: JSON-Inserate, sonst die Karten (erst dann berechnet)"""
+        if records:
+            new_count = self.add_records(listings, records, Site.IMMOSCOUT, base_url)
+            if new_count:
+                self.emit_listings(listings[-new_count:])
+            return new_count
         
-        if not expose_links:
+        cards = cards()
+        
+        if not cards:
             return 0
         
-        seen_urls = set()
         new_count = 0
         
-        for link in expose_links:
-            href = link.get('href', '')
-            if '/expose/' not in href:
-                continue
-            
-            url_full = urljoin(base_url, href)
+        for card in cards:
+            url_full = urljoin(base_url, card.href)
             
-            if url_full in seen_urls:
+            if self.listing_store.seen('immoscout24', url_full):
                 continue
-            seen_urls.add(url_full)
             
-            if any(l['url'] == url_full for l in listings):
-                continue
-            
-            # Text aus Container extrahieren
-            text = ""
-            container = link
-            for _ in range(5):
-                container = container.find_parent()
-                if container:
-                    text = container.get_text(separator=' ', strip=True)
-                    if len(text) > 50:
-                        break
-            
-            if not text:
-                text = link.get_text(separator=' ', strip=True)
-            
-            listings.append({
-                'text': text[:500],
-                'text_norm': AddressNormalizer.normalize(text[:500]),
-                'url': url_full,
-                'website': 'immoscout24',
-                'website_name': 'ImmobilienScout24.de'
-            })
-            new_count += 1
+            if self.add_listing(listings, Listing(card.text[:500], url_full, Site.IMMOSCOUT)):
+                new_count += 1
+        
+        if new_count:
+            self.emit_listings(listings[-new_count:])
         
         return new_count
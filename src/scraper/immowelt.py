@@ -5,23 +5,37 @@ Diese Version maximiert die Ergebnisse von der ersten Seite und
 durchsucht mehrere Kategorien.
 """
 
-import re
 import random
 import asyncio
-from typing import List, Dict, Set
+from typing import List
 
-from bs4 import BeautifulSoup
+from .base import (BaseScraper, PAGE_DELAY_MIN, PAGE_DELAY_MAX, Listing, Site, ResourcePolicy, Readiness,
+                   StructuredExtractor)
+from .structured import EXPOSE_URLS
+from .response_capture import ResponseCapture, CAPTURE_SETTLE
 
-from .base import BaseScraper, PAGE_DELAY_MIN, PAGE_DELAY_MAX, AddressNormalizer
+# Listing-Antworten der SPA (Suche/Nachladen)
+LISTING_XHR = r'/(?:serp|classified-search|search)\b'
+# Höchstens so viele Scroll-Schritte, solange noch Listing-Antworten kommen
+CAPTURE_MAX_STEPS = 20
 
 
 class ImmoweltScraper(BaseScraper):
     """Scraper für Immowelt.de - optimiert für SPA mit Bot-Schutz"""
     
-    async def collect(self, city: str) -> List[Dict]:
+    # SPA mit DataDome: Skripte/CSS aller Domains nötig, Bilder/Fonts/Medien nicht.
+    # Ohne diese (und ohne Tracker) ist networkidle deutlich früher erreicht.
+    RESOURCE_POLICY = ResourcePolicy(types=('document', 'script', 'xhr', 'fetch', 'stylesheet'))
+    # SPA: erste Expose-Karte im DOM oder die Antwort der Suche (XHR), was zuerst kommt
+    READINESS = Readiness('a[href*="/expose/"]', response=LISTING_XHR, timeout=15000)
+    # DataDome: Pause zwischen Kategorien wie bisher (über politeness_delay abschaltbar)
+    POLITENESS_DELAY = (PAGE_DELAY_MIN, PAGE_DELAY_MAX)
+    # Server-Zustand der SPA (PLZ/Straße/Hausnummer als Felder)
+    STRUCTURED = StructuredExtractor(EXPOSE_URLS['immowelt'])
+    
+    async def collect(self, city: str) -> List[Listing]:
         """Immowelt: Durchsucht mehrere Kategorien um Listings zu sammeln"""
         listings = []
-        seen_urls: Set[str] = set()
         city_slug = self.normalize_city(city)
         base_url = "https://www.immowelt.de"
         
@@ -34,18 +48,20 @@ class ImmoweltScraper(BaseScraper):
         ]
         
         await self.start_browser()
-        page = await self.context.new_page()
+        page = await self.new_page()
         
         try:
-            # Startseite für Cookies
-            self.log("  Besuche Startseite fuer Cookies...")
-            try:
-                await page.goto(base_url, wait_until='domcontentloaded', timeout=20000)
-                await asyncio.sleep(2)
-                await self._accept_cookies(page)
-                await self._human_behavior(page)
-            except Exception as e:
-                self.log(f"    ! Startseite: {str(e)[:30]}")
+            # Startseite für Cookies (entfällt mit warmem Kontext des BrowserService)
+            if self.context_warm:
+                self.log("  Startseite uebersprungen (Cookies aus warmem Kontext)")
+            else:
+                self.log("  Besuche Startseite fuer Cookies...")
+                try:
+                    await page.goto(base_url, wait_until='domcontentloaded', timeout=20000)
+                    await self._accept_cookies(page)
+                    await self._human_behavior(page)
+                except Exception as e:
+                    self.log(f"    ! Startseite: {str(e)[:30]}")
             
             total_categories = len(categories)
             
@@ -57,23 +73,34 @@ class ImmoweltScraper(BaseScraper):
                 self.report_progress(cat_idx, total_categories)
                 self.log(f"  Kategorie: {cat_name}")
                 
+                # Listing-Antworten der SPA mitschneiden (vor goto, sonst ist die erste vorbei)
+                capture = ResponseCapture(page, LISTING_XHR, self.STRUCTURED)
+                capture.start()
                 try:
-                    await page.goto(search_url, wait_until='networkidle', timeout=30000)
-                    await asyncio.sleep(3)
-                    await self._accept_cookies(page)
-                except Exception as e:
-                    self.log(f"    ! Suchseite: {str(e)[:30]}")
-                    continue
-                
-                # Intensive Scrollen um alle Lazy-Loaded Elemente zu laden
-                await self._intensive_scroll(page)
+                    try:
+                        await self.goto_ready(page, search_url, timeout=30000)
+                        await self._accept_cookies(page)
+                    except Exception as e:
+                        self.log(f"    ! Suchseite: {str(e)[:30]}")
+                        continue
+                    
+                    # Nur scrollen, solange die SPA neue Inserate nachlädt;
+                    # ohne Listing-Antworten wie bisher alles für Lazy-Loading abscrollen
+                    if not await self._scroll_while_capturing(page, capture):
+                        await self._intensive_scroll(page)
+                finally:
+                    capture.stop()
                 
-                # Extrahiere Listings
-                new_count = await self._extract_listings(page, listings, seen_urls, base_url)
+                # Inserate aus den Antworten, dann eingebettetes JSON und DOM
+                new_count = self.add_records(listings, capture.take(), Site.IMMOWELT, base_url)
+                new_count += await self._extract_listings(page, listings, base_url)
                 self.log(f"    {new_count} neue Inserate (Total: {len(listings)})")
+                self.log_resources_blocked(page)
+                if new_count:
+                    self.emit_listings(listings[-new_count:])
                 
                 # Kurze Pause zwischen Kategorien
-                await asyncio.sleep(random.uniform(PAGE_DELAY_MIN, PAGE_DELAY_MAX))
+                await self.politeness_pause()
             
             self.log(f"  Gesamtergebnis: {len(listings)} Inserate")
             
@@ -85,13 +112,31 @@ class ImmoweltScraper(BaseScraper):
         except Exception as e:
             self.log(f"  ! Fehler: {str(e)[:50]}")
         finally:
-            try:
-                await page.close()
-            except:
-                pass
+            await self.close_page(page)
         
         return listings
     
+    async def _scroll_while_capturing(self, page, capture: ResponseCapture) -> bool:
+        """Scrollt ans Ende, solange neue Listing-Antworten kommen; False ohne jede Antwort"""
+        await self._remove_overlays(page)
+        if not capture.count:
+            # Antwort des ersten Ladens noch unterwegs (oder die Seite lädt erst beim Scrollen)
+            await capture.wait_for_growth(CAPTURE_SETTLE)
+        
+        steps = 0
+        for steps in range(1, CAPTURE_MAX_STEPS + 1):
+            if self.should_stop():
+                break
+            await page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
+            if not await capture.wait_for_growth(CAPTURE_SETTLE):
+                break
+        
+        if not capture.count:
+            return False
+        self.log(f"    {capture.count} Inserate aus {capture.responses} Listing-Antworten "
+                 f"({steps} Scroll-Schritte)")
+        return True
+    
     async def _intensive_scroll(self, page):
         """Intensives Scrollen um alle Lazy-Loaded Elemente zu laden"""
         try:
@@ -125,54 +170,36 @@ class ImmoweltScraper(BaseScraper):
         except:
             pass
     
-    async def _extract_listings(self, page, listings: List[Dict], seen_urls: Set[str], base_url: str) -> int:
-        """Extrahiert Listings von der aktuellen Seite"""
-        html = await page.content()
-        soup = BeautifulSoup(html, 'html.parser')
-        new_count = 0
+    async def _extract_listings(self, page, listings: List[Listing], base_url: str) -> int:
+        """Extrahiert Listings von der aktuellen Seite
+
+        Zuerst aus dem eingebetteten JSON; nachgeladene Karten (Scrollen)
+        stehen nur im DOM und kommen per DOM-Text dazu. Beides wird im
+        Browser extrahiert (nur Karten und Zustands-Skripte, kein page.content()).
+        """
+        result = await self.browser_extract.expose_cards(page, markers=self.STRUCTURED.markers)
+        new_count = self.add_records(listings, self.STRUCTURED.extract(result.state), Site.IMMOWELT, base_url)
         
-        # Finde alle Expose-Links
-        for a in soup.find_all('a', href=True):
-            href = a.get('href', '')
-            if '/expose/' not in href:
-                continue
+        # Eine Karte pro Expose (gemeinsamer Container, Text einmal berechnet)
+        for card in result.cards:
+            href = card.href
             
             # URL normalisieren
             if href.startswith('http'):
-                url_full = href.split('?')[0]
+                url_full = href
             elif href.startswith('/'):
-                url_full = base_url + href.split('?')[0]
+                url_full = base_url + href
             else:
                 continue
             
             # Duplikate pruefen
-            if url_full in seen_urls:
+            if self.listing_store.seen('immowelt', url_full):
                 continue
-            seen_urls.add(url_full)
-            
-            # Text aus Container extrahieren
-            text = ""
-            container = a
-            for _ in range(10):
-                container = container.find_parent()
-                if not container:
-                    break
-                text = container.get_text(separator=' ', strip=True)
-                if 100 < len(text) < 3000:
-                    break
-            
-            if not text or len(text) < 50:
-                text = a.get_text(separator=' ', strip=True)
             
-            if text and len(text) > 20:
-                listings.append({
-                    'text': text[:500],
-                    'text_norm': AddressNormalizer.normalize(text[:500]),
-                    'url': url_full,
-                    'website': 'immowelt',
-                    'website_name': 'Immowelt.de'
-                })
-                new_count += 1
+            text = card.text
+            if len(text) > 20:
+                if self.add_listing(listings, Listing(text[:500], url_full, Site.IMMOWELT)):
+                    new_count += 1
         
         return new_count
     
@@ -4,14 +4,10 @@ Filtert nur Miet-Anzeigen (keine Kaufangebote, keine Gesuche)
 """
 
 import re
-import random
-import asyncio
-from typing import List, Dict
+from typing import List
 from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
-
-from .base import BaseScraper, PAGE_DELAY_MIN, PAGE_DELAY_MAX, AddressNormalizer
+from .base import BaseScraper, Listing, Site, ResourcePolicy, Readiness, CardSpec
 
 
 # Kleinanzeigen Location-IDs
@@ -55,6 +51,16 @@ INCLUDE_KEYWORDS = [
 class KleinanzeigenScraper(BaseScraper):
     """Scraper für Kleinanzeigen.de - nur Miet-Anzeigen"""
     
+    # Ergebnisliste ist serverseitig gerendert
+    RESOURCE_POLICY = ResourcePolicy(types=('document', 'script', 'xhr', 'fetch'),
+                                     domains=('kleinanzeigen.de',))
+    READINESS = Readiness('article.aditem, li.ad-listitem', timeout=10000)
+    CARDS = (CardSpec('article', 'aditem'), CardSpec('li', 'ad-listitem'))
+    
+    @staticmethod
+    def _is_blocked(html: str) -> bool:
+        return len(html) < 5000 or "Cookies" in html[:1000]
+    
     def _is_rental_listing(self, text: str) -> bool:
         """Prüft ob es sich um eine Miet-Anzeige handelt"""
         text_lower = text.lower()
@@ -82,7 +88,7 @@ class KleinanzeigenScraper(BaseScraper):
         
         return False
     
-    async def collect(self, city: str) -> List[Dict]:
+    async def collect(self, city: str) -> List[Listing]:
         """Kleinanzeigen: Nur Mietwohnungen und WG-Zimmer (gefiltert)"""
         listings = []
         city_slug = self.normalize_city(city)
@@ -101,119 +107,66 @@ class KleinanzeigenScraper(BaseScraper):
             (f"/s-wg-zimmer-gesucht/{city_slug}/anzeige:angebote/c199{location_suffix}", "WG-Zimmer Angebote"),
         ]
         
-        await self.start_browser()
-        page = await self.context.new_page()
+        await self.visit_start_page(base_url, human_behavior=False)
         
-        try:
-            self.log("  Besuche Startseite fuer Cookies...")
+        display_max = self.max_pages if self.max_pages > 0 else "alle"
+        
+        async def fetch(tab, url: str, page_num: int):
+            self.log(f"    Seite {page_num}/{display_max}...")
             try:
-                await page.goto(base_url, wait_until='domcontentloaded', timeout=20000)
-                await asyncio.sleep(2)
-                await self._accept_cookies(page)
-            except Exception as e:
-                self.log(f"    ! Startseite: {str(e)[:30]}")
-            
-            for cat_url, cat_name in categories:
-                if self.should_stop():
-                    self.log("  >>> Suche wird gestoppt...")
-                    break
+                cards = await self.fetch_cards(url, self._is_blocked, tab)
                 
-                self.log(f"  Kategorie: {cat_name}")
-                empty_pages = 0
-                page_num = 0
-                effective_max = self.max_pages if self.max_pages > 0 else 9999
+                if cards is None:
+                    self.log(f"      ! Moeglicherweise blockiert")
+                    return None
                 
-                while page_num < effective_max:
-                    if self.should_stop():
-                        self.log("  >>> Suche wird gestoppt...")
-                        break
-                    
-                    page_num += 1
-                    display_max = self.max_pages if self.max_pages > 0 else "alle"
-                    self.report_progress(page_num, effective_max if self.max_pages > 0 else page_num)
-                    self.log(f"    Seite {page_num}/{display_max}...")
-                    
-                    if page_num == 1:
-                        url = f"{base_url}{cat_url}"
-                    else:
-                        url = f"{base_url}{cat_url}/seite:{page_num}"
+                if not cards:
+                    self.log(f"      Keine Inserate gefunden")
+                    return 0
+                
+                new_count = 0
+                filtered_count = 0
+                
+                for card in cards:
+                    text = card.text
+                    href = card.href
                     
-                    try:
-                        await page.goto(url, wait_until='domcontentloaded', timeout=25000)
-                        await self._human_behavior(page)
-                        
-                        html = await page.content()
-                        
-                        if len(html) < 5000 or "Cookies" in html[:1000]:
-                            self.log(f"      ! Moeglicherweise blockiert")
-                            empty_pages += 1
-                            if empty_pages >= 2:
-                                break
-                            continue
-                        
-                        soup = BeautifulSoup(html, 'html.parser')
-                        items = soup.find_all('article', class_='aditem')
-                        
-                        if not items:
-                            items = soup.find_all('li', class_=re.compile(r'ad-listitem'))
-                        
-                        if not items:
-                            self.log(f"      Keine Inserate gefunden")
-                            empty_pages += 1
-                            if empty_pages >= 2:
-                                break
-                            continue
-                        
-                        new_count = 0
-                        filtered_count = 0
-                        
-                        for item in items:
-                            text = item.get_text(separator=' ', strip=True)
-                            link = item.find('a', href=True)
+                    if href:
+                        if '/s-anzeige/' in href:
+                            # Filter: Ist es eine echte Miet-Anzeige?
+                            if not self._is_rental_listing(text):
+                                filtered_count += 1
+                                continue
                             
-                            if link:
-                                href = link.get('href', '')
-                                if '/s-anzeige/' in href:
-                                    # Filter: Ist es eine echte Miet-Anzeige?
-                                    if not self._is_rental_listing(text):
-                                        filtered_count += 1
-                                        continue
-                                    
-                                    url_full = urljoin(base_url, href)
-                                    if not any(l['url'] == url_full for l in listings):
-                                        listings.append({
-                                            'text': text,
-                                            'text_norm': AddressNormalizer.normalize(text),
-                                            'url': url_full,
-                                            'website': 'kleinanzeigen',
-                                            'website_name': 'Kleinanzeigen.de'
-                                        })
-                                        new_count += 1
-                        
-                        if filtered_count > 0:
-                            self.log(f"      {new_count} Miet-Anzeigen, {filtered_count} gefiltert (Total: {len(listings)})")
-                        else:
-                            self.log(f"      {new_count} neue Inserate (Total: {len(listings)})")
-                        
-                        if new_count == 0:
-                            empty_pages += 1
-                            if empty_pages >= 2:
-                                break
-                        else:
-                            empty_pages = 0
-                        
-                    except Exception as e:
-                        self.log(f"      ! Fehler: {str(e)[:30]}")
-                        empty_pages += 1
-                        if empty_pages >= 2:
-                            break
-                    
-                    await asyncio.sleep(random.uniform(PAGE_DELAY_MIN, PAGE_DELAY_MAX))
+                            url_full = urljoin(base_url, href)
+                            if self.add_listing(listings, Listing(text, url_full, Site.KLEINANZEIGEN)):
+                                new_count += 1
+                
+                if filtered_count > 0:
+                    self.log(f"      {new_count} Miet-Anzeigen, {filtered_count} gefiltert (Seite {page_num}, Total: {len(listings)})")
+                else:
+                    self.log(f"      {new_count} neue Inserate (Seite {page_num}, Total: {len(listings)})")
+                if new_count:
+                    self.emit_listings(listings[-new_count:])
+                return new_count
+            
+            except Exception as e:
+                self.log(f"      ! Fehler: {str(e)[:30]}")
+                return None
         
-        finally:
-            try:
-                await page.close()
-            except:
-                pass
+        for cat_url, cat_name in categories:
+            if self.should_stop():
+                self.log("  >>> Suche wird gestoppt...")
+                break
+            
+            self.log(f"  Kategorie: {cat_name}")
+            
+            def url_for(page_num: int, cat_url=cat_url) -> str:
+                if page_num == 1:
+                    return f"{base_url}{cat_url}"
+                return f"{base_url}{cat_url}/seite:{page_num}"
+            
+            # Mehrere Tabs (bzw. HTTP-Anfragen), Tempo über den Token-Bucket der Domain
+            await self.crawl_pages(url_for, fetch, open_tab=self.open_fetch_tab, close_tab=self.close_fetch_tab)
         
         return listings
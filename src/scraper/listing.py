@@ -0,0 +1,173 @@
+"""
+WohnungsScraper - Listing Record
+Kompakter Datensatz für ein gesammeltes Inserat
+"""
+
+from enum import Enum
+from typing import Dict, Iterator
+
+from .normalizer import AddressNormalizer
+
+
+# Maximale Länge des gespeicherten Rohtexts pro Inserat
+MAX_TEXT_LENGTH = 1000
+
+
+class Site(Enum):
+    """Website eines Inserats (Schlüssel, Anzeigename)"""
+    WG_GESUCHT = ('wg-gesucht', 'WG-Gesucht.de')
+    KLEINANZEIGEN = ('kleinanzeigen', 'Kleinanzeigen.de')
+    IMMOWELT = ('immowelt', 'Immowelt.de')
+    IMMOSCOUT = ('immoscout24', 'ImmobilienScout24.de')
+
+    @property
+    def key(self) -> str:
+        return self.value[0]
+
+    @property
+    def display_name(self) -> str:
+        return self.value[1]
+
+    @classmethod
+    def from_key(cls, key: str) -> 'Site':
+        for site in cls:
+            if site.key == key:
+                return site
+        raise ValueError(f"Unbekannte Website: {key}")
+
+
+class Listing:
+    """Ein Inserat mit __slots__ statt dict
+
+    Der Rohtext wird auf MAX_TEXT_LENGTH gekürzt, die Website als Enum
+    gespeichert und text_norm erst beim ersten Zugriff berechnet (der
+    Abgleich braucht ihn nur für Inserate mit passender PLZ). Lesender
+    Zugriff wie bei einem dict (listing['url'], listing.get(...)) bleibt
+    möglich. Inserate aus dem Seitenzustand (StructuredExtractor) tragen
+    zusätzlich PLZ, Straße, Hausnummer und Anzeigen-ID; sonst sind diese
+    Felder None.
+    """
+
+    __slots__ = ('text', 'url', 'site', 'cluster_id', 'city', 'listing_id',
+                 'postal_code', 'street', 'house_number', '_text_norm')
+
+    KEYS = ('text', 'text_norm', 'url', 'website', 'website_name', 'cluster_id', 'city',
+            'listing_id', 'postal_code', 'street', 'house_number')
+
+    def __init__(self, text: str, url: str, site: Site):
+        self.text = text[:MAX_TEXT_LENGTH]
+        self.url = url
+        self.site = site
+        # Duplikat-Cluster über alle Portale (siehe DuplicateDetector)
+        self.cluster_id = None
+        # Normalisierte Stadt des Such-Jobs (Abgleich nur mit Adressen dieser Stadt)
+        self.city = None
+        # Strukturierte Felder (nur aus JSON, siehe StructuredExtractor)
+        self.listing_id = None
+        self.postal_code = None
+        self.street = None
+        self.house_number = None
+        self._text_norm = None
+
+    @property
+    def text_norm(self) -> str:
+        if self._text_norm is None:
+            self._text_norm = AddressNormalizer.normalize(self.text)
+        return self._text_norm
+
+    @property
+    def website(self) -> str:
+        return self.site.key
+
+    @property
+    def website_name(self) -> str:
+        return self.site.display_name
+
+    # dict-kompatible Sicht (API, Matcher, Berichte)
+    def __getitem__(self, key: str):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.KEYS else default
+
+    def keys(self) -> Iterator[str]:
+        return iter(self.KEYS)
+
+    def to_dict(self) -> Dict:
+        return {key: getattr(self, key) for key in self.KEYS}
+
+    def __repr__(self) -> str:
+        return f"Listing({self.site.key}, {self.url})"
+
+
+# Standalone Messung (Speicherbedarf dict vs. Listing), getrennt nach
+# Kürzung/lazy text_norm und __slots__
+# python -m src.scraper.listing
+if __name__ == "__main__":
+    import random
+    import tracemalloc
+
+    COUNT = 200_000
+    random.seed(3)
+    words = ["Schöne", "2-Zimmer", "Wohnung", "Maximilianstraße", "12", "80539", "München",
+             "Balkon", "Küche", "ab", "sofort", "frei", "1.250", "€", "Kaltmiete", "75", "m²"]
+    # WG-Gesucht/Kleinanzeigen: voller Kartentext, teils sehr lang
+    bodies = [" ".join(random.choice(words) for _ in range(random.randint(20, 400)))
+              for _ in range(1000)]
+
+    def card_text(i: int) -> str:
+        return f"Inserat {i} " + bodies[i % len(bodies)]
+
+    def card_url(i: int) -> str:
+        return f"https://www.wg-gesucht.de/wg-zimmer-in-Muenchen.{i}.html"
+
+    def measure(build) -> int:
+        tracemalloc.start()
+        items = build()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del items
+        return current
+
+    def build_dicts():
+        """Bisher: voller Text, text_norm sofort berechnet"""
+        out = []
+        for i in range(COUNT):
+            text = card_text(i)
+            out.append({
+                'text': text,
+                'text_norm': AddressNormalizer.normalize(text),
+                'url': card_url(i),
+                'website': 'wg-gesucht',
+                'website_name': 'WG-Gesucht.de'
+            })
+        return out
+
+    def build_slot_dicts():
+        """Inhalt wie Listing (gekürzt, text_norm lazy), aber als dict"""
+        return [dict(zip(Listing.__slots__, (card_text(i)[:MAX_TEXT_LENGTH], card_url(i), Site.WG_GESUCHT,
+                                             None, None, None, None, None, None, None)))
+                for i in range(COUNT)]
+
+    def build_listings():
+        return [Listing(card_text(i), card_url(i), Site.WG_GESUCHT) for i in range(COUNT)]
+
+    AddressNormalizer.clear_cache()
+    as_dicts = measure(build_dicts)
+    AddressNormalizer.clear_cache()
+    as_slot_dicts = measure(build_slot_dicts)
+    as_listings = measure(build_listings)
+
+    def mb(size: int) -> str:
+        return f"{size / 1024 / 1024:8.1f} MB"
+
+    print(f"{COUNT} Inserate")
+    print(f"  dict (voller Text, text_norm):        {mb(as_dicts)}")
+    print(f"  dict (gekürzt, text_norm lazy):       {mb(as_slot_dicts)}"
+          f"  Kürzung/lazy: {100 * (1 - as_slot_dicts / as_dicts):.0f}% weniger")
+    print(f"  Listing (gekürzt, lazy, __slots__):   {mb(as_listings)}"
+          f"  __slots__: {100 * (1 - as_listings / as_slot_dicts):.0f}% weniger"
+          f" ({(as_slot_dicts - as_listings) / COUNT:.0f} Bytes/Inserat)")
+    print(f"  gesamt: {100 * (1 - as_listings / as_dicts):.0f}% weniger")
@@ -0,0 +1,109 @@
+"""
+WohnungsScraper - Listing Store
+Gemeinsame Sammelstelle für Listings aller Scraper mit O(1)-Duplikatprüfung
+"""
+
+import re
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .listing import Listing
+from .dedup import DuplicateDetector
+
+
+# Anzeigen-IDs pro Website (aus dem URL-Pfad)
+LISTING_ID_PATTERNS = {
+    'wg-gesucht': re.compile(r'\.(\d+)\.html$'),
+    'kleinanzeigen': re.compile(r'/s-anzeige/(?:[^/]+/)?(\d+)'),
+    'immowelt': re.compile(r'/expose/([\w-]+)'),
+    'immoscout24': re.compile(r'/expose/(\d+)'),
+}
+
+# Stadt des laufenden Such-Jobs; jeder asyncio-Task hat seinen eigenen Wert
+CURRENT_CITY: ContextVar = ContextVar('current_city', default=None)
+
+
+def canonical_url(url: str) -> str:
+    """Entfernt Query-Parameter, Fragment und abschließenden Slash"""
+    parts = urlsplit(url)
+    path = parts.path.rstrip('/') or '/'
+    return f"{parts.scheme}://{parts.netloc.lower()}{path}"
+
+
+def listing_key(website: str, url: str) -> str:
+    """Schlüssel für die Duplikatprüfung: Anzeigen-ID oder kanonische URL"""
+    pattern = LISTING_ID_PATTERNS.get(website)
+    if pattern:
+        match = pattern.search(urlsplit(url).path)
+        if match:
+            return match.group(1)
+    return canonical_url(url)
+
+
+class ListingStore:
+    """Sammelt Listings aller Websites (einzige Quelle für all_listings)
+
+    Duplikate werden pro Stadt und Website über die Anzeigen-ID bzw. die
+    kanonische URL in O(1) erkannt und gezählt. Neue Listings werden mit
+    der Stadt des Such-Jobs (CURRENT_CITY) markiert; ein Inserat, das die
+    Suche einer zweiten Stadt ebenfalls findet, wird für diese Stadt erneut
+    aufgenommen (sonst fehlt es in for_city). Mit einem DuplicateDetector
+    bekommt jedes neue Listing zusätzlich eine Cluster-ID (gleiche Wohnung
+    auf mehreren Portalen), noch bevor es abgeglichen wird; die Kopie für
+    eine weitere Stadt übernimmt die Cluster-ID der ersten.
+    """
+
+    def __init__(self, detector: DuplicateDetector = None):
+        self.detector = detector
+        self._listings: List[Listing] = []
+        self._keys: Dict[Tuple[Optional[str], str, str], int] = {}
+        self._first: Dict[Tuple[str, str], int] = {}
+        self.duplicates: Dict[str, int] = {}
+
+    def add(self, listing: Listing) -> bool:
+        """Fügt ein Listing hinzu; False wenn es für seine Stadt bereits vorhanden ist"""
+        website = listing.website
+        listing.url = canonical_url(listing.url)
+        if listing.city is None:
+            listing.city = CURRENT_CITY.get()
+        site_key = (website, listing_key(website, listing.url))
+        key = (listing.city, *site_key)
+        if key in self._keys:
+            self.duplicates[website] = self.duplicates.get(website, 0) + 1
+            return False
+        self._keys[key] = len(self._listings)
+        first = self._first.setdefault(site_key, len(self._listings))
+        self._listings.append(listing)
+        if first != self._keys[key]:
+            # Schon für eine andere Stadt gesammelt: kein neues Portal-Duplikat
+            listing.cluster_id = self._listings[first].cluster_id
+        elif self.detector:
+            self.detector.assign(listing)
+        return True
+
+    def seen(self, website: str, url: str) -> bool:
+        """Prüft vor dem Parsen der Karte, ob die URL für die Stadt schon gesammelt wurde"""
+        return (CURRENT_CITY.get(), website, listing_key(website, url)) in self._keys
+
+    def __len__(self) -> int:
+        return len(self._listings)
+
+    def __iter__(self) -> Iterator[Listing]:
+        return iter(self._listings)
+
+    @property
+    def listings(self) -> List[Listing]:
+        return self._listings
+
+    def for_city(self, city: str) -> List[Listing]:
+        """Listings, die für eine (normalisierte) Stadt gesammelt wurden"""
+        return [listing for listing in self._listings if listing.city == city]
+
+    def clear(self):
+        self._listings.clear()
+        self._keys.clear()
+        self._first.clear()
+        self.duplicates.clear()
+        if self.detector:
+            self.detector.clear()
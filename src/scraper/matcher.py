@@ -0,0 +1,321 @@
+"""
+WohnungsScraper - Address Matcher
+Vorberechneter Adress-Index für den Abgleich von Listings mit Adressen
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple
+
+from .normalizer import AddressNormalizer
+from .street_search import StreetAutomaton
+
+
+# Alle 5-stelligen Ziffernfolgen (auch innerhalb längerer Zahlen)
+PLZ_PATTERN = re.compile(r'(?=(\d{5}))')
+
+# Parallel-Abgleich ab Listings x Adressen (0 = nie parallel)
+PARALLEL_MATCH_THRESHOLD = 50_000_000
+# Listings pro Arbeitspaket im Prozess-Pool
+PARALLEL_CHUNK_SIZE = 2_000
+
+
+class _IndexedAddress:
+    """Vorbereitete Adresse (Varianten + kompilierte Hausnummer-Regex)"""
+
+    __slots__ = ('order', 'addr', 'plz', 'display', 'street_ids', 'street_norms',
+                 'house_variants', 'house_patterns', 'house_after')
+
+    def __init__(self, order: int, addr: Dict, automaton: StreetAutomaton):
+        self.order = order
+        self.addr = addr
+        self.plz = addr.get('postal_code', '')
+        self.display = f"{addr['street']} {addr['house_number']}, {self.plz} {addr['city']}"
+        self.street_norms = frozenset(AddressNormalizer.get_street_variants(addr['street']))
+        self.street_ids = frozenset(automaton.add(sv) for sv in self.street_norms)
+        house_variants = AddressNormalizer.get_house_variants(addr['house_number'])
+        self.house_variants = frozenset(house_variants)
+        self.house_patterns = [
+            re.compile(r'\b' + re.escape(hv) + r'\b') for hv in house_variants
+        ]
+        # Hausnummer direkt hinter der Straße ("hauptstrasse 12")
+        alternatives = '|'.join(re.escape(hv) for hv in sorted(house_variants, key=len, reverse=True))
+        self.house_after = re.compile(r'\s?(?:' + alternatives + r')\b')
+
+
+class AddressMatcher:
+    """Adress-Index für den Listing-Abgleich
+
+    Adressen werden einmalig nach PLZ indiziert. Pro Listing werden die
+    PLZ-Kandidaten einmal extrahiert und Straße/Hausnummer nur für Adressen
+    mit passender PLZ geprüft. Alle Straßen-Varianten werden in einem
+    gemeinsamen Automaten in einem Durchlauf über text_norm gesucht. Das
+    Ergebnis ist identisch zur bisherigen Schleife über alle Adressen x
+    Listings.
+
+    Listings mit strukturierten Feldern (PLZ und Straße aus dem JSON der
+    Seite) werden ohne Textsuche per Feldvergleich abgeglichen: PLZ-Lookup,
+    Straßen-Varianten und Hausnummer-Varianten als Mengenvergleich.
+
+    house_after_street=True verlangt zusätzlich, dass die Hausnummer direkt
+    hinter einem Straßen-Treffer steht (strenger als die bisherige Suche).
+    """
+
+    def __init__(self, addresses: List[Dict], match_mode: str = "exact",
+                 house_after_street: bool = False):
+        self.addresses = addresses
+        self.match_mode = match_mode
+        self.house_after_street = house_after_street
+        self.automaton = StreetAutomaton()
+        self.by_plz: Dict[str, List[_IndexedAddress]] = {}
+        # Adressen mit ungewöhnlicher PLZ (nicht 5-stellig) -> Teilstring-Suche
+        self.irregular: List[_IndexedAddress] = []
+
+        for order, addr in enumerate(addresses):
+            entry = _IndexedAddress(order, addr, self.automaton)
+            if not entry.plz:
+                continue  # Ohne PLZ kein Treffer möglich
+            if len(entry.plz) == 5 and entry.plz.isdigit():
+                self.by_plz.setdefault(entry.plz, []).append(entry)
+            else:
+                self.irregular.append(entry)
+
+        self.automaton.build()
+
+    def _candidates(self, text_raw: str) -> List[_IndexedAddress]:
+        """Adressen deren PLZ im Rohtext vorkommt"""
+        candidates = []
+        if self.by_plz:
+            for plz in set(PLZ_PATTERN.findall(text_raw)):
+                entries = self.by_plz.get(plz)
+                if entries:
+                    candidates.extend(entries)
+        for entry in self.irregular:
+            if entry.plz in text_raw:
+                candidates.append(entry)
+        return candidates
+
+    def _match_one(self, entry: _IndexedAddress, listing: Dict,
+                   street_hits: Dict[int, List[int]]) -> Dict:
+        """Prüft Straße und Hausnummer für eine Adresse mit passender PLZ"""
+        text_norm = listing['text_norm']
+
+        # Straße suchen (PFLICHT für beide Modi)
+        street_ends = [end for sid in entry.street_ids for end in street_hits.get(sid, ())]
+        if not street_ends:
+            return None
+
+        # Hausnummer suchen (nur für exakte Suche PFLICHT)
+        if self.house_after_street:
+            house_found = any(entry.house_after.match(text_norm, end) for end in street_ends)
+        else:
+            house_found = any(p.search(text_norm) for p in entry.house_patterns)
+        match_type = "exact" if house_found else "extended"
+
+        return self._result(entry, listing, match_type)
+
+    def _match_fields(self, entry: _IndexedAddress, listing: Dict,
+                      street_norms: frozenset, house_variants: frozenset) -> Dict:
+        """Feldvergleich für Listings mit PLZ/Straße/Hausnummer aus dem JSON"""
+        if entry.street_norms.isdisjoint(street_norms):
+            return None
+        match_type = "exact" if not entry.house_variants.isdisjoint(house_variants) else "extended"
+        return self._result(entry, listing, match_type)
+
+    def _result(self, entry: _IndexedAddress, listing: Dict, match_type: str) -> Dict:
+        if self.match_mode == "exact" and match_type != "exact":
+            return None
+
+        return {
+            'address_id': entry.addr['id'],
+            'address_display': entry.display,
+            'url': listing['url'],
+            'title': listing['text'][:120],
+            'website': listing['website'],
+            'website_name': listing['website_name'],
+            'match_type': match_type,
+            'cluster_id': listing.get('cluster_id')
+        }
+
+    def street_hits(self, text_norm: str) -> Dict[int, List[int]]:
+        """Straßen-Treffer im Text: Varianten-ID -> Endpositionen"""
+        hits: Dict[int, List[int]] = {}
+        for _, end, sid in self.automaton.find_all(text_norm):
+            hits.setdefault(sid, []).append(end)
+        return hits
+
+    def match_indexed(self, listings: List[Dict]) -> List[Tuple[int, int, Dict]]:
+        """Liefert (Adress-Index, Listing-Index, Treffer) ohne Sortierung"""
+        found = []
+        for listing_idx, listing in enumerate(listings):
+            plz, street = listing.get('postal_code'), listing.get('street')
+            if plz and street:
+                street_norms = frozenset(AddressNormalizer.get_street_variants(street))
+                house = listing.get('house_number')
+                house_variants = frozenset(AddressNormalizer.get_house_variants(house) if house else ())
+                # Ungewöhnliche PLZ wie im Textpfad per Teilstring (der Text enthält die PLZ)
+                candidates = [entry for entry in self.irregular if entry.plz in listing['text']]
+                for entry in self.by_plz.get(plz, []) + candidates:
+                    match = self._match_fields(entry, listing, street_norms, house_variants)
+                    if match:
+                        found.append((entry.order, listing_idx, match))
+                continue
+            candidates = self._candidates(listing['text'])
+            if not candidates:
+                continue
+            street_hits = self.street_hits(listing['text_norm'])
+            if not street_hits:
+                continue
+            for entry in candidates:
+                match = self._match_one(entry, listing, street_hits)
+                if match:
+                    found.append((entry.order, listing_idx, match))
+        return found
+
+    def match(self, listings: List[Dict]) -> List[Dict]:
+        """Vergleicht Listings mit allen Adressen
+
+        Reihenfolge wie bisher: Adresse für Adresse, innerhalb einer
+        Adresse in Listing-Reihenfolge. Duplikate (URL + Adresse) entfallen.
+        """
+        return self._merge(self.match_indexed(listings))
+
+    def match_parallel(self, listings: List[Dict], workers: int = None,
+                       chunk_size: int = PARALLEL_CHUNK_SIZE) -> List[Dict]:
+        """Wie match(), aber Listings werden auf einen Prozess-Pool verteilt
+
+        Jeder Worker baut den Adress-Index einmal beim Start auf. Das
+        Ergebnis ist identisch zu match() (deterministische Reihenfolge).
+        """
+        workers = workers or os.cpu_count() or 1
+        chunks = [(offset, listings[offset:offset + chunk_size])
+                  for offset in range(0, len(listings), chunk_size)]
+
+        found = []
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)) or 1,
+            initializer=_init_worker,
+            initargs=(self.addresses, self.match_mode, self.house_after_street)
+        ) as pool:
+            for part in pool.map(_match_chunk, chunks):
+                found.extend(part)
+        return self._merge(found)
+
+    @staticmethod
+    def _merge(found: List[Tuple[int, int, Dict]]) -> List[Dict]:
+        """Sortiert nach (Adresse, Listing) und entfernt Duplikate"""
+        found.sort(key=lambda f: (f[0], f[1]))
+
+        matches = []
+        seen = set()
+        for _, _, match in found:
+            key = (match['url'], match['address_id'])
+            if key in seen:
+                continue
+            seen.add(key)
+            matches.append(match)
+        return matches
+
+
+# Prozess-Pool: ein Matcher pro Worker, einmal beim Start gebaut
+_worker_matcher: AddressMatcher = None
+
+
+def _init_worker(addresses: List[Dict], match_mode: str, house_after_street: bool):
+    global _worker_matcher
+    _worker_matcher = AddressMatcher(addresses, match_mode, house_after_street)
+
+
+def _match_chunk(chunk: Tuple[int, List[Dict]]) -> List[Tuple[int, int, Dict]]:
+    offset, listings = chunk
+    return [(order, offset + idx, match)
+            for order, idx, match in _worker_matcher.match_indexed(listings)]
+
+
+# Standalone Benchmark
+if __name__ == "__main__":
+    import random
+    import time
+
+    def legacy_match(listings: List[Dict], addresses: List[Dict], match_mode: str) -> List[Dict]:
+        """Bisherige Schleife aus BatchScraper.match_listings (Referenz)"""
+        matches = []
+        for addr in addresses:
+            street_variants = AddressNormalizer.get_street_variants(addr['street'])
+            house_variants = AddressNormalizer.get_house_variants(addr['house_number'])
+            plz = addr.get('postal_code', '')
+            address_display = f"{addr['street']} {addr['house_number']}, {plz} {addr['city']}"
+            for listing in listings:
+                text_norm = listing['text_norm']
+                if not (plz and plz in listing['text']):
+                    continue
+                if not any(sv in text_norm for sv in street_variants):
+                    continue
+                house_found = any(re.search(r'\b' + re.escape(hv) + r'\b', text_norm) for hv in house_variants)
+                match_type = "exact" if house_found else "extended"
+                if match_mode == "exact" and match_type != "exact":
+                    continue
+                if not any(m['url'] == listing['url'] and m['address_id'] == addr['id'] for m in matches):
+                    matches.append({
+                        'address_id': addr['id'],
+                        'address_display': address_display,
+                        'url': listing['url'],
+                        'title': listing['text'][:120],
+                        'website': listing['website'],
+                        'website_name': listing['website_name'],
+                        'match_type': match_type
+                    })
+        return matches
+
+    random.seed(42)
+    streets = [f"{name}strasse" for name in (
+        "Haupt", "Bahnhof", "Schiller", "Goethe", "Linden", "Berg", "Garten", "Wald",
+        "Kirch", "Dorf", "Schul", "Ring", "Post", "Feld", "Muehl", "Park",
+    )] + ["Maximilianstraße", "Leopoldstr.", "Am Anger", "Sendlinger-Tor-Platz"]
+
+    addresses = [{
+        'id': f"a{i}",
+        'street': random.choice(streets),
+        'house_number': random.choice(["1", "3", "12", "15a", "20-24", "7 b"]),
+        'postal_code': f"80{random.randint(300, 999)}",
+        'city': "München",
+    } for i in range(1000)]
+
+    listings = []
+    for i in range(10000):
+        text = (f"Schöne 2-Zimmer Wohnung, {random.choice(streets)} {random.randint(1, 30)}, "
+                f"{random.choice(['80', '81'])}{random.randint(300, 999)} München, "
+                f"{random.randint(400, 2500)} EUR, {random.randint(20, 120)} m²")
+        listings.append({
+            'text': text,
+            'text_norm': AddressNormalizer.normalize(text),
+            'url': f"https://www.example.de/expose/{i}",
+            'website': 'bench',
+            'website_name': 'Benchmark',
+        })
+
+    for mode in ("exact", "extended"):
+        print(f"--- Modus: {mode} ({len(addresses)} Adressen x {len(listings)} Listings) ---")
+
+        start = time.perf_counter()
+        indexed = AddressMatcher(addresses, mode).match(listings)
+        t_indexed = time.perf_counter() - start
+        print(f"  Index-Matcher:  {t_indexed:8.3f} s  ({len(indexed)} Treffer)")
+
+        start = time.perf_counter()
+        legacy = legacy_match(listings, addresses, mode)
+        t_legacy = time.perf_counter() - start
+        print(f"  Alte Schleife:  {t_legacy:8.3f} s  ({len(legacy)} Treffer)")
+
+        # cluster_id kennt die alte Schleife nicht
+        without_cluster = [{k: v for k, v in m.items() if k != 'cluster_id'} for m in indexed]
+        print(f"  Identisch: {without_cluster == legacy}, Faktor: {t_legacy / max(t_indexed, 1e-9):.1f}x")
+
+        start = time.perf_counter()
+        parallel = AddressMatcher(addresses, mode).match_parallel(listings)
+        t_parallel = time.perf_counter() - start
+        print(f"  Prozess-Pool:   {t_parallel:8.3f} s  ({len(parallel)} Treffer, identisch: {parallel == indexed})")
+
+        strict = AddressMatcher(addresses, mode, house_after_street=True).match(listings)
+        print(f"  Hausnummer direkt nach Straße: {len(strict)} Treffer")
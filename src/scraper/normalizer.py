@@ -4,33 +4,63 @@ Hilfsfunktionen zur Normalisierung von Adressen
 """
 
 import re
-from typing import List, Set
+from functools import lru_cache
+from typing import Iterable, List, Set
+
+
+# Maximale Anzahl gecachter Rohtexte (LRU). Der Cache hält Text und Ergebnis
+# am Leben, auch nachdem die Listings verworfen sind: bei Kartentexten bis
+# MAX_TEXT_LENGTH (1000 Zeichen, mit '€' 2 Byte/Zeichen) sind das ca. 3 KB
+# pro Eintrag, also höchstens ca. 13 MB. Listings merken sich text_norm
+# selbst; der Cache hilft nur bei Wiederholungen (erneut gesehene Karten,
+# Straßennamen, Wörter der Duplikaterkennung), dafür reichen wenige Tausend.
+NORMALIZE_CACHE_SIZE = 4096
+
+# Vorkompilierte Muster (einmal pro Prozess)
+_STREET_ABBREV = re.compile(r'str\.?(?=\s|$)')
+_NON_WORD = re.compile(r'\W+')
+_HOUSE_RANGE = re.compile(r'(\d+)\s*[-/]\s*(\d+)')
+_HOUSE_NUMBER = re.compile(r'(\d+)\s*([a-z])?')
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize(text: str) -> str:
+    result = text.lower().strip()
+    # Umlaute ersetzen (reine ASCII-Texte überspringen)
+    if not result.isascii():
+        result = result.replace('ä', 'ae').replace('ö', 'oe').replace('ü', 'ue').replace('ß', 'ss')
+    # Strassen-Abkuerzungen (str. / str -> strasse)
+    result = _STREET_ABBREV.sub('strasse', result)
+    # Bindestriche, Sonderzeichen und Leerraum -> ein Leerzeichen
+    return _NON_WORD.sub(' ', result).strip()
 
 
 class AddressNormalizer:
     UMLAUT_MAP = {
-        'ae': 'ae', 'oe': 'oe', 'ue': 'ue', 'ss': 'ss', 
+        'ae': 'ae', 'oe': 'oe', 'ue': 'ue', 'ss': 'ss',
         'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'
     }
-    
+
     @staticmethod
     def normalize(text: str) -> str:
         if not text:
             return ""
-        result = text.lower().strip()
-        # Umlaute ersetzen
-        for uml, repl in AddressNormalizer.UMLAUT_MAP.items():
-            result = result.replace(uml, repl)
-        # Strassen-Abkuerzungen (str. -> strasse)
-        result = re.sub(r'str\.(\s|$)', r'strasse\1', result)
-        result = re.sub(r'str(\s|$)', r'strasse\1', result)
-        result = re.sub(r'strasse(\s|$)', r'strasse\1', result)
-        # Bindestriche und Sonderzeichen
-        result = result.replace('-', ' ')
-        result = re.sub(r'[^\w\s]', ' ', result)
-        result = re.sub(r'\s+', ' ', result).strip()
-        return result
-    
+        return _normalize(text)
+
+    @staticmethod
+    def normalize_many(texts: Iterable[str]) -> List[str]:
+        """Normalisiert viele Texte auf einmal (z.B. alle Karten einer Seite)"""
+        return [_normalize(t) if t else "" for t in texts]
+
+    @staticmethod
+    def cache_info():
+        """Trefferquote des LRU-Caches"""
+        return _normalize.cache_info()
+
+    @staticmethod
+    def clear_cache():
+        _normalize.cache_clear()
+
     @staticmethod
     def get_street_variants(street: str) -> List[str]:
         variants = []
@@ -39,12 +69,12 @@ class AddressNormalizer:
         if base.endswith('strasse'):
             variants.append(base[:-7].strip())
         return variants
-    
+
     @staticmethod
     def get_house_variants(house_number: str) -> Set[str]:
         variants = set()
         hn = house_number.strip().lower()
-        range_match = re.match(r'(\d+)\s*[-/]\s*(\d+)', hn)
+        range_match = _HOUSE_RANGE.match(hn)
         if range_match:
             start, end = int(range_match.group(1)), int(range_match.group(2))
             is_even = start % 2 == 0
@@ -52,7 +82,7 @@ class AddressNormalizer:
                 if (num % 2 == 0) == is_even:
                     variants.add(str(num))
         else:
-            match = re.match(r'(\d+)\s*([a-z])?', hn)
+            match = _HOUSE_NUMBER.match(hn)
             if match:
                 num = match.group(1)
                 suffix = match.group(2)
@@ -61,3 +91,55 @@ class AddressNormalizer:
                     variants.add(f"{num}{suffix}")
                     variants.add(f"{num} {suffix}")
         return variants if variants else {hn}
+
+
+# Standalone Benchmark
+if __name__ == "__main__":
+    import random
+    import time
+
+    def legacy_normalize(text: str) -> str:
+        """Bisherige Implementierung (Referenz für den Vergleich)"""
+        if not text:
+            return ""
+        result = text.lower().strip()
+        for uml, repl in AddressNormalizer.UMLAUT_MAP.items():
+            result = result.replace(uml, repl)
+        result = re.sub(r'str\.(\s|$)', r'strasse\1', result)
+        result = re.sub(r'str(\s|$)', r'strasse\1', result)
+        result = re.sub(r'strasse(\s|$)', r'strasse\1', result)
+        result = result.replace('-', ' ')
+        result = re.sub(r'[^\w\s]', ' ', result)
+        result = re.sub(r'\s+', ' ', result).strip()
+        return result
+
+    random.seed(7)
+    words = ["Schöne", "2-Zimmer", "Wohnung", "Maximilianstraße", "Leopoldstr.", "Hauptstr",
+             "München", "Größe:", "75,5", "m²", "Küche", "Balkon!", "(möbliert)", "ab", "sofort",
+             "1.200", "€", "Kaltmiete", "WG-Zimmer", "Süd-West", "Straße", "str", "80539", "12a",
+             "Nähe", "U-Bahn", "Fußweg", "—", "ÄÖÜ", "\t", "\n"]
+    corpus = [" ".join(random.choice(words) for _ in range(random.randint(10, 60)))
+              for _ in range(100_000)]
+
+    mismatches = sum(1 for t in corpus if AddressNormalizer.normalize(t) != legacy_normalize(t))
+    print(f"Korpus: {len(corpus)} Karten, Abweichungen zur alten Version: {mismatches}")
+
+    start = time.perf_counter()
+    for t in corpus:
+        legacy_normalize(t)
+    t_legacy = time.perf_counter() - start
+
+    AddressNormalizer.clear_cache()
+    start = time.perf_counter()
+    AddressNormalizer.normalize_many(corpus)
+    t_cold = time.perf_counter() - start
+
+    # Wiederholte Karten (z.B. erneut gesehene Seiten) kommen aus dem Cache
+    repeated = corpus[-NORMALIZE_CACHE_SIZE:] * 2
+    start = time.perf_counter()
+    AddressNormalizer.normalize_many(repeated)
+    t_warm = (time.perf_counter() - start) * len(corpus) / len(repeated)
+
+    for label, t in (("Alte Version", t_legacy), ("Neu (kalt)", t_cold), ("Neu (Cache)", t_warm)):
+        print(f"  {label:13s} {t:7.3f} s  {len(corpus) / t:12,.0f} Karten/s")
+    print(f"  Cache: {AddressNormalizer.cache_info()}")
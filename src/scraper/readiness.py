@@ -0,0 +1,94 @@
+"""
+WohnungsScraper - Page Readiness
+Wartet auf die Ergebnisliste (Selektor oder Listing-XHR) statt auf feste Pausen
+"""
+
+import asyncio
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+
+# Obergrenze, falls eine Website keine eigene angibt (ms)
+READY_TIMEOUT = 15000
+
+
+class Readiness:
+    """Woran eine Website erkennt, dass die Ergebnisse geladen sind
+
+    selector: Container bzw. Karte der Ergebnisliste. response: Regex auf
+    die URL der XHR/fetch-Antwort mit den Listings (SPA). Es gilt, was
+    zuerst eintritt; nach timeout ms wird mit dem aktuellen Stand
+    weitergemacht.
+    """
+
+    def __init__(self, selector: str, response: Optional[str] = None, timeout: int = READY_TIMEOUT):
+        self.selector = selector
+        self.response = re.compile(response) if response else None
+        self.timeout = timeout
+
+    def _is_listing_response(self, response) -> bool:
+        return (response.request.resource_type in ('xhr', 'fetch')
+                and response.ok and bool(self.response.search(response.url)))
+
+    def expect_response(self, page) -> Optional[asyncio.Future]:
+        """Vor goto() aufrufen, sonst kann die Antwort schon vorbei sein"""
+        if self.response is None:
+            return None
+        return asyncio.ensure_future(page.wait_for_response(self._is_listing_response, timeout=self.timeout))
+
+    async def wait(self, page, response_waiter: Optional[asyncio.Future] = None) -> bool:
+        """Wartet auf Selektor oder Listing-Antwort (Playwright); False bei Timeout"""
+        waiters = [asyncio.ensure_future(page.wait_for_selector(self.selector, state='attached',
+                                                                timeout=self.timeout))]
+        if response_waiter is not None:
+            waiters.append(response_waiter)
+        try:
+            for next_done in asyncio.as_completed(waiters):
+                try:
+                    await next_done
+                    return True
+                except Exception:
+                    continue
+            return False
+        finally:
+            self.discard(waiters)
+
+    @staticmethod
+    def discard(waiters: List[asyncio.Future]):
+        """Bricht offene Wartende ab und holt Fehler erledigter ab (sonst Warnung)"""
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.cancel()
+            elif not waiter.cancelled():
+                waiter.exception()
+
+    async def wait_nodriver(self, tab) -> bool:
+        """Wie wait(), für nodriver-Tabs (nur Selektor)"""
+        try:
+            return await tab.select(self.selector, timeout=self.timeout / 1000) is not None
+        except Exception:
+            return False
+
+
+class ReadinessStats:
+    """Zeit bis die Ergebnisse bereit sind, pro Domain (ms und Timeouts)"""
+
+    def __init__(self):
+        self._times: Dict[str, List[float]] = {}
+        self._timeouts: Dict[str, int] = {}
+
+    def add(self, url: str, ms: float, ready: bool):
+        domain = (urlsplit(url).hostname or '').lower()
+        self._times.setdefault(domain, []).append(ms)
+        if not ready:
+            self._timeouts[domain] = self._timeouts.get(domain, 0) + 1
+
+    def lines(self) -> List[str]:
+        out = []
+        for domain, times in self._times.items():
+            ordered = sorted(times)
+            median = ordered[len(ordered) // 2]
+            out.append(f"{domain}: {len(times)} Seiten, Ergebnisse bereit nach {median:.0f} ms (Median), "
+                       f"max. {ordered[-1]:.0f} ms, {self._timeouts.get(domain, 0)} Timeouts")
+        return out
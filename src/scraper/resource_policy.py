@@ -0,0 +1,90 @@
+"""
+WohnungsScraper - Resource Policy
+Blockiert Bilder, Fonts, Medien und Tracker per context.route
+"""
+
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+
+# Tracker/Werbung: immer blockiert, unabhängig von der Website
+TRACKER_DOMAINS = (
+    'google-analytics.com', 'googletagmanager.com', 'googlesyndication.com',
+    'doubleclick.net', 'googleadservices.com', 'adservice.google.com',
+    'facebook.net', 'facebook.com', 'connect.facebook.net',
+    'hotjar.com', 'criteo.com', 'criteo.net', 'adnxs.com', 'amazon-adsystem.com',
+    'taboola.com', 'outbrain.com', 'scorecardresearch.com', 'bing.com',
+    'tiktok.com', 'pinterest.com', 'yieldlove.com', 'adform.net', 'ioam.de',
+    'xiti.com', 'permutive.com', 'rubiconproject.com', 'pubmatic.com',
+)
+
+# Typische Größe blockierter Ressourcen (Schätzung für das Log, in Bytes).
+# Abgebrochene Anfragen werden nie gesendet, ihre echte Größe ist unbekannt.
+ESTIMATED_BYTES = {
+    'image': 40_000,
+    'media': 500_000,
+    'font': 30_000,
+    'stylesheet': 20_000,
+    'script': 60_000,
+    'xhr': 5_000,
+    'fetch': 5_000,
+    'document': 30_000,
+}
+DEFAULT_ESTIMATED_BYTES = 10_000
+
+
+def _matches(host: str, domains: Iterable[str]) -> bool:
+    return any(host == d or host.endswith('.' + d) for d in domains)
+
+
+class ResourcePolicy:
+    """Allowlist der Ressourcen, die eine Website für die Ergebnisliste braucht
+
+    types: erlaubte Playwright-Ressourcentypen. domains: erlaubte Domains
+    (inkl. Subdomains), None = alle außer TRACKER_DOMAINS. Die Navigation
+    des Tabs selbst wird nie blockiert.
+    """
+
+    def __init__(self, types: Iterable[str] = ('document', 'script', 'xhr', 'fetch'),
+                 domains: Optional[Iterable[str]] = None):
+        self.types = frozenset(types)
+        self.domains = tuple(domains) if domains is not None else None
+
+    def allows(self, resource_type: str, url: str, is_navigation: bool = False) -> bool:
+        if is_navigation:
+            return True
+        if resource_type not in self.types:
+            return False
+        host = (urlsplit(url).hostname or '').lower()
+        if _matches(host, TRACKER_DOMAINS):
+            return False
+        return self.domains is None or _matches(host, self.domains)
+
+
+class ResourceStats:
+    """Blockierte Anfragen und geschätzte gesparte Bytes (gesamt und pro Tab)
+
+    Die Bytes sind keine Messung, sondern ESTIMATED_BYTES pro Ressourcentyp.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.estimated_bytes = 0
+        self._per_page: Dict[object, list] = {}
+
+    def add(self, page, resource_type: str):
+        size = ESTIMATED_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+        self.requests += 1
+        self.estimated_bytes += size
+        counts = self._per_page.setdefault(page, [0, 0])
+        counts[0] += 1
+        counts[1] += size
+
+    def take(self, page):
+        """Zähler eines Tabs seit dem letzten Aufruf: (Anfragen, geschätzte Bytes)"""
+        counts = self._per_page.pop(page, None)
+        return tuple(counts) if counts else (0, 0)
+
+    @staticmethod
+    def describe(requests: int, estimated_size: int) -> str:
+        return f"{requests} Anfragen blockiert (geschätzt ca. {estimated_size / 1024:,.0f} KB gespart)"
@@ -0,0 +1,93 @@
+"""
+WohnungsScraper - Response Capture
+Sammelt die Listing-JSONs, die eine SPA per XHR/fetch nachlädt (page.on('response'))
+"""
+
+import asyncio
+import re
+from typing import List, Set
+
+from .structured import StructuredExtractor, ListingRecord
+
+
+# So lange wird nach einem Scroll-Schritt auf neue Listing-Antworten gewartet (s)
+CAPTURE_SETTLE = 1.5
+
+
+class ResponseCapture:
+    """Mitschnitt der Listing-Antworten eines Tabs
+
+    Vor goto() starten: jede erfolgreiche XHR/fetch-Antwort, deren URL auf
+    pattern passt, wird als JSON gelesen und mit dem StructuredExtractor in
+    ListingRecords zerlegt. records zählt nur neue Inserate; solange es
+    wächst, lohnt sich weiteres Scrollen (siehe wait_for_growth).
+    """
+
+    def __init__(self, page, pattern: str, extractor: StructuredExtractor):
+        self.page = page
+        self.pattern = re.compile(pattern)
+        self.extractor = extractor
+        self.responses = 0
+        self._records: List[ListingRecord] = []
+        self._keys: Set[str] = set()
+        self._pending: Set[asyncio.Future] = set()
+        self._grown = asyncio.Event()
+
+    def start(self):
+        self.page.on('response', self._on_response)
+
+    def stop(self):
+        self.page.remove_listener('response', self._on_response)
+        for task in self._pending:
+            task.cancel()
+
+    @property
+    def count(self) -> int:
+        """Alle bisher empfangenen Inserate (auch die schon mit take() abgeholten)"""
+        return len(self._keys)
+
+    def _on_response(self, response):
+        try:
+            if (response.request.resource_type not in ('xhr', 'fetch') or not response.ok
+                    or not self.pattern.search(response.url)):
+                return
+        except Exception:
+            return
+        task = asyncio.ensure_future(self._read(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _read(self, response):
+        try:
+            data = await response.json()
+        except Exception:
+            return  # kein JSON (Tracking o. ä.) oder Tab schon zu
+        new = 0
+        for record in self.extractor.from_states([data]):
+            key = record.listing_id or record.url
+            if key not in self._keys:
+                self._keys.add(key)
+                self._records.append(record)
+                new += 1
+        if new:
+            self.responses += 1
+            self._grown.set()
+
+    async def wait_for_growth(self, timeout: float = CAPTURE_SETTLE) -> bool:
+        """True, wenn innerhalb von timeout neue Inserate angekommen sind"""
+        before = self.count
+        self._grown.clear()
+        if self._pending:
+            # Schon empfangene Antworten erst fertig lesen
+            await asyncio.wait(set(self._pending), timeout=timeout)
+        if self.count == before:
+            try:
+                await asyncio.wait_for(self._grown.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.count > before
+
+    def take(self) -> List[ListingRecord]:
+        """Bisher gesammelte Inserate (danach leer, Duplikatschutz bleibt)"""
+        records, self._records = self._records, []
+        return records
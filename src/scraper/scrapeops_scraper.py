@@ -6,24 +6,67 @@ Unterstützt DataDome (Immowelt) und andere Bot-Schutz-Systeme
 
 import asyncio
 import os
-import re
-from typing import List, Dict, Callable
-from urllib.parse import urlencode
+import time
+from typing import List, Dict, Callable, Optional
 
 import requests
-from bs4 import BeautifulSoup
+
+from .listing import Listing, Site
+from .listing_store import ListingStore
+from .html_parser import HtmlParser
+from .structured import StructuredExtractor, EXPOSE_URLS
+
+# Optional: curl_cffi AsyncSession (sonst requests.Session im Thread-Pool)
+try:
+    from curl_cffi.requests import AsyncSession
+    ASYNC_SESSION_AVAILABLE = True
+except ImportError:
+    ASYNC_SESSION_AVAILABLE = False
 
 SCRAPEOPS_AVAILABLE = True
 
+# Gleichzeitige Proxy-Anfragen (über alle Websites), Wiederholungen, Timeout
+SCRAPEOPS_CONCURRENCY = 3
+SCRAPEOPS_RETRIES = 2
+SCRAPEOPS_BACKOFF = 2.0
+SCRAPEOPS_TIMEOUT = 120
+# Geschätzte Credits pro erfolgreicher Anfrage (laut ScrapeOps-Preisliste, anpassbar);
+# die Proxy-Antwort enthält keine Kosten, der tatsächliche Verbrauch steht im Dashboard
+SCRAPEOPS_ESTIMATED_CREDITS = {
+    'base': 1,
+    'render_js': 10,
+    'bypass': 25,
+}
+
 
 class ScrapeOpsScraper:
-    """Scraper mit ScrapeOps Anti-Bot-Bypass für blockierte Websites"""
+    """Scraper mit ScrapeOps Anti-Bot-Bypass für blockierte Websites
+    
+    Alle Anfragen laufen asynchron über eine gemeinsame Session; höchstens
+    concurrency Anfragen sind gleichzeitig beim Proxy. 5xx-Antworten und
+    Timeouts werden mit exponentiellem Backoff wiederholt. Latenz und
+    geschätzte Credits (SCRAPEOPS_ESTIMATED_CREDITS) werden pro Anfrage
+    mitgezählt.
+    """
     
     BASE_URL = "https://proxy.scrapeops.io/v1/"
     
-    def __init__(self, api_key: str = None, log_callback: Callable = None):
+    def __init__(self, api_key: str = None, log_callback: Callable = None,
+                 listings_callback: Callable = None, listing_store: ListingStore = None,
+                 concurrency: int = SCRAPEOPS_CONCURRENCY, retries: int = SCRAPEOPS_RETRIES,
+                 timeout: float = SCRAPEOPS_TIMEOUT):
+        self.listings_callback = listings_callback
+        self.listing_store = listing_store if listing_store is not None else ListingStore()
         self.api_key = api_key or os.environ.get('SCRAPEOPS_API_KEY')
         self.log = log_callback or print
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.timeout = timeout
+        self._session = None
+        self._limit = None
+        self.stats = {'requests': 0, 'failures': 0, 'retries': 0, 'estimated_credits': 0, 'seconds': 0.0}
+        self.html_parser = HtmlParser()
+        self.structured = {site: StructuredExtractor(url) for site, url in EXPOSE_URLS.items()}
         
         if not self.api_key:
             self.log("  ! ScrapeOps API-Key nicht konfiguriert")
@@ -36,9 +79,31 @@ class ScrapeOpsScraper:
         """Prüft ob ScrapeOps nutzbar ist"""
         return bool(self.api_key)
     
-    def _make_request(self, url: str, bypass: str = None, render_js: bool = True, 
-                      country: str = "de") -> str:
-        """Macht eine Anfrage über ScrapeOps Proxy"""
+    @staticmethod
+    def _estimated_credits(render_js: bool, bypass: str = None) -> int:
+        if bypass:
+            return SCRAPEOPS_ESTIMATED_CREDITS['bypass']
+        return SCRAPEOPS_ESTIMATED_CREDITS['render_js' if render_js else 'base']
+    
+    async def _get(self, params: Dict):
+        """Eine Anfrage an den Proxy: (Status, Text)"""
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.concurrency)
+        async with self._limit:
+            if ASYNC_SESSION_AVAILABLE:
+                if self._session is None:
+                    self._session = AsyncSession(max_clients=self.concurrency)
+                response = await self._session.get(self.BASE_URL, params=params, timeout=self.timeout)
+            else:
+                if self._session is None:
+                    self._session = requests.Session()
+                response = await asyncio.to_thread(self._session.get, self.BASE_URL,
+                                                   params=params, timeout=self.timeout)
+        return response.status_code, response.text
+    
+    async def _make_request(self, url: str, bypass: str = None, render_js: bool = True, 
+                            country: str = "de") -> str:
+        """Macht eine Anfrage über ScrapeOps Proxy (mit Wiederholung bei 5xx/Timeout)"""
         params = {
             'api_key': self.api_key,
             'url': url,
@@ -49,175 +114,194 @@ class ScrapeOpsScraper:
         if bypass:
             params['bypass'] = bypass
         
-        try:
-            response = requests.get(
-                self.BASE_URL,
-                params=params,
-                timeout=120
-            )
-            
-            if response.status_code == 200:
-                return response.text
+        for attempt in range(self.retries + 1):
+            started = time.perf_counter()
+            status = None
+            try:
+                status, text = await self._get(params)
+            except Exception as e:
+                error = f"Request-Fehler: {str(e)[:40]}"
             else:
-                self.log(f"      ! HTTP {response.status_code}")
+                error = f"HTTP {status}"
+            latency = time.perf_counter() - started
+            self.stats['requests'] += 1
+            self.stats['seconds'] += latency
+            
+            if status == 200:
+                credits = self._estimated_credits(render_js, bypass)
+                self.stats['estimated_credits'] += credits
+                self.log(f"      {latency:.1f} s, ca. {credits} Credits (geschätzt)")
+                return text
+            
+            self.stats['failures'] += 1
+            # 4xx (z.B. falscher Key, kein Guthaben) nicht wiederholen
+            if status is not None and status < 500:
+                self.log(f"      ! {error}")
                 return ""
-        except Exception as e:
-            self.log(f"      ! Request-Fehler: {str(e)[:40]}")
-            return ""
+            if attempt < self.retries:
+                delay = SCRAPEOPS_BACKOFF * 2 ** attempt
+                self.stats['retries'] += 1
+                self.log(f"      ! {error} - neuer Versuch in {delay:.0f} s")
+                await asyncio.sleep(delay)
+            else:
+                self.log(f"      ! {error}")
+        return ""
+    
+    async def _crawl(self, url_for: Callable, max_pages: int, base_url: str, website: str,
+                     blocked: Callable, listings: List[Listing], bypass: str = None):
+        """Seite 1 allein, danach Seiten 2..N in Fenstern zu concurrency Anfragen
+        
+        Ergebnisse werden in Seitenreihenfolge ausgewertet; die erste leere
+        oder blockierte Seite beendet die Suche nach dem laufenden Fenster.
+        """
+        effective_max = max_pages if max_pages > 0 else 9999  # 0 = unbegrenzt
+        display_max = max_pages if max_pages > 0 else "alle"
+        
+        async def fetch(page_num: int) -> str:
+            self.log(f"    Seite {page_num}/{display_max}...")
+            return await self._make_request(url_for(page_num), bypass=bypass, render_js=True)
+        
+        def evaluate(page_num: int, html: str) -> bool:
+            if not html or len(html) < 5000:
+                self.log(f"      ! Seite {page_num}: keine oder kurze Antwort")
+                return False
+            reason = blocked(html)
+            if reason:
+                self.log(f"      ! Seite {page_num}: {reason}")
+                return False
+            new_count = self._parse_listings(html, listings, base_url, website)
+            self.log(f"      Seite {page_num}: {new_count} neue Listings (Total: {len(listings)})")
+            return new_count > 0
+        
+        # Seite 1 bestätigt, dass die Kategorie existiert
+        if not evaluate(1, await fetch(1)):
+            return
+        
+        page_num = 2
+        while page_num <= effective_max:
+            window = list(range(page_num, min(page_num + self.concurrency, effective_max + 1)))
+            pages = await asyncio.gather(*(fetch(n) for n in window))
+            for n, html in zip(window, pages):
+                if not evaluate(n, html):
+                    return
+            page_num += len(window)
     
-    async def scrape_immowelt(self, city: str, max_pages: int = 5) -> List[Dict]:
+    async def scrape_immowelt(self, city: str, max_pages: int = 5) -> List[Listing]:
         """Scrapt Immowelt mit ScrapeOps DataDome-Bypass"""
         if not self.is_available():
             return []
         
         listings = []
-        seen_urls = set()
         city_slug = self._normalize_city(city)
         base_url = "https://www.immowelt.de"
         
         self.log(f"  ScrapeOps: Immowelt für {city} (DataDome-Bypass)")
         
-        page_num = 0
-        effective_max = max_pages if max_pages > 0 else 9999  # 0 = unbegrenzt
-        
-        while page_num < effective_max:
-            page_num += 1
-            display_max = max_pages if max_pages > 0 else "alle"
-            self.log(f"    Seite {page_num}/{display_max}...")
-            
+        def url_for(page_num: int) -> str:
             # Immowelt URLs
             if page_num == 1:
-                url = f"{base_url}/suche/{city_slug}/wohnungen/mieten"
-            else:
-                # Die classified-search URL ist normalerweise durch DataDome blockiert
-                url = f"{base_url}/classified-search?distributionTypes=Rent&estateTypes=Apartment&locations=AD08DE6345&page={page_num}"
-            
-            # Anfrage mit DataDome-Bypass
-            html = self._make_request(url, bypass="datadome", render_js=True)
-            
-            if not html or len(html) < 5000:
-                self.log(f"      ! Keine oder kurze Antwort")
-                if page_num > 1:
-                    break
-                continue
-            
+                return f"{base_url}/suche/{city_slug}/wohnungen/mieten"
+            # Die classified-search URL ist normalerweise durch DataDome blockiert
+            return f"{base_url}/classified-search?distributionTypes=Rent&estateTypes=Apartment&locations=AD08DE6345&page={page_num}"
+        
+        def blocked(html: str) -> Optional[str]:
             # Prüfe auf DataDome-Block
-            if 'datadome' in html.lower() and 'captcha' in html.lower():
-                self.log(f"      ! DataDome-Block trotz Bypass")
-                break
-            
-            # Parse Listings
-            new_count = self._parse_listings(html, listings, seen_urls, base_url, 'immowelt')
-            self.log(f"      {new_count} neue Listings (Total: {len(listings)})")
-            
-            if new_count == 0 and page_num > 1:
-                break
-            
-            # Kurze Pause zwischen Anfragen
-            await asyncio.sleep(1)
+            lower = html.lower()
+            if 'datadome' in lower and 'captcha' in lower:
+                return "DataDome-Block trotz Bypass"
+            return None
         
+        # Anfragen mit DataDome-Bypass
+        await self._crawl(url_for, max_pages, base_url, 'immowelt', blocked, listings, bypass="datadome")
         return listings
     
-    async def scrape_immoscout(self, city: str, max_pages: int = 5) -> List[Dict]:
+    async def scrape_immoscout(self, city: str, max_pages: int = 5) -> List[Listing]:
         """Scrapt ImmoScout24 mit ScrapeOps (Imperva-Umgehung)"""
         if not self.is_available():
             return []
         
         listings = []
-        seen_urls = set()
         city_slug = self._normalize_city(city)
         base_url = "https://www.immobilienscout24.de"
         bundesland = self._get_bundesland(city_slug)
         
         self.log(f"  ScrapeOps: ImmoScout24 für {city}")
         
-        page_num = 0
-        effective_max = max_pages if max_pages > 0 else 9999  # 0 = unbegrenzt
-        
-        while page_num < effective_max:
-            page_num += 1
-            display_max = max_pages if max_pages > 0 else "alle"
-            self.log(f"    Seite {page_num}/{display_max}...")
-            
+        def url_for(page_num: int) -> str:
             # ImmoScout URLs
             if page_num == 1:
-                url = f"{base_url}/Suche/de/{bundesland}/{city_slug}/wohnung-mieten"
-            else:
-                url = f"{base_url}/Suche/de/{bundesland}/{city_slug}/wohnung-mieten?pagenumber={page_num}"
-            
-            # Anfrage (kein spezieller Bypass, ScrapeOps versucht automatisch)
-            html = self._make_request(url, render_js=True)
-            
-            if not html or len(html) < 5000:
-                self.log(f"      ! Keine oder kurze Antwort")
-                if page_num > 1:
-                    break
-                continue
-            
+                return f"{base_url}/Suche/de/{bundesland}/{city_slug}/wohnung-mieten"
+            return f"{base_url}/Suche/de/{bundesland}/{city_slug}/wohnung-mieten?pagenumber={page_num}"
+        
+        def blocked(html: str) -> Optional[str]:
             # Prüfe auf Bot-Erkennung
             if 'Ich bin kein Roboter' in html or 'captcha' in html.lower():
-                self.log(f"      ! Bot-Erkennung aktiv")
-                break
-            
-            # Parse Listings
-            new_count = self._parse_listings(html, listings, seen_urls, base_url, 'immoscout24')
-            self.log(f"      {new_count} neue Listings (Total: {len(listings)})")
-            
-            if new_count == 0 and page_num > 1:
-                break
-            
-            # Kurze Pause zwischen Anfragen
-            await asyncio.sleep(1)
+                return "Bot-Erkennung aktiv"
+            return None
         
+        # Kein spezieller Bypass, ScrapeOps versucht automatisch
+        await self._crawl(url_for, max_pages, base_url, 'immoscout24', blocked, listings)
         return listings
     
-    def _parse_listings(self, html: str, listings: List[Dict], seen_urls: set, 
+    def log_stats(self):
+        s = self.stats
+        if s['requests']:
+            self.log(f"#   ScrapeOps: {s['requests']} Anfragen ({s['retries']} Wiederholungen, "
+                     f"{s['failures']} Fehler), {s['seconds'] / s['requests']:.1f} s/Anfrage, "
+                     f"ca. {s['estimated_credits']} Credits (geschätzt)")
+    
+    async def close(self):
+        """Schließt die Session"""
+        if self._session is not None:
+            try:
+                if ASYNC_SESSION_AVAILABLE:
+                    await self._session.close()
+                else:
+                    self._session.close()
+            except:
+                pass
+            self._session = None
+    
+    def _parse_listings(self, html: str, listings: List[Listing], 
                        base_url: str, website: str) -> int:
-        """Parst HTML und extrahiert Listings"""
-        soup = BeautifulSoup(html, 'html.parser')
+        """Parst HTML und extrahiert Listings (eingebettetes JSON, sonst DOM-Text)"""
         new_count = 0
         
-        # Finde alle Expose-Links
-        for a in soup.find_all('a', href=True):
-            href = a.get('href', '')
-            if '/expose/' not in href:
-                continue
+        extractor = self.structured.get(website)
+        records = extractor.extract(html) if extractor else []
+        for record in records:
+            if record.url.startswith('/'):
+                record.url = base_url + record.url
+            listing = record.to_listing(Site.from_key(website))
+            if self.listing_store.add(listing):
+                listings.append(listing)
+                new_count += 1
+        
+        # DOM-Text nur ohne JSON: eine Karte pro Expose (Text einmal berechnet)
+        cards = self.html_parser.expose_cards(html) if not records else []
+        for card in cards:
+            href = card.href
             
             # URL normalisieren
             if href.startswith('http'):
-                url_full = href.split('?')[0]
+                url_full = href
             elif href.startswith('/'):
-                url_full = base_url + href.split('?')[0]
+                url_full = base_url + href
             else:
                 continue
             
-            if url_full in seen_urls:
+            if self.listing_store.seen(website, url_full):
                 continue
-            seen_urls.add(url_full)
             
-            # Text extrahieren
-            text = ""
-            container = a
-            for _ in range(10):
-                container = container.find_parent()
-                if not container:
-                    break
-                text = container.get_text(separator=' ', strip=True)
-                if 100 < len(text) < 3000:
-                    break
-            
-            if not text or len(text) < 50:
-                text = a.get_text(separator=' ', strip=True)
-            
-            if text and len(text) > 20:
-                listings.append({
-                    'text': text[:500],
-                    'text_norm': self._normalize_text(text[:500]),
-                    'url': url_full,
-                    'website': website,
-                    'website_name': 'Immowelt.de' if website == 'immowelt' else 'ImmobilienScout24.de'
-                })
-                new_count += 1
+            text = card.text
+            if len(text) > 20:
+                listing = Listing(text[:500], url_full, Site.from_key(website))
+                if self.listing_store.add(listing):
+                    listings.append(listing)
+                    new_count += 1
+        
+        if new_count and self.listings_callback:
+            self.listings_callback(listings[-new_count:])
         
         return new_count
     
@@ -226,16 +310,6 @@ class ScrapeOpsScraper:
         """Normalisiert Stadtnamen"""
         return city.lower().replace('ü', 'ue').replace('ä', 'ae').replace('ö', 'oe').replace('ß', 'ss').replace(' ', '-')
     
-    @staticmethod
-    def _normalize_text(text: str) -> str:
-        """Normalisiert Text für Adressabgleich"""
-        text = text.lower()
-        text = text.replace('ü', 'ue').replace('ä', 'ae').replace('ö', 'oe').replace('ß', 'ss')
-        text = text.replace('str.', 'strasse').replace('straße', 'strasse')
-        text = re.sub(r'[^a-z0-9\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
-    
     @staticmethod
     def _get_bundesland(city_slug: str) -> str:
         """Gibt das Bundesland für eine Stadt zurück"""
@@ -250,7 +324,8 @@ class ScrapeOpsScraper:
         return bundesland_map.get(city_slug, "bayern")
 
 
-# Standalone Test
+# Standalone Test (aus dem Projektordner)
+# python -m src.scraper.scrapeops_scraper DEIN_API_KEY
 if __name__ == "__main__":
     import sys
     
@@ -297,5 +372,8 @@ if __name__ == "__main__":
                 print("\nBeispiele:")
                 for l in immoscout_listings[:3]:
                     print(f"  - {l['url']}")
+            
+            scraper.log_stats()
+            await scraper.close()
     
     asyncio.run(test())
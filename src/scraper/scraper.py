@@ -5,10 +5,18 @@ Optional: Scrapfly oder ScrapeOps für Anti-Bot-Bypass
 """
 
 import os
-import re
-from typing import List, Dict, Callable, Optional
+import asyncio
+from typing import List, Dict, Callable, Tuple
 
-from .base import BaseScraper, AddressNormalizer
+from .base import BaseScraper, DomainScheduler
+from .matcher import AddressMatcher, PARALLEL_MATCH_THRESHOLD
+from .listing import Listing
+from .listing_store import ListingStore
+from .dedup import DuplicateDetector
+from .browser_pool import BrowserPool
+from .browser_service import BrowserService
+from .consent import ConsentResolver
+from .http_fetcher import HttpFetcher, CURL_CFFI_AVAILABLE
 from .wg_gesucht import WGGesuchtScraper
 from .immoscout import ImmoScoutScraper
 from .immowelt import ImmoweltScraper
@@ -36,21 +44,69 @@ class BatchScraper(BaseScraper):
                  match_mode: str = "exact", stop_flag: Callable = None,
                  progress_callback: Callable = None, 
                  scrapfly_api_key: str = None,
-                 scrapeops_api_key: str = None):
-        super().__init__(log_callback, max_pages, match_mode, stop_flag, progress_callback)
+                 scrapeops_api_key: str = None,
+                 listings_callback: Callable = None,
+                 parallel_match_threshold: int = PARALLEL_MATCH_THRESHOLD,
+                 domain_rates: Dict = None,
+                 browser_service: BrowserService = None,
+                 consent: ConsentResolver = None,
+                 politeness_delay: Tuple[float, float] = None):
+        super().__init__(log_callback, max_pages, match_mode, stop_flag, progress_callback, listings_callback)
+        
+        # Ein Scheduler für alle Websites, startet mit den zuletzt gelernten Raten
+        self.scheduler = DomainScheduler(learned=domain_rates)
+        
+        # Gemeinsamer Store für alle Websites (einzige Quelle für all_listings),
+        # gruppiert dieselbe Wohnung auf mehreren Portalen zu einem Cluster
+        self.listing_store = ListingStore(DuplicateDetector())
+        
+        # Ab Listings x Adressen wird im Prozess-Pool abgeglichen (0 = aus)
+        self.parallel_match_threshold = parallel_match_threshold
         
         # Initialisiere einzelne Scraper
-        self.wg_gesucht = WGGesuchtScraper(log_callback, max_pages, match_mode, stop_flag, progress_callback)
-        self.immoscout = ImmoScoutScraper(log_callback, max_pages, match_mode, stop_flag, progress_callback)
-        self.immowelt = ImmoweltScraper(log_callback, max_pages, match_mode, stop_flag, progress_callback)
-        self.kleinanzeigen = KleinanzeigenScraper(log_callback, max_pages, match_mode, stop_flag, progress_callback)
+        scraper_args = (log_callback, max_pages, match_mode, stop_flag, progress_callback,
+                        listings_callback, self.listing_store)
+        self.wg_gesucht = WGGesuchtScraper(*scraper_args)
+        self.immoscout = ImmoScoutScraper(*scraper_args)
+        self.immowelt = ImmoweltScraper(*scraper_args)
+        self.kleinanzeigen = KleinanzeigenScraper(*scraper_args)
+        
+        # Cookie-Banner: ein Resolver für alle Websites (gelernte Selektoren pro Domain)
+        self.consent = consent or ConsentResolver(log_callback=log_callback)
+        self.consent.reset_stats()
+        
+        # Ein Playwright-Treiber und wenige Chromium-Instanzen für alle Websites;
+        # mit BrowserService bleiben Pool und vorgewärmte Kontexte über die Suche hinaus offen
+        self.browser_service = browser_service
+        if browser_service:
+            self.browser_pool = browser_service.pool
+        else:
+            self.browser_pool = BrowserPool(log_callback, executable_path=self._find_browser())
+        for s in (self, self.wg_gesucht, self.immoscout, self.immowelt, self.kleinanzeigen):
+            s.browser_pool = self.browser_pool
+            s.browser_service = browser_service
+            s.consent = self.consent
+            s.readiness_stats = self.readiness_stats
+            s.browser_extract.stats = self.browser_extract.stats
+            if politeness_delay is not None:
+                # Überschreibt die Pausen aller Websites, (0, 0) = keine
+                s.politeness_delay = politeness_delay
+            s.scheduler = self.scheduler
+        
+        # Serverseitig gerenderte Websites zuerst per HTTP (Browser nur als Fallback)
+        self.http_fetcher = HttpFetcher(log_callback) if CURL_CFFI_AVAILABLE else None
+        self.wg_gesucht.http_fetcher = self.http_fetcher
+        self.kleinanzeigen.http_fetcher = self.http_fetcher
+        self.log(f"# HTML-Parser: {self.html_parser.backend}")
         
         # Optional: Scrapfly für blockierte Websites
         self.scrapfly = None
         self.scrapfly_api_key = scrapfly_api_key or os.environ.get('SCRAPFLY_API_KEY')
         
         if SCRAPFLY_AVAILABLE and self.scrapfly_api_key:
-            self.scrapfly = ScrapflyScraper(api_key=self.scrapfly_api_key, log_callback=log_callback)
+            self.scrapfly = ScrapflyScraper(api_key=self.scrapfly_api_key, log_callback=log_callback,
+                                            listings_callback=listings_callback,
+                                            listing_store=self.listing_store)
             if self.scrapfly.is_available():
                 self.log("# Scrapfly Anti-Bot-Bypass aktiviert")
         
@@ -59,10 +115,39 @@ class BatchScraper(BaseScraper):
         self.scrapeops_api_key = scrapeops_api_key or os.environ.get('SCRAPEOPS_API_KEY')
         
         if SCRAPEOPS_AVAILABLE and self.scrapeops_api_key:
-            self.scrapeops = ScrapeOpsScraper(api_key=self.scrapeops_api_key, log_callback=log_callback)
+            self.scrapeops = ScrapeOpsScraper(api_key=self.scrapeops_api_key, log_callback=log_callback,
+                                              listings_callback=listings_callback,
+                                              listing_store=self.listing_store)
             if self.scrapeops.is_available():
                 self.log("# ScrapeOps Anti-Bot-Bypass aktiviert")
     
+    def site_scrapers(self, site: str, use_proxy_service: bool = False) -> List:
+        """Alle Scraper, die eine Website bedienen (mit Proxy-Services falls genutzt)"""
+        scrapers = {
+            'wgGesucht': [self.wg_gesucht],
+            'immowelt': [self.immowelt],
+            'kleinanzeigen': [self.kleinanzeigen],
+            'immoscout': [self.immoscout],
+        }.get(site, [])
+        if use_proxy_service:
+            scrapers = scrapers + [self.scrapeops, self.scrapfly]
+        return [s for s in scrapers if s is not None]
+    
+    def bind_site(self, site: str, log_callback: Callable = None, progress_callback: Callable = None,
+                  use_proxy_service: bool = False):
+        """Leitet Logs und Fortschritt einer Website an eigene Callbacks (paralleles Sammeln)"""
+        for s in self.site_scrapers(site, use_proxy_service):
+            if log_callback:
+                s.log = log_callback
+            if progress_callback and hasattr(s, 'progress_callback'):
+                s.progress_callback = progress_callback
+    
+    def limit_open_pages(self, max_pages: int):
+        """Begrenzt die gleichzeitig offenen Tabs über alle Website-Scraper"""
+        limit = asyncio.Semaphore(max_pages) if max_pages > 0 else None
+        for s in (self, self.wg_gesucht, self.immoscout, self.immowelt, self.kleinanzeigen):
+            s.page_limit = limit
+    
     def has_scrapfly(self) -> bool:
         """Prüft ob Scrapfly verfügbar ist"""
         return self.scrapfly is not None and self.scrapfly.is_available()
@@ -75,11 +160,11 @@ class BatchScraper(BaseScraper):
         """Prüft ob irgendein Proxy-Service verfügbar ist"""
         return self.has_scrapfly() or self.has_scrapeops()
     
-    async def collect_wg_gesucht(self, city: str) -> List[Dict]:
+    async def collect_wg_gesucht(self, city: str) -> List[Listing]:
         """WG-Gesucht Scraping"""
         return await self.wg_gesucht.collect(city)
     
-    async def collect_immoscout(self, city: str, use_proxy_service: bool = False) -> List[Dict]:
+    async def collect_immoscout(self, city: str, use_proxy_service: bool = False) -> List[Listing]:
         """ImmoScout24 Scraping - mit optionalem Proxy-Service Fallback"""
         if use_proxy_service:
             if self.has_scrapeops():
@@ -90,7 +175,7 @@ class BatchScraper(BaseScraper):
                 return await self.scrapfly.scrape_immoscout(city, self.max_pages)
         return await self.immoscout.collect(city)
     
-    async def collect_immowelt(self, city: str, use_proxy_service: bool = False) -> List[Dict]:
+    async def collect_immowelt(self, city: str, use_proxy_service: bool = False) -> List[Listing]:
         """Immowelt Scraping - mit optionalem Proxy-Service Fallback"""
         if use_proxy_service:
             if self.has_scrapeops():
@@ -101,86 +186,52 @@ class BatchScraper(BaseScraper):
                 return await self.scrapfly.scrape_immowelt(city, self.max_pages)
         return await self.immowelt.collect(city)
     
-    async def collect_kleinanzeigen(self, city: str) -> List[Dict]:
+    async def collect_kleinanzeigen(self, city: str) -> List[Listing]:
         """Kleinanzeigen Scraping"""
         return await self.kleinanzeigen.collect(city)
     
-    def match_listings(self, listings: List[Dict], addresses: List[Dict]) -> List[Dict]:
+    def match_listings(self, listings: List[Listing], addresses: List[Dict]) -> List[Dict]:
         """Vergleicht Listings mit Adressen
         
         Exakte Suche: PLZ + Straße + Hausnummer müssen alle übereinstimmen
         Erweiterte Suche: PLZ + Straße müssen übereinstimmen (ohne Hausnummer)
         """
-        matches = []
+        matcher = AddressMatcher(addresses, self.match_mode)
         
-        for addr in addresses:
-            street_variants = AddressNormalizer.get_street_variants(addr['street'])
-            house_variants = AddressNormalizer.get_house_variants(addr['house_number'])
-            plz = addr.get('postal_code', '')
-            
-            address_display = f"{addr['street']} {addr['house_number']}, {plz} {addr['city']}"
-            
-            for listing in listings:
-                text_norm = listing['text_norm']
-                text_raw = listing['text']
-                
-                # 1. PLZ suchen (PFLICHT für beide Modi)
-                plz_found = plz and plz in text_raw
-                if not plz_found:
-                    continue
-                
-                # 2. Straße suchen (PFLICHT für beide Modi)
-                street_found = False
-                for sv in street_variants:
-                    if sv in text_norm:
-                        street_found = True
-                        break
-                
-                if not street_found:
-                    continue
-                
-                # 3. Hausnummer suchen (nur für exakte Suche PFLICHT)
-                house_found = False
-                for hv in house_variants:
-                    pattern = r'\b' + re.escape(hv) + r'\b'
-                    if re.search(pattern, text_norm):
-                        house_found = True
-                        break
-                
-                # Match-Typ bestimmen
-                if plz_found and street_found and house_found:
-                    match_type = "exact"
-                elif plz_found and street_found:
-                    match_type = "extended"
-                else:
-                    continue  # Sollte nicht erreicht werden
-                
-                # Filter nach Match-Mode
-                # Exakte Suche: Nur wenn PLZ + Straße + Hausnummer
-                if self.match_mode == "exact" and match_type != "exact":
-                    continue
-                
-                # Erweiterte Suche: PLZ + Straße reicht (mit oder ohne Hausnummer)
-                # (match_type "extended" oder "exact" sind beide OK)
-                
-                # Duplikate vermeiden
-                if not any(m['url'] == listing['url'] and m['address_id'] == addr['id'] for m in matches):
-                    matches.append({
-                        'address_id': addr['id'],
-                        'address_display': address_display,
-                        'url': listing['url'],
-                        'title': listing['text'][:120],
-                        'website': listing['website'],
-                        'website_name': listing['website_name'],
-                        'match_type': match_type
-                    })
+        work = len(listings) * len(addresses)
+        if self.parallel_match_threshold and work >= self.parallel_match_threshold:
+            self.log(f"# Paralleler Abgleich ({os.cpu_count() or 1} Prozesse)")
+            try:
+                return matcher.match_parallel(listings)
+            except Exception as e:
+                self.log(f"  ! Paralleler Abgleich fehlgeschlagen: {str(e)[:50]}")
         
-        return matches
+        return matcher.match(listings)
     
     async def stop_all(self):
-        """Stoppt alle Browser-Instanzen"""
+        """Stoppt alle Browser-Instanzen (Kontexte, Pool-Instanzen, Treiber)
+        
+        Mit BrowserService gehen die Kontexte nur an den Service zurück.
+        """
         await self.stop_browser()
         await self.wg_gesucht.stop_browser()
         await self.immoscout.stop_browser()
         await self.immowelt.stop_browser()
         await self.kleinanzeigen.stop_browser()
+        self.browser_pool.log_stats()
+        self.consent.log_stats()
+        for line in self.readiness_stats.lines():
+            self.log(f"#   {line}")
+        for line in self.browser_extract.stats.lines():
+            self.log(f"#   {line}")
+        if not self.browser_service:
+            await self.browser_pool.close()
+        if self.http_fetcher:
+            self.http_fetcher.log_stats()
+            fallbacks = self.wg_gesucht.browser_fallbacks + self.kleinanzeigen.browser_fallbacks
+            if fallbacks:
+                self.log(f"#   Browser-Fallbacks: {fallbacks}")
+            await self.http_fetcher.close()
+        if self.scrapeops:
+            self.scrapeops.log_stats()
+            await self.scrapeops.close()
@@ -5,8 +5,12 @@ Optionales Modul für Anti-Bot-Bypass via Scrapfly
 
 import asyncio
 import os
-from typing import List, Dict, Optional, Callable
-from bs4 import BeautifulSoup
+from typing import List, Optional, Callable
+
+from .listing import Listing, Site
+from .listing_store import ListingStore
+from .html_parser import HtmlParser
+from .structured import StructuredExtractor, EXPOSE_URLS
 
 try:
     from scrapfly import ScrapflyClient, ScrapeConfig
@@ -15,13 +19,39 @@ except ImportError:
     SCRAPFLY_AVAILABLE = False
 
 
+# Gleichzeitige Scrapfly-Anfragen und hartes Credit-Budget pro Suche
+SCRAPFLY_CONCURRENCY = 3
+SCRAPFLY_CREDIT_BUDGET = 1000
+# Vorab reservierte Credits pro Anfrage (ASP + JS-Rendering + Residential-Proxy);
+# teurere Antworten heben die Reservierung auf die höchsten beobachteten Kosten
+SCRAPFLY_ESTIMATED_COST = 30
+
+
 class ScrapflyScraper:
-    """Scraper mit Scrapfly Anti-Bot-Bypass für blockierte Websites"""
+    """Scraper mit Scrapfly Anti-Bot-Bypass für blockierte Websites
     
-    def __init__(self, api_key: str = None, log_callback: Callable = None):
+    Seiten werden in einem Fenster von concurrency gleichzeitigen Anfragen
+    abgerufen. Vor jeder Anfrage werden die bisher höchsten Kosten pro
+    Anfrage (mindestens SCRAPFLY_ESTIMATED_COST) reserviert und nach ihrem
+    Ende wieder freigegeben; passt das nicht mehr ins Budget oder ist es
+    nach einer Antwort ausgeschöpft, wird nichts mehr gestartet.
+    """
+    
+    def __init__(self, api_key: str = None, log_callback: Callable = None,
+                 listings_callback: Callable = None, listing_store: ListingStore = None,
+                 concurrency: int = SCRAPFLY_CONCURRENCY, credit_budget: int = SCRAPFLY_CREDIT_BUDGET):
+        self.listings_callback = listings_callback
+        self.listing_store = listing_store if listing_store is not None else ListingStore()
         self.api_key = api_key or os.environ.get('SCRAPFLY_API_KEY')
         self.log = log_callback or print
         self.client = None
+        self.concurrency = max(1, concurrency)
+        self.credit_budget = credit_budget
+        self.credits_used = 0
+        self._reserved = 0
+        self._reserve_cost = SCRAPFLY_ESTIMATED_COST
+        self.html_parser = HtmlParser()
+        self.structured = {site: StructuredExtractor(url) for site, url in EXPOSE_URLS.items()}
         
         if not SCRAPFLY_AVAILABLE:
             self.log("  ! Scrapfly SDK nicht installiert")
@@ -38,162 +68,225 @@ class ScrapflyScraper:
         """Prüft ob Scrapfly nutzbar ist"""
         return self.client is not None
     
-    async def scrape_immowelt(self, city: str, max_pages: int = 5) -> List[Dict]:
-        """Scrapt Immowelt mit Scrapfly Anti-Bot-Bypass"""
-        if not self.is_available():
-            return []
+    @staticmethod
+    def _cost(result) -> int:
+        """Tatsächliche Kosten einer Anfrage (Scrapfly-Kontext, sonst Schätzung)"""
+        try:
+            return int(result.context['cost']['total'])
+        except Exception:
+            pass
+        try:
+            return int(result.response.headers['X-Scrapfly-Api-Cost'])
+        except Exception:
+            return SCRAPFLY_ESTIMATED_COST
+    
+    async def _scrape(self, url: str):
+        """Eine Seite über Scrapfly: (Status, HTML); Credits werden verbucht"""
+        result = await self.client.async_scrape(ScrapeConfig(
+            url=url,
+            asp=True,  # Anti-Scraping Protection
+            render_js=True,
+            country="DE",
+            proxy_pool="public_residential_pool",
+            timeout=60000,
+        ))
+        cost = self._cost(result)
+        self.credits_used += cost
+        self._reserve_cost = max(self._reserve_cost, cost)
+        return result.scrape_result['status_code'], result.scrape_result['content']
+
+    def _budget_left(self) -> bool:
+        return self.credits_used + self._reserved + self._reserve_cost <= self.credit_budget
+    
+    async def _scrape_pages(self, url_for: Callable, max_pages: int, base_url: str,
+                            website: str, blocked: Callable, listings: List[Listing]):
+        """Seite 1 allein, danach ein Fenster gleichzeitiger Anfragen
         
-        listings = []
-        seen_urls = set()
-        city_slug = self._normalize_city(city)
-        base_url = "https://www.immowelt.de"
+        Ergebnisse werden in Seitenreihenfolge ausgewertet. Sobald eine Seite
+        leer oder blockiert ist, werden alle noch laufenden Anfragen
+        abgebrochen.
+        """
+        effective_max = max_pages if max_pages > 0 else 9999  # 0 = unbegrenzt
+        display_max = max_pages if max_pages > 0 else "alle"
+        credits_before = self.credits_used
+        count_before = len(listings)
+        pending = {}
+        # Reservierte Credits pro Seite: frei, sobald die Anfrage fertig ist,
+        # spätestens im finally unten (auch wenn sie nie gestartet wurde)
+        reserved = {}
+        started = set()
+        next_page = 1
+        checked = 1
         
-        self.log(f"  Scrapfly: Immowelt für {city}")
+        def release(page: int, task: asyncio.Future = None):
+            cost = reserved.pop(page, 0)
+            self._reserved -= cost
+            if task is not None and task.cancelled() and page in started:
+                # Das SDK läuft im Thread-Pool weiter: die Anfrage wird trotzdem berechnet
+                self.credits_used += cost
         
-        for page_num in range(1, max_pages + 1):
-            self.log(f"    Seite {page_num}/{max_pages}...")
-            
-            # Immowelt URL mit Pagination
-            if page_num == 1:
-                url = f"{base_url}/suche/{city_slug}/wohnungen/mieten"
-            else:
-                # Versuche die classified-search URL (die normalerweise blockiert ist)
-                url = f"{base_url}/classified-search?distributionTypes=Rent&estateTypes=Apartment&locations={city_slug.upper()}&page={page_num}"
-            
-            try:
-                result = await self.client.async_scrape(ScrapeConfig(
-                    url=url,
-                    asp=True,  # Anti-Scraping Protection
-                    render_js=True,
-                    country="DE",
-                    proxy_pool="public_residential_pool",
-                    timeout=60000,
-                ))
+        async def request(page: int):
+            started.add(page)
+            return await self._scrape(url_for(page))
+        
+        def dispatch() -> bool:
+            nonlocal next_page
+            if not self._budget_left():
+                self.log(f"      ! Credit-Budget erreicht ({self.credits_used}/{self.credit_budget})")
+                return False
+            reserved[next_page] = self._reserve_cost
+            self._reserved += self._reserve_cost
+            self.log(f"    Seite {next_page}/{display_max}...")
+            task = asyncio.ensure_future(request(next_page))
+            task.add_done_callback(lambda done, page=next_page: release(page, done))
+            pending[next_page] = task
+            next_page += 1
+            return True
+        
+        budget_left = True
+        try:
+            while checked <= effective_max:
+                # Nach Seite 1 das Fenster auffüllen
+                window = 1 if checked == 1 else self.concurrency
+                while budget_left and next_page <= effective_max and len(pending) < window:
+                    budget_left = dispatch()
+                if checked not in pending:
+                    break
+                
+                page_num = checked
+                checked += 1
+                try:
+                    status, html = await pending.pop(page_num)
+                except Exception as e:
+                    self.log(f"      ! Seite {page_num}: {str(e)[:50]}")
+                    break
+                finally:
+                    release(page_num)
                 
-                html = result.scrape_result['content']
-                status = result.scrape_result['status_code']
+                # Tatsächliche Kosten nach jeder Antwort gegen das Budget prüfen
+                if budget_left and not self._budget_left():
+                    self.log(f"      ! Credit-Budget erreicht ({self.credits_used}/{self.credit_budget})")
+                    budget_left = False
                 
                 if status != 200:
-                    self.log(f"      ! Status {status}")
+                    self.log(f"      ! Seite {page_num}: Status {status}")
                     continue
                 
+                reason = blocked(html)
+                if reason:
+                    self.log(f"      ! Seite {page_num}: {reason}")
+                    break
+                
                 # Parse Listings
-                new_count = self._parse_listings(html, listings, seen_urls, base_url, 'immowelt')
-                self.log(f"      {new_count} neue Listings (Total: {len(listings)})")
+                new_count = self._parse_listings(html, listings, base_url, website)
+                self.log(f"      Seite {page_num}: {new_count} neue Listings (Total: {len(listings)})")
                 
                 if new_count == 0:
                     break
-                    
-            except Exception as e:
-                self.log(f"      ! Fehler: {str(e)[:50]}")
-                break
+        finally:
+            # Noch laufende Anfragen abbrechen (leere Seite, Fehler oder Stopp);
+            # schon gesendete werden mit ihrer Reservierung verbucht
+            for task in pending.values():
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending.values(), return_exceptions=True)
+            for page in list(reserved):
+                release(page)
+        
+        credits = self.credits_used - credits_before
+        found = len(listings) - count_before
+        per_listing = f"{credits / found:.1f} Credits/Listing" if found else "keine Listings"
+        self.log(f"    Scrapfly-Kosten: {credits} Credits, {per_listing} "
+                 f"(gesamt {self.credits_used}/{self.credit_budget})")
+    
+    async def scrape_immowelt(self, city: str, max_pages: int = 5) -> List[Listing]:
+        """Scrapt Immowelt mit Scrapfly Anti-Bot-Bypass"""
+        if not self.is_available():
+            return []
         
+        listings = []
+        city_slug = self._normalize_city(city)
+        base_url = "https://www.immowelt.de"
+        
+        self.log(f"  Scrapfly: Immowelt für {city}")
+        
+        def url_for(page_num: int) -> str:
+            # Immowelt URL mit Pagination
+            if page_num == 1:
+                return f"{base_url}/suche/{city_slug}/wohnungen/mieten"
+            # Versuche die classified-search URL (die normalerweise blockiert ist)
+            return f"{base_url}/classified-search?distributionTypes=Rent&estateTypes=Apartment&locations={city_slug.upper()}&page={page_num}"
+        
+        await self._scrape_pages(url_for, max_pages, base_url, 'immowelt', lambda html: None, listings)
         return listings
     
-    async def scrape_immoscout(self, city: str, max_pages: int = 5) -> List[Dict]:
+    async def scrape_immoscout(self, city: str, max_pages: int = 5) -> List[Listing]:
         """Scrapt ImmoScout24 mit Scrapfly Anti-Bot-Bypass"""
         if not self.is_available():
             return []
         
         listings = []
-        seen_urls = set()
         city_slug = self._normalize_city(city)
         base_url = "https://www.immobilienscout24.de"
         bundesland = self._get_bundesland(city_slug)
         
         self.log(f"  Scrapfly: ImmoScout24 für {city}")
         
-        for page_num in range(1, max_pages + 1):
-            self.log(f"    Seite {page_num}/{max_pages}...")
-            
+        def url_for(page_num: int) -> str:
             # ImmoScout URL mit Pagination
             if page_num == 1:
-                url = f"{base_url}/Suche/de/{bundesland}/{city_slug}/wohnung-mieten"
-            else:
-                url = f"{base_url}/Suche/de/{bundesland}/{city_slug}/wohnung-mieten?pagenumber={page_num}"
-            
-            try:
-                result = await self.client.async_scrape(ScrapeConfig(
-                    url=url,
-                    asp=True,  # Anti-Scraping Protection
-                    render_js=True,
-                    country="DE",
-                    proxy_pool="public_residential_pool",
-                    timeout=60000,
-                ))
-                
-                html = result.scrape_result['content']
-                status = result.scrape_result['status_code']
-                
-                if status != 200:
-                    self.log(f"      ! Status {status}")
-                    continue
-                
-                # Prüfe auf Bot-Erkennung
-                if 'Ich bin kein Roboter' in html or len(html) < 10000:
-                    self.log(f"      ! Bot-Erkennung trotz Scrapfly")
-                    break
-                
-                # Parse Listings
-                new_count = self._parse_listings(html, listings, seen_urls, base_url, 'immoscout24')
-                self.log(f"      {new_count} neue Listings (Total: {len(listings)})")
-                
-                if new_count == 0:
-                    break
-                    
-            except Exception as e:
-                self.log(f"      ! Fehler: {str(e)[:50]}")
-                break
+                return f"{base_url}/Suche/de/{bundesland}/{city_slug}/wohnung-mieten"
+            return f"{base_url}/Suche/de/{bundesland}/{city_slug}/wohnung-mieten?pagenumber={page_num}"
         
+        def blocked(html: str) -> Optional[str]:
+            # Prüfe auf Bot-Erkennung
+            if 'Ich bin kein Roboter' in html or len(html) < 10000:
+                return "Bot-Erkennung trotz Scrapfly"
+            return None
+        
+        await self._scrape_pages(url_for, max_pages, base_url, 'immoscout24', blocked, listings)
         return listings
     
-    def _parse_listings(self, html: str, listings: List[Dict], seen_urls: set, 
+    def _parse_listings(self, html: str, listings: List[Listing], 
                        base_url: str, website: str) -> int:
-        """Parst HTML und extrahiert Listings"""
-        soup = BeautifulSoup(html, 'html.parser')
+        """Parst HTML und extrahiert Listings (eingebettetes JSON, sonst DOM-Text)"""
         new_count = 0
         
-        # Finde alle Expose-Links
-        for a in soup.find_all('a', href=True):
-            href = a.get('href', '')
-            if '/expose/' not in href:
-                continue
+        extractor = self.structured.get(website)
+        records = extractor.extract(html) if extractor else []
+        for record in records:
+            if record.url.startswith('/'):
+                record.url = base_url + record.url
+            listing = record.to_listing(Site.from_key(website))
+            if self.listing_store.add(listing):
+                listings.append(listing)
+                new_count += 1
+        
+        # DOM-Text nur ohne JSON: eine Karte pro Expose (Text einmal berechnet)
+        cards = self.html_parser.expose_cards(html) if not records else []
+        for card in cards:
+            href = card.href
             
             # URL normalisieren
             if href.startswith('http'):
-                url_full = href.split('?')[0]
+                url_full = href
             elif href.startswith('/'):
-                url_full = base_url + href.split('?')[0]
+                url_full = base_url + href
             else:
                 continue
             
-            if url_full in seen_urls:
+            if self.listing_store.seen(website, url_full):
                 continue
-            seen_urls.add(url_full)
             
-            # Text extrahieren
-            text = ""
-            container = a
-            for _ in range(10):
-                container = container.find_parent()
-                if not container:
-                    break
-                text = container.get_text(separator=' ', strip=True)
-                if 100 < len(text) < 3000:
-                    break
-            
-            if not text or len(text) < 50:
-                text = a.get_text(separator=' ', strip=True)
-            
-            if text and len(text) > 20:
-                listings.append({
-                    'text': text[:500],
-                    'text_norm': self._normalize_text(text[:500]),
-                    'url': url_full,
-                    'website': website,
-                    'website_name': 'Immowelt.de' if website == 'immowelt' else 'ImmobilienScout24.de'
-                })
-                new_count += 1
+            text = card.text
+            if len(text) > 20:
+                listing = Listing(text[:500], url_full, Site.from_key(website))
+                if self.listing_store.add(listing):
+                    listings.append(listing)
+                    new_count += 1
+        
+        if new_count and self.listings_callback:
+            self.listings_callback(listings[-new_count:])
         
         return new_count
     
@@ -202,17 +295,6 @@ class ScrapflyScraper:
         """Normalisiert Stadtnamen"""
         return city.lower().replace('ü', 'ue').replace('ä', 'ae').replace('ö', 'oe').replace('ß', 'ss').replace(' ', '-')
     
-    @staticmethod
-    def _normalize_text(text: str) -> str:
-        """Normalisiert Text für Adressabgleich"""
-        import re
-        text = text.lower()
-        text = text.replace('ü', 'ue').replace('ä', 'ae').replace('ö', 'oe').replace('ß', 'ss')
-        text = text.replace('str.', 'strasse').replace('straße', 'strasse')
-        text = re.sub(r'[^a-z0-9\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
-    
     @staticmethod
     def _get_bundesland(city_slug: str) -> str:
         """Gibt das Bundesland für eine Stadt zurück"""
@@ -227,7 +309,8 @@ class ScrapflyScraper:
         return bundesland_map.get(city_slug, "bayern")
 
 
-# Standalone Test
+# Standalone Test (aus dem Projektordner)
+# python -m src.scraper.scrapfly_scraper DEIN_API_KEY
 if __name__ == "__main__":
     import sys
     
@@ -235,7 +318,7 @@ if __name__ == "__main__":
         api_key = sys.argv[1] if len(sys.argv) > 1 else None
         
         if not api_key:
-            print("Nutzung: python3 scrapfly_scraper.py DEIN_API_KEY")
+            print("Nutzung: python -m src.scraper.scrapfly_scraper DEIN_API_KEY")
             return
         
         scraper = ScrapflyScraper(api_key=api_key)
@@ -0,0 +1,105 @@
+"""
+WohnungsScraper - Street Search
+Aho-Corasick-Automat für die gleichzeitige Suche aller Straßen-Varianten
+"""
+
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+class StreetAutomaton:
+    """Multi-Pattern-Suche über alle Straßen-Varianten des Adressbuchs
+
+    Der Automat wird einmal aus den normalisierten Varianten gebaut und
+    durchläuft jeden Text genau einmal. Die Kosten pro Listing hängen damit
+    von der Textlänge ab, nicht von der Anzahl der Adressen.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        self.patterns: List[str] = []
+        self._ids: Dict[str, int] = {}
+        # Leere Variante (z.B. Straße "Strasse" ohne Namen) trifft immer
+        self._empty_ids: List[int] = []
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._built = False
+
+        for pattern in patterns:
+            self.add(pattern)
+
+    def add(self, pattern: str) -> int:
+        """Fügt eine Variante hinzu und liefert ihre ID"""
+        if pattern in self._ids:
+            return self._ids[pattern]
+        if self._built:
+            raise RuntimeError("StreetAutomaton ist bereits kompiliert")
+
+        pattern_id = len(self.patterns)
+        self.patterns.append(pattern)
+        self._ids[pattern] = pattern_id
+
+        if not pattern:
+            self._empty_ids.append(pattern_id)
+            return pattern_id
+
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][char] = nxt
+            state = nxt
+        self._out[state].append(pattern_id)
+        return pattern_id
+
+    def build(self) -> 'StreetAutomaton':
+        """Berechnet die Fehler-Links (Breitensuche)"""
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # Ausgaben des Suffix-Zustands übernehmen
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+        return self
+
+    def pattern_id(self, pattern: str) -> int:
+        return self._ids[pattern]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, int]]:
+        """Alle Treffer als (Start, Ende, Pattern-ID), auch überlappend"""
+        if not self._built:
+            self.build()
+
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        patterns = self.patterns
+
+        hits = [(0, 0, pid) for pid in self._empty_ids]
+        state = 0
+        for pos, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                end = pos + 1
+                for pid in out[state]:
+                    hits.append((end - len(patterns[pid]), end, pid))
+        return hits
+
+    def found_ids(self, text: str) -> Set[int]:
+        """IDs aller Varianten die im Text vorkommen"""
+        return {pid for _, _, pid in self.find_all(text)}
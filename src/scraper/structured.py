@@ -0,0 +1,264 @@
+"""
+WohnungsScraper - Structured Extraction
+Liest Inserate aus dem eingebetteten Seitenzustand (JSON) statt aus dem DOM-Text
+"""
+
+import json
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .listing import Listing, Site
+
+
+# Script-Blöcke mit JSON: Next.js-Zustand und schema.org-Daten
+_NEXT_DATA = re.compile(r'<script[^>]+id=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>', re.S)
+_LD_JSON = re.compile(r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.S)
+
+# Exposé-URL aus der Anzeigen-ID (falls der Zustand nur die ID enthält)
+EXPOSE_URLS = {
+    'immowelt': 'https://www.immowelt.de/expose/{id}',
+    'immoscout24': 'https://www.immobilienscout24.de/expose/{id}',
+}
+
+# Markierungen für JSON in Inline-Skripten (Objekt oder JSON.parse("...") dahinter)
+STATE_MARKERS = (
+    'resultListModel:',                            # ImmoScout24 (IS24.resultList)
+    '__UFRN_LIFECYCLE_SERVERREQUEST__"]=',         # Immowelt (AVIV)
+    '__INITIAL_STATE__=',
+)
+
+# Feldnamen der Portale bzw. von schema.org (erste vorhandene gilt)
+POSTAL_KEYS = ('postcode', 'postalCode', 'zipCode', 'zip', 'plz')
+STREET_KEYS = ('street', 'streetName', 'streetAddress')
+HOUSE_KEYS = ('houseNumber', 'streetNumber', 'housenumber')
+CITY_KEYS = ('city', 'addressLocality', 'cityName')
+ID_KEYS = ('@id', 'exposeId', 'realEstateId', 'estateId', 'id')
+URL_KEYS = ('url', 'exposeUrl', 'href', 'link')
+TITLE_KEYS = ('title', 'headline', 'name')
+
+# "Leopoldstr. 5a" / "Tal 3-5" -> Straße und Hausnummer
+_STREET_HOUSE = re.compile(r'^(.*?\D)\s*(\d+\s*[a-zA-Z]?(?:\s*[-/]\s*\d+\s*[a-zA-Z]?)?)$')
+_DIGITS = re.compile(r'\d+')
+# Nur einfache IDs ergeben eine Exposé-URL (keine URLs, '#organization' o. ä.)
+_PLAIN_ID = re.compile(r'[\w-]+')
+_decoder = json.JSONDecoder()
+
+
+def _first(obj: Dict, keys: Sequence[str]) -> Optional[str]:
+    for key in keys:
+        value = obj.get(key)
+        if isinstance(value, (str, int)) and not isinstance(value, bool) and str(value).strip():
+            return str(value).strip()
+    return None
+
+
+class ListingRecord:
+    """Ein Inserat aus dem Seitenzustand mit Adressfeldern (soweit vorhanden)"""
+
+    __slots__ = ('listing_id', 'url', 'title', 'postal_code', 'street', 'house_number', 'city')
+
+    def __init__(self, listing_id: Optional[str], url: Optional[str], title: str,
+                 postal_code: Optional[str], street: Optional[str], house_number: Optional[str],
+                 city: Optional[str]):
+        self.listing_id = listing_id
+        self.url = url
+        self.title = title
+        self.postal_code = postal_code
+        self.street = street
+        self.house_number = house_number
+        self.city = city
+
+    @property
+    def text(self) -> str:
+        """Text wie eine DOM-Karte (Titel und Adresse), für Anzeige und Text-Abgleich"""
+        street = " ".join(p for p in (self.street, self.house_number) if p)
+        place = " ".join(p for p in (self.postal_code, self.city) if p)
+        return ", ".join(p for p in (self.title, street, place) if p)
+
+    def to_listing(self, site: Site) -> Listing:
+        listing = Listing(self.text, self.url, site)
+        listing.listing_id = self.listing_id
+        listing.postal_code = self.postal_code
+        listing.street = self.street
+        listing.house_number = self.house_number
+        return listing
+
+    def __repr__(self) -> str:
+        return f"ListingRecord({self.listing_id}, {self.postal_code} {self.street} {self.house_number})"
+
+
+class StructuredExtractor:
+    """Inserate aus __NEXT_DATA__, application/ld+json und Inline-JSON
+
+    Die JSON-Blöcke werden ohne DOM-Parser aus dem HTML geschnitten. Im
+    geparsten Zustand gilt jedes Objekt mit einer Adresse (PLZ-Feld, direkt
+    oder unter address/location) als Inserat; ID und URL kommen von ihm
+    selbst oder dem nächsten Objekt darüber, das eine ID oder URL hat.
+    Fehlt die URL, wird sie aus expose_url und der ID gebaut. Ohne Treffer
+    ist die Liste leer und der Scraper nimmt den DOM-Text (expose_cards).
+    """
+
+    def __init__(self, expose_url: str, markers: Sequence[str] = STATE_MARKERS):
+        self.expose_url = expose_url
+        self.markers = tuple(markers)
+
+    def extract(self, html: str) -> List[ListingRecord]:
+        return self.from_states(self._states(html))
+
+    def from_states(self, states: Iterable[object]) -> List[ListingRecord]:
+        """Inserate aus bereits geparsten JSON-Objekten (z. B. XHR-Antworten), ohne Duplikate"""
+        records: List[ListingRecord] = []
+        seen = set()
+        for state in states:
+            for record in self._walk(state, None):
+                key = record.listing_id or record.url
+                if key and key not in seen:
+                    seen.add(key)
+                    records.append(record)
+        return records
+
+    def _states(self, html: str) -> Iterator[object]:
+        """Alle eingebetteten JSON-Zustände der Seite (kaputte werden übersprungen)"""
+        blocks = _NEXT_DATA.findall(html) + _LD_JSON.findall(html)
+        for block in blocks:
+            try:
+                yield json.loads(block)
+            except ValueError:
+                continue
+        for marker in self.markers:
+            start = html.find(marker)
+            while start != -1:
+                state = self._decode_at(html, start + len(marker))
+                if state is not None:
+                    yield state
+                start = html.find(marker, start + 1)
+
+    @staticmethod
+    def _decode_at(html: str, pos: int):
+        """JSON-Objekt ab pos, auch als JSON.parse("...")-Argument"""
+        while pos < len(html) and html[pos] in ' \t\r\n':
+            pos += 1
+        try:
+            if html.startswith('JSON.parse(', pos):
+                literal, _ = _decoder.raw_decode(html, pos + len('JSON.parse('))
+                return json.loads(literal) if isinstance(literal, str) else None
+            if html.startswith('{', pos):
+                return _decoder.raw_decode(html, pos)[0]
+        except ValueError:
+            pass
+        return None
+
+    def _walk(self, node, owner: Optional[Dict]) -> Iterator[ListingRecord]:
+        if isinstance(node, list):
+            for item in node:
+                yield from self._walk(item, owner)
+            return
+        if not isinstance(node, dict):
+            return
+
+        # Ein Adressobjekt selbst ist kein Inserat (seine ID ist z. B. eine Orts-ID)
+        if (_first(node, ID_KEYS) or _first(node, URL_KEYS)) and not _first(node, POSTAL_KEYS):
+            owner = node
+        address = self._address_of(node)
+        if address is not None and owner is not None:
+            record = self._record(owner, node, address)
+            if record is not None:
+                yield record
+                return
+        for value in node.values():
+            if isinstance(value, (dict, list)):
+                yield from self._walk(value, owner)
+
+    @staticmethod
+    def _address_of(node: Dict) -> Optional[Dict]:
+        for key in ('address', 'location'):
+            value = node.get(key)
+            if isinstance(value, dict):
+                if _first(value, POSTAL_KEYS):
+                    return value
+                # schema.org: location -> address
+                inner = value.get('address')
+                if isinstance(inner, dict) and _first(inner, POSTAL_KEYS):
+                    return inner
+        return node if _first(node, POSTAL_KEYS) else None
+
+    def _record(self, owner: Dict, node: Dict, address: Dict) -> Optional[ListingRecord]:
+        listing_id = _first(owner, ID_KEYS)
+        url = _first(owner, URL_KEYS)
+        if listing_id and '/expose/' in listing_id:
+            # schema.org: @id ist die Exposé-URL
+            url = url or listing_id
+            listing_id = listing_id.rstrip('/').rsplit('/', 1)[-1]
+        if url is None and listing_id and _PLAIN_ID.fullmatch(listing_id):
+            url = self.expose_url.format(id=listing_id)
+        if url is None or '/expose/' not in url:
+            return None
+        url = url.split('?')[0]
+        listing_id = listing_id or url.rstrip('/').rsplit('/', 1)[-1]
+
+        street = _first(address, STREET_KEYS)
+        house = _first(address, HOUSE_KEYS)
+        if street and not house:
+            parts = _STREET_HOUSE.match(street)
+            if parts:
+                street, house = parts.group(1).strip(), parts.group(2).replace(' ', '')
+        postal = _first(address, POSTAL_KEYS)
+        if postal and not postal.isdigit():
+            digits = _DIGITS.search(postal)
+            postal = digits.group(0) if digits else None
+        title = _first(node, TITLE_KEYS) or _first(owner, TITLE_KEYS) or ""
+        return ListingRecord(listing_id, url, title,
+                             postal, street, house, _first(address, CITY_KEYS))
+
+
+# Standalone Messung: JSON-Zustand vs. DOM-Text (expose_cards) pro Seite
+# python -m src.scraper.structured [gespeicherte_seite.html ...]
+if __name__ == "__main__":
+    import random
+    import sys
+    import time
+    from pathlib import Path
+
+    from .html_parser import HtmlParser
+
+    def synthetic(count: int) -> str:
+        entries = [{
+            '@id': str(140000000 + i),
+            'resultlist.realEstate': {
+                'title': f"Helle 3-Zimmer-Wohnung {i}",
+                'address': {'street': 'Leopoldstr.', 'houseNumber': str(i % 90 + 1),
+                            'postcode': str(80331 + random.randint(0, 600)), 'city': 'München'},
+            },
+        } for i in range(count)]
+        model = {'searchResponseModel': {'resultlist.resultlist': {
+            'resultlistEntries': [{'resultlistEntry': entries}]}}}
+        cards = "".join(
+            f'<li class="result-list__listing"><article><a href="/expose/{e["@id"]}">'
+            f'<h2>{e["resultlist.realEstate"]["title"]}</h2></a><div>'
+            f'{e["resultlist.realEstate"]["address"]["street"]} '
+            f'{e["resultlist.realEstate"]["address"]["houseNumber"]}, '
+            f'{e["resultlist.realEstate"]["address"]["postcode"]} München</div></article></li>'
+            for e in entries)
+        nav = "".join(f'<div class="nav"><a href="/n/{i}">Menü {i}</a></div>' for i in range(400))
+        return (f"<html><body>{nav}<ul>{cards}</ul>{nav}<script>IS24.resultList = {{\n"
+                f"resultListModel: {json.dumps(model)},\n}};</script></body></html>")
+
+    random.seed(5)
+    pages = ([Path(p).read_text(encoding='utf-8', errors='ignore') for p in sys.argv[1:]]
+             or [synthetic(20), synthetic(60)])
+    extractor = StructuredExtractor(EXPOSE_URLS['immoscout24'])
+    parser = HtmlParser()
+    ROUNDS = 20
+
+    for name, run in (('JSON-Zustand', extractor.extract), (f'DOM ({parser.backend})', parser.expose_cards)):
+        started = time.perf_counter()
+        found = 0
+        for _ in range(ROUNDS):
+            for html in pages:
+                found += len(run(html))
+        ms = (time.perf_counter() - started) * 1000 / (ROUNDS * len(pages))
+        print(f"  {name:18s} {ms:7.2f} ms/Seite, {found // ROUNDS} Inserate")
+
+    records = extractor.extract(pages[0])
+    with_street = sum(1 for r in records if r.street and r.house_number and r.postal_code)
+    print(f"  {with_street}/{len(records)} Inserate mit PLZ, Straße und Hausnummer, z. B. {records[:1]}")
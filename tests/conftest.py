@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests laufen gegen den Quellbaum (python -m pytest im Projektordner)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
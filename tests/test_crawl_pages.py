@@ -0,0 +1,76 @@
+"""
+BaseScraper.crawl_pages: Fortschritt, Abbruch nach leeren Seiten, Ratenregelung
+"""
+
+import asyncio
+
+from src.scraper.base import BaseScraper, DomainScheduler
+
+
+URL = "https://www.example.de/suche?page={}"
+
+
+def _scraper(max_pages: int, progress: list, rate: float = 1000.0, stop_flag=None) -> BaseScraper:
+    scraper = BaseScraper(log_callback=lambda *args: None, max_pages=max_pages, stop_flag=stop_flag,
+                          progress_callback=lambda page, total: progress.append(page))
+    # Standard: ohne nennenswerte Wartezeit zwischen den Anfragen
+    scraper.scheduler = DomainScheduler(rate=rate, burst=1, jitter=0.0)
+    return scraper
+
+
+def _crawl(scraper: BaseScraper, counts: dict, max_tabs: int = 2, fetched: list = None) -> int:
+    async def fetch(tab, url, page_num):
+        if fetched is not None:
+            fetched.append(page_num)
+        await asyncio.sleep(0.01)
+        return counts.get(page_num, 0)
+
+    async def open_tab():
+        return object()
+
+    async def close_tab(tab):
+        pass
+
+    return asyncio.run(scraper.crawl_pages(URL.format, fetch, max_tabs=max_tabs,
+                                           open_tab=open_tab, close_tab=close_tab))
+
+
+def test_progress_only_for_fetched_pages():
+    # Tabs warten auf ihr Token, während der Stopp kommt
+    progress, fetched = [], []
+    scraper = _scraper(10, progress, rate=20.0, stop_flag=lambda: len(fetched) >= 2)
+    _crawl(scraper, {page: 20 for page in range(1, 11)}, fetched=fetched)
+    assert sorted(progress) == sorted(fetched) == [1, 2]
+
+
+def test_progress_after_empty_pages():
+    progress, fetched = [], []
+    scraper = _scraper(10, progress)
+    _crawl(scraper, {1: 20}, fetched=fetched)
+    # Seiten 2 und 3 leer -> Schluss; schon vergebene Seiten danach werden
+    # nicht mehr geladen und nicht gemeldet
+    assert sorted(progress) == sorted(fetched)
+    assert set(range(1, 4)) <= set(fetched)
+
+
+def test_empty_pages_are_neutral():
+    progress = []
+    scraper = _scraper(6, progress)
+    controller = scraper.scheduler.controller(URL.format(1))
+    rate = controller.rate
+    _crawl(scraper, {}, max_tabs=1)
+    # Nur leere Seiten: weder schneller noch gedrosselt
+    assert controller.rate == rate
+    assert controller.blocks == 0
+    assert controller.pages == len(progress)
+
+
+def test_block_signal():
+    progress = []
+    scraper = _scraper(3, progress)
+    controller = scraper.scheduler.controller(URL.format(1))
+    rate = controller.rate
+    _crawl(scraper, {1: None, 2: 5, 3: 5}, max_tabs=1)
+    assert controller.blocks == 1
+    assert controller.rate < rate
+    assert progress == [1, 2, 3]
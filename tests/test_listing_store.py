@@ -0,0 +1,105 @@
+"""
+ListingStore: Duplikate pro Stadt und Website, for_city
+"""
+
+from src.scraper.dedup import DuplicateDetector
+from src.scraper.listing import Listing, Site
+from src.scraper.listing_store import ListingStore, CURRENT_CITY
+
+
+TEXT = "Helle 3-Zimmer-Wohnung mit Balkon, Leopoldstr. 5, 80802 München, 78 m², 1.450 €"
+URL = "https://www.immowelt.de/expose/2abc3?utm=x"
+
+
+def _add(store, city, text=TEXT, url=URL, site=Site.IMMOWELT):
+    token = CURRENT_CITY.set(city)
+    try:
+        return store.add(Listing(text, url, site))
+    finally:
+        CURRENT_CITY.reset(token)
+
+
+def test_duplicate_within_city_rejected():
+    store = ListingStore()
+    assert _add(store, 'muenchen')
+    assert not _add(store, 'muenchen', url=URL.split('?')[0] + '/')
+    assert store.duplicates == {'immowelt': 1}
+    assert len(store) == 1
+
+
+def test_listing_seen_in_two_cities():
+    store = ListingStore(DuplicateDetector())
+    assert _add(store, 'muenchen')
+    assert _add(store, 'garching')
+    assert [l.city for l in store.for_city('garching')] == ['garching']
+    assert len(store.for_city('muenchen')) == 1
+    # Dieselbe Anzeige, kein Portal-Duplikat
+    first, second = store.listings
+    assert first.cluster_id == second.cluster_id
+    assert store.detector.duplicate_count == 0
+    assert not store.duplicates
+
+
+def test_seen_uses_current_city():
+    store = ListingStore()
+    _add(store, 'muenchen')
+    token = CURRENT_CITY.set('muenchen')
+    assert store.seen('immowelt', URL)
+    CURRENT_CITY.reset(token)
+    token = CURRENT_CITY.set('garching')
+    assert not store.seen('immowelt', URL)
+    CURRENT_CITY.reset(token)
+
+
+def test_portal_duplicate_clustered():
+    store = ListingStore(DuplicateDetector())
+    _add(store, 'muenchen')
+    _add(store, 'muenchen', url="https://www.immobilienscout24.de/expose/1234", site=Site.IMMOSCOUT)
+    first, second = store.listings
+    assert first.cluster_id == second.cluster_id
+    assert store.detector.duplicate_count == 1
+
+
+def test_texts_without_words_not_clustered():
+    store = ListingStore(DuplicateDetector())
+    for i, text in enumerate(("", "!", "1 2 3", "€ -")):
+        _add(store, 'muenchen', text=text, url=f"https://www.immowelt.de/expose/leer{i}")
+    assert all(l.cluster_id is None for l in store.listings)
+    assert store.detector.duplicate_count == 0
+
+
+def test_cluster_on_normalized_text():
+    store = ListingStore(DuplicateDetector())
+    _add(store, 'muenchen')
+    # Gleicher Text mit anderer Schreibweise (Straße/str., Umlaute, Satzzeichen)
+    variant = TEXT.replace("Leopoldstr.", "Leopoldstraße").replace("-", " ").replace("ü", "ue")
+    _add(store, 'muenchen', text=variant, url="https://www.immobilienscout24.de/expose/99", site=Site.IMMOSCOUT)
+    first, second = store.listings
+    assert first.cluster_id == second.cluster_id
+
+
+def test_cluster_keeps_text_norm_lazy():
+    store = ListingStore(DuplicateDetector())
+    _add(store, 'muenchen')
+    assert store.listings[0]._text_norm is None
+
+
+def test_cluster_ids_unique():
+    detector = DuplicateDetector()
+    ids = set()
+    for i in range(2000):
+        listing = Listing(f"wohnung{i} zimmer{i * 7} balkon{i * 13} lage{i * 31}",
+                          f"https://www.immowelt.de/expose/{i}", Site.IMMOWELT)
+        ids.add(detector.assign(listing))
+    assert len(ids) == len(detector.cluster_sizes) == 2000
+
+
+def test_token_cache_bounded():
+    detector = DuplicateDetector(token_cache_size=50)
+    first = detector.simhash("alpha beta gamma delta")
+    for i in range(100):
+        detector.simhash(f"wort{i} wort{i + 1000}")
+    assert len(detector._token_lanes) <= 50
+    assert detector.simhash("alpha beta gamma delta") == first
+    detector.clear()
+    assert not detector._token_lanes
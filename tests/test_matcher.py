@@ -0,0 +1,78 @@
+"""
+AddressMatcher: Textpfad und Feldpfad (PLZ/Straße/Hausnummer aus dem JSON)
+"""
+
+import random
+
+import pytest
+
+from src.scraper.listing import Listing, Site
+from src.scraper.matcher import AddressMatcher
+
+
+ADDRESSES = [
+    {'id': 'a1', 'street': 'Leopoldstraße', 'house_number': '5', 'postal_code': '80802', 'city': 'München'},
+    # Nicht 5-stellige PLZ (Altdaten) -> Teilstring-Suche
+    {'id': 'a2', 'street': 'Tal', 'house_number': '3', 'postal_code': '8033', 'city': 'München'},
+]
+
+
+def _structured(street, house, plz, listing_id):
+    listing = Listing(f"Wohnung, {street} {house}, {plz} München",
+                      f"https://www.immobilienscout24.de/expose/{listing_id}", Site.IMMOSCOUT)
+    listing.listing_id = listing_id
+    listing.street, listing.house_number, listing.postal_code = street, house, plz
+    return listing
+
+
+def test_text_and_fields_agree():
+    text = Listing("Wohnung, Leopoldstr. 5, 80802 München", "https://www.immowelt.de/expose/x1", Site.IMMOWELT)
+    fields = _structured("Leopoldstr.", "5", "80802", "1")
+    matches = AddressMatcher(ADDRESSES).match([text, fields])
+    assert [(m['address_id'], m['match_type']) for m in matches] == [('a1', 'exact'), ('a1', 'exact')]
+
+
+def test_irregular_plz_in_field_path():
+    text = Listing("Wohnung, Tal 3, 80331 München", "https://www.immowelt.de/expose/x2", Site.IMMOWELT)
+    fields = _structured("Tal", "3", "80331", "2")
+    matches = AddressMatcher(ADDRESSES).match([text, fields])
+    assert [m['url'] for m in matches if m['address_id'] == 'a2'] == [text.url, fields.url]
+
+
+def _bench_data(count: int):
+    rng = random.Random(7)
+    streets = ["Leopoldstraße", "Tal", "Am Anger", "Schillerstr.", "Sendlinger-Tor-Platz"]
+    addresses = [{'id': f"a{i}", 'street': rng.choice(streets), 'house_number': rng.choice(["1", "3", "5a"]),
+                  'postal_code': rng.choice(["80802", "80331", "8033"]), 'city': "München"}
+                 for i in range(60)]
+    listings = []
+    for i in range(count):
+        text = (f"Wohnung, {rng.choice(streets)} {rng.choice(['1', '3', '5a', '7'])}, "
+                f"{rng.choice(['80802', '80331', '80333'])} München")
+        # Jede zehnte URL doppelt (Duplikat über Arbeitspakete hinweg)
+        listings.append(Listing(text, f"https://www.immowelt.de/expose/x{i % (count - count // 10)}",
+                                Site.IMMOWELT))
+    listings.append(_structured("Leopoldstr.", "5a", "80802", "77"))
+    return addresses, listings
+
+
+@pytest.mark.parametrize('mode', ["exact", "extended"])
+def test_parallel_identical_to_serial(mode):
+    addresses, listings = _bench_data(500)
+    matcher = AddressMatcher(addresses, mode)
+    serial = matcher.match(listings)
+    assert serial
+    # Kleine Pakete: Treffer einer Adresse verteilen sich auf mehrere Worker
+    assert matcher.match_parallel(listings, workers=3, chunk_size=37) == serial
+
+
+def test_batch_scraper_threshold_forces_parallel():
+    from src.scraper.scraper import BatchScraper
+
+    addresses, listings = _bench_data(200)
+    logs = []
+    parallel = BatchScraper(log_callback=logs.append, parallel_match_threshold=1)
+    serial = BatchScraper(log_callback=lambda *args: None, parallel_match_threshold=0)
+    assert parallel.match_listings(listings, addresses) == serial.match_listings(listings, addresses)
+    assert any("Paralleler Abgleich (" in line for line in logs)
+    assert not any("fehlgeschlagen" in line for line in logs)
@@ -0,0 +1,90 @@
+"""
+AddressNormalizer: Ausgabe identisch zur bisherigen (ungecachten) Implementierung
+"""
+
+import random
+import re
+
+from src.scraper.normalizer import AddressNormalizer, NORMALIZE_CACHE_SIZE
+
+
+_UMLAUT_MAP = {
+    'ae': 'ae', 'oe': 'oe', 'ue': 'ue', 'ss': 'ss',
+    'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'
+}
+
+
+def legacy_normalize(text: str) -> str:
+    """AddressNormalizer.normalize vor dem Cache (Referenz)"""
+    if not text:
+        return ""
+    result = text.lower().strip()
+    for uml, repl in _UMLAUT_MAP.items():
+        result = result.replace(uml, repl)
+    result = re.sub(r'str\.(\s|$)', r'strasse\1', result)
+    result = re.sub(r'str(\s|$)', r'strasse\1', result)
+    result = re.sub(r'strasse(\s|$)', r'strasse\1', result)
+    result = result.replace('-', ' ')
+    result = re.sub(r'[^\w\s]', ' ', result)
+    result = re.sub(r'\s+', ' ', result).strip()
+    return result
+
+
+EDGE_CASES = [
+    # Umlaute / ß, auch groß und gemischt mit ASCII
+    "Schöne Wohnung in Fürth", "ÄÖÜ äöü", "Großbeerenstraße 3", "STRASSE", "Fußweg zur Bahn",
+    # str. / str / straße / strasse
+    "Leopoldstr. 5", "Leopoldstr 5", "Leopoldstraße 5", "Leopoldstrasse 5", "Hauptstr.",
+    "Hauptstr", "Hauptstr.\t12", "Hauptstr.,12", "Hauptstr.-Ecke", "str", "str.", "Str.  ",
+    "Abstraktes Bild", "Strand str strasse", "Schleißheimer Str.\n80331",
+    # Satzzeichen und Sonderzeichen
+    "2-Zimmer-Wohnung (möbliert)!", "1.200 € / Monat", "75,5 m²", "Süd–West — Lage", "a_b c",
+    "U-Bahn: 5 Min.", "«Altbau»", "12a-14b", "Nr. 7 1/2",
+    # Leerraum
+    "  \t  Tal   3  \n", " Tal 3 ", "Zeile1\r\nZeile2",
+    # Leer / nur Sonderzeichen
+    "", "   ", "---", "!!!", "str.-",
+]
+
+
+def test_edge_cases_identical():
+    for text in EDGE_CASES:
+        assert AddressNormalizer.normalize(text) == legacy_normalize(text), repr(text)
+
+
+def test_none_is_empty():
+    assert AddressNormalizer.normalize(None) == ""
+    assert AddressNormalizer.normalize_many([None, ""]) == ["", ""]
+
+
+def test_normalize_many_identical():
+    assert AddressNormalizer.normalize_many(EDGE_CASES) == [legacy_normalize(t) for t in EDGE_CASES]
+
+
+def test_random_cards_identical():
+    words = ["Schöne", "2-Zimmer", "Maximilianstraße", "Leopoldstr.", "Hauptstr", "München", "Größe:",
+             "75,5", "m²", "(möbliert)", "1.200", "€", "WG-Zimmer", "Süd-West", "Straße", "str", "80539",
+             "12a", "U-Bahn", "—", "ÄÖÜ", "\t", "\n", "str.", "Str.,"]
+    rng = random.Random(4)
+    corpus = [" ".join(rng.choice(words) for _ in range(rng.randint(1, 40))) for _ in range(3000)]
+    assert AddressNormalizer.normalize_many(corpus) == [legacy_normalize(t) for t in corpus]
+
+
+def test_cached_repeats_identical():
+    AddressNormalizer.clear_cache()
+    first = [AddressNormalizer.normalize(t) for t in EDGE_CASES]
+    second = [AddressNormalizer.normalize(t) for t in EDGE_CASES]
+    assert first == second == [legacy_normalize(t) for t in EDGE_CASES]
+    assert AddressNormalizer.cache_info().hits >= len([t for t in EDGE_CASES if t])
+
+
+def test_cache_is_bounded():
+    AddressNormalizer.clear_cache()
+    AddressNormalizer.normalize_many(f"Tal {i}" for i in range(NORMALIZE_CACHE_SIZE + 500))
+    info = AddressNormalizer.cache_info()
+    assert info.maxsize == NORMALIZE_CACHE_SIZE
+    assert info.currsize == NORMALIZE_CACHE_SIZE
+    # Älteste Einträge sind verdrängt, neue kommen aus dem Cache
+    assert AddressNormalizer.normalize(f"Tal {NORMALIZE_CACHE_SIZE + 499}") == "tal " + str(NORMALIZE_CACHE_SIZE + 499)
+    assert AddressNormalizer.cache_info().hits == info.hits + 1
+    AddressNormalizer.clear_cache()
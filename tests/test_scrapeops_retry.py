@@ -0,0 +1,74 @@
+"""
+ScrapeOpsScraper._make_request: Wiederholung bei 5xx/Timeout, keine bei 4xx
+"""
+
+import asyncio
+
+import pytest
+import requests
+
+from src.scraper import scrapeops_scraper
+from src.scraper.scrapeops_scraper import ScrapeOpsScraper, SCRAPEOPS_ESTIMATED_CREDITS
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, text: str = ""):
+        self.status_code = status_code
+        self.text = text
+
+
+class FakeSession:
+    """requests.Session-Ersatz: spielt eine Folge von Antworten/Ausnahmen ab"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append(params['url'])
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(scrapeops_scraper, 'ASYNC_SESSION_AVAILABLE', False)
+    monkeypatch.setattr(scrapeops_scraper, 'SCRAPEOPS_BACKOFF', 0.0)
+
+
+def _request(outcomes, retries: int = 2, **kwargs):
+    scraper = ScrapeOpsScraper(api_key='test', log_callback=lambda *args: None, retries=retries)
+    scraper._session = FakeSession(outcomes)
+    text = asyncio.run(scraper._make_request("https://www.immowelt.de/suche", **kwargs))
+    return scraper, text
+
+
+def test_retries_on_5xx_and_timeout():
+    scraper, text = _request([FakeResponse(502), requests.Timeout("read timeout"), FakeResponse(200, "<html>")])
+    assert text == "<html>"
+    assert len(scraper._session.calls) == 3
+    assert scraper.stats['retries'] == 2
+    assert scraper.stats['failures'] == 2
+    assert scraper.stats['estimated_credits'] == SCRAPEOPS_ESTIMATED_CREDITS['render_js']
+
+
+def test_gives_up_after_retries():
+    scraper, text = _request([FakeResponse(503)] * 3)
+    assert text == ""
+    assert len(scraper._session.calls) == 3
+    assert scraper.stats['retries'] == 2
+    assert scraper.stats['estimated_credits'] == 0
+
+
+def test_no_retry_on_4xx():
+    scraper, text = _request([FakeResponse(401), FakeResponse(200, "<html>")])
+    assert text == ""
+    assert len(scraper._session.calls) == 1
+    assert scraper.stats['retries'] == 0
+
+
+def test_estimated_credits_for_bypass():
+    scraper, _ = _request([FakeResponse(200, "<html>")], bypass='datadome')
+    assert scraper.stats['estimated_credits'] == SCRAPEOPS_ESTIMATED_CREDITS['bypass']
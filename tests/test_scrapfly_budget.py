@@ -0,0 +1,103 @@
+"""
+ScrapflyScraper: Credit-Budget mit einem Fake-Client (SDK läuft im Thread-Pool)
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.scraper import scrapfly_scraper
+from src.scraper.scrapfly_scraper import ScrapflyScraper
+
+
+class FakeResult:
+    def __init__(self, cost: int):
+        self.context = {'cost': {'total': cost}}
+        self.scrape_result = {'status_code': 200, 'content': '<html></html>'}
+
+
+class FakeClient:
+    """Wie das SDK: blockierendes scrape() im Executor, Abbruch stoppt es nicht"""
+
+    def __init__(self, cost: int, delays: dict, default_delay: float = 0.01):
+        self.cost = cost
+        self.delays = delays
+        self.default_delay = default_delay
+        self.sent = []
+        self.billed = 0
+
+    def scrape(self, config):
+        self.sent.append(config['url'])
+        time.sleep(self.delays.get(config['url'], self.default_delay))
+        self.billed += self.cost
+        return FakeResult(self.cost)
+
+    async def async_scrape(self, config):
+        return await asyncio.get_running_loop().run_in_executor(None, self.scrape, config)
+
+
+@pytest.fixture(autouse=True)
+def fake_config(monkeypatch):
+    monkeypatch.setattr(scrapfly_scraper, 'ScrapeConfig', lambda **kwargs: kwargs, raising=False)
+
+
+def _scraper(client: FakeClient, budget: int) -> ScrapflyScraper:
+    scraper = ScrapflyScraper(api_key='test', log_callback=lambda *args: None,
+                              concurrency=3, credit_budget=budget)
+    scraper.client = client
+    return scraper
+
+
+async def _run(scraper: ScrapflyScraper, pages: dict, max_pages: int = 0):
+    listings, parsed = [], []
+
+    def parse(html, found, base_url, website):
+        parsed.append(html)
+        count = pages.get(len(parsed), 0)
+        found.extend(range(count))
+        return count
+
+    scraper._parse_listings = parse
+    await scraper._scrape_pages(lambda page: f"u{page}", max_pages, "https://x", 'immowelt',
+                                lambda html: None, listings)
+    # Abgebrochene Anfragen laufen im Thread-Pool zu Ende
+    await asyncio.sleep(0.3)
+    return listings
+
+
+def test_cancelled_in_flight_pages_are_charged():
+    # Seite 2 ist leer -> Seiten 3 und 4 laufen schon und werden abgebrochen
+    client = FakeClient(20, {'u3': 0.1, 'u4': 0.1})
+    scraper = _scraper(client, 10_000)
+    asyncio.run(_run(scraper, {1: 5}))
+    assert client.sent == ['u1', 'u2', 'u3', 'u4']
+    # Reservierung (30) der abgebrochenen Seiten verbucht, nichts bleibt reserviert
+    assert scraper.credits_used >= client.billed
+    assert scraper._reserved == 0
+
+
+def test_budget_never_exceeded():
+    client = FakeClient(70, {})
+    scraper = _scraper(client, 300)
+    asyncio.run(_run(scraper, {page: 5 for page in range(1, 50)}))
+    assert client.billed <= 300
+    assert scraper.credits_used >= client.billed
+    assert scraper._reserved == 0
+
+
+def test_cancel_before_start_not_charged():
+    client = FakeClient(20, {}, default_delay=0.2)
+    scraper = _scraper(client, 10_000)
+
+    async def main():
+        task = asyncio.ensure_future(_run(scraper, {page: 5 for page in range(1, 50)}))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.3)
+
+    asyncio.run(main())
+    assert scraper._reserved == 0
+    assert scraper.credits_used == 30 * len(client.sent)
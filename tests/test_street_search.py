@@ -0,0 +1,75 @@
+"""
+StreetAutomaton: Treffer identisch zur naiven Suche (auch überlappend)
+"""
+
+import random
+
+import pytest
+
+from src.scraper.street_search import StreetAutomaton
+
+
+def naive_hits(patterns, text):
+    """Alle Vorkommen jeder Variante per str.find (Referenz)"""
+    hits = []
+    for pid, pattern in enumerate(dict.fromkeys(patterns)):
+        if not pattern:
+            hits.append((0, 0, pid))
+            continue
+        start = text.find(pattern)
+        while start != -1:
+            hits.append((start, start + len(pattern), pid))
+            start = text.find(pattern, start + 1)
+    return sorted(hits)
+
+
+CASES = [
+    # Präfixe und Suffixe voneinander
+    (["haupt", "hauptstrasse", "strasse", "str", "asse"], "wohnung hauptstrasse 5 nahe bahnhofstrasse"),
+    # Überlappend und selbstüberlappend
+    (["aa", "aaa", "a"], "aaaa"),
+    (["he", "she", "his", "hers"], "ushers and his shed"),
+    (["anna", "nna", "annanna"], "annannanna"),
+    # Kein Treffer, leerer Text
+    (["tal", "anger"], "leopoldstrasse 5 muenchen"),
+    (["tal"], ""),
+    # Leere Variante trifft immer
+    (["", "tal"], "im tal 3"),
+    ([], "irgendein text"),
+]
+
+
+@pytest.mark.parametrize('patterns,text', CASES)
+def test_hits_identical_to_naive(patterns, text):
+    automaton = StreetAutomaton(patterns).build()
+    assert sorted(automaton.find_all(text)) == naive_hits(patterns, text)
+
+
+@pytest.mark.parametrize('patterns,text', CASES)
+def test_found_ids_like_in(patterns, text):
+    automaton = StreetAutomaton(patterns)
+    expected = {automaton.pattern_id(p) for p in patterns if p in text}
+    assert automaton.found_ids(text) == expected
+
+
+def test_random_texts_identical_to_naive():
+    rng = random.Random(1)
+    alphabet = "abs "
+    for _ in range(200):
+        patterns = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5))) for _ in range(8)]
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+        automaton = StreetAutomaton(patterns).build()
+        assert sorted(automaton.find_all(text)) == naive_hits(patterns, text)
+
+
+def test_duplicate_pattern_same_id():
+    automaton = StreetAutomaton()
+    assert automaton.add("tal") == automaton.add("tal") == 0
+    assert automaton.add("anger") == 1
+
+
+def test_add_after_build_fails():
+    automaton = StreetAutomaton(["tal"]).build()
+    assert automaton.add("tal") == 0
+    with pytest.raises(RuntimeError):
+        automaton.add("anger")
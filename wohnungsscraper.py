@@ -15,6 +15,7 @@ Modulare Struktur:
 
 import os
 import sys
+import multiprocessing
 from pathlib import Path
 
 # Pfade fuer frozen/normale Ausfuehrung
@@ -73,6 +74,11 @@ def main():
     # API initialisieren
     api = API(db_path)
     
+    # Browser im Hintergrund vorwaermen (nur mit WOHNUNGSSCRAPER_BROWSER_SERVICE=1,
+    # sonst startet jede Suche ihren eigenen Browser)
+    if os.environ.get("WOHNUNGSSCRAPER_BROWSER_SERVICE", "0") == "1":
+        api.start_browser_service(data_dir / "browser_state")
+    
     # HTML laden
     html_content = load_html_content()
     
@@ -89,8 +95,13 @@ def main():
         easy_drag=True
     )
     
-    webview.start(debug=False)
+    try:
+        webview.start(debug=False)
+    finally:
+        api.shutdown()
 
 
 if __name__ == '__main__':
+    # Noetig fuer den Prozess-Pool (paralleler Abgleich) in der EXE
+    multiprocessing.freeze_support()
     main()